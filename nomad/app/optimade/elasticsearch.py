@@ -1,26 +1,90 @@
-from typing import List, Dict, Set, Any
+from typing import List, Dict, Set, Any, Tuple
+import functools
 from elasticsearch_dsl import Q
 
-from optimade.filterparser import LarkParser
 from optimade.server.entry_collections import EntryCollection
 from optimade.server.exceptions import BadRequest
 from optimade.server.mappers import StructureMapper
 from optimade.server.mappers.entries import classproperty
 from optimade.models import StructureResource
+from optimade.models.structures import CORRELATED_STRUCTURE_FIELDS
 
 from nomad.units import ureg
 from nomad.atomutils import Formula
+from nomad.archive import ArchiveDict, ArchiveList
+from nomad.metainfo.elasticsearch_extension import Elasticsearch, SearchQuantity
 from nomad.search import search
 from nomad.app.v1.models import MetadataPagination, MetadataRequired
 from nomad import datamodel, files, utils, config
 
-from .filterparser import _get_transformer as get_transformer
+from .filterparser import _get_transformer as get_transformer, CachedFilterParser
 from .common import provider_specific_fields
 
 
 logger = utils.get_logger(__name__)
 
 
+# The optimade attributes that are stored in the search index and can be served from
+# the elasticsearch source. All other attributes are read from the archive.
+_indexed_attributes = {
+    quantity.name for quantity in datamodel.OptimadeEntry.m_def.all_quantities.values()
+    if len(quantity.m_get_annotations(Elasticsearch, as_list=True)) > 0}
+
+_archive_attributes = {
+    definition.name for definition in datamodel.OptimadeEntry.m_def.all_properties.values()
+    if definition.name not in _indexed_attributes}
+
+
+def _correlated_attribute_groups() -> List[Set[str]]:
+    '''
+    Merges the optimade structure fields that have to be present together into
+    disjoint groups.
+    '''
+    groups: List[Set[str]] = []
+    for field_set in CORRELATED_STRUCTURE_FIELDS:
+        group = set(field_set)
+        for other in [other for other in groups if not other.isdisjoint(group)]:
+            group |= other
+            groups.remove(other)
+        groups.append(group)
+
+    return groups
+
+
+_correlated_attributes = _correlated_attribute_groups()
+
+# Requesting any of these attributes requires to read the archive. Attributes that
+# correlate with non indexed attributes are included, because optimade warns about
+# structures that only have values for some of them.
+_archive_dependent_attributes = _archive_attributes.union(*[
+    group for group in _correlated_attributes if not group.isdisjoint(_archive_attributes)])
+
+
+def _is_source_field(search_quantity: SearchQuantity) -> bool:
+    '''
+    True, if the elasticsearch source holds the archive value of the given provider
+    field. Values that are transformed, stored in additional fields, or only kept as
+    suggestions have to be read from the archive.
+    '''
+    annotation = search_quantity.annotation
+    return annotation.value is None and annotation.field is None and not annotation.suggestion
+
+
+def _archive_to_dict(value):
+    if isinstance(value, ArchiveDict):
+        return value.to_dict()
+    if isinstance(value, ArchiveList):
+        return value.to_list()
+    return value
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalized_formulas(formula: str) -> Tuple[str, str, str]:
+    ''' Returns the reduced, anonymous, and hill formula for the given formula. '''
+    formula_obj = Formula(formula)
+    return formula_obj.format('reduced'), formula_obj.format('anonymous'), formula_obj.format('hill')
+
+
 class NomadStructureMapper(StructureMapper):
     @classmethod
     def deserialize(cls, results):
@@ -52,7 +116,8 @@ class StructureCollection(EntryCollection):
             resource_mapper=NomadStructureMapper,
             transformer=get_transformer(without_prefix=False, mapper=NomadStructureMapper))
 
-        self.parser = LarkParser(version=(1, 0, 0), variant="default")
+        self.parser = CachedFilterParser(
+            self.transformer, without_prefix=False, version=(1, 0, 0), variant="default")
 
         # check aliases do not clash with mongo operators
         self._check_aliases(self.resource_mapper.all_aliases())
@@ -97,6 +162,13 @@ class StructureCollection(EntryCollection):
             include_fields
         )
 
+    def handle_query_params(self, params) -> Dict[str, Any]:
+        criteria = super().handle_query_params(params)
+        # The fields are removed from the criteria before _run_db_query is called. We keep
+        # a copy to only request the necessary values from elasticsearch.
+        criteria['response_fields'] = set(criteria['fields'])
+        return criteria
+
     def _check_aliases(self, aliases):
         pass
 
@@ -109,53 +181,90 @@ class StructureCollection(EntryCollection):
             upload_files_cache = {}
 
         entry_id, upload_id = es_result['entry_id'], es_result['upload_id']
-        upload_files = upload_files_cache.get(upload_id)
 
-        if upload_files is None:
-            upload_files = files.UploadFiles.get(upload_id)
-            if upload_files is None:
-                logger.error('missing upload', upload_id=upload_id)
-                return None
-
-            upload_files_cache[upload_id] = upload_files
-
-        try:
-            archive_reader = upload_files.read_archive(entry_id)
-        except KeyError:
-            logger.error('missing archive entry', upload_id=upload_id, entry_id=entry_id)
-            return None
+        # Lazy read the archive only if non indexed attributes or provider fields are requested
+        archive: Dict[str, Any] = {}
 
-        entry_archive_reader = archive_reader[entry_id]
-        archive = {
-            'metadata': entry_archive_reader['metadata'].to_dict()}
+        def get_entry_archive_reader():
+            if 'reader' in archive:
+                return archive['reader']
 
-        # Lazy load results if only if results provider specfic field is requested
-        def get_results():
-            if 'results' not in archive:
-                archive['results'] = entry_archive_reader['results'].to_dict()
+            archive['reader'] = None
+            upload_files = upload_files_cache.get(upload_id)
+            if upload_files is None:
+                upload_files = files.UploadFiles.get(upload_id)
+                if upload_files is None:
+                    logger.error('missing upload', upload_id=upload_id)
+                    return None
+
+                upload_files_cache[upload_id] = upload_files
+
+            try:
+                archive['reader'] = upload_files.read_archive(entry_id)[entry_id]
+            except KeyError:
+                logger.error('missing archive entry', upload_id=upload_id, entry_id=entry_id)
+
+            return archive['reader']
+
+        def get_archive_section(name):
+            if name not in archive:
+                entry_archive_reader = get_entry_archive_reader()
+                archive[name] = None if entry_archive_reader is None else _archive_to_dict(
+                    entry_archive_reader.get(name))
+            return archive[name]
+
+        attrs = {
+            key: value for key, value in es_result.get('optimade', {}).items()
+            if key in _indexed_attributes}
+
+        elements_ratios = attrs.get('elements_ratios')
+        if elements_ratios is not None:
+            # the index stores the ratios together with their elements
+            attrs['elements_ratios'] = [
+                item['elements_ratios'] if isinstance(item, dict) else item
+                for item in elements_ratios]
+
+        if response_fields is None or not _archive_dependent_attributes.isdisjoint(response_fields):
+            entry_archive_reader = get_entry_archive_reader()
+            if entry_archive_reader is None:
+                return None
 
-        attrs = archive['metadata'].get('optimade', {})
+            optimade = entry_archive_reader['metadata'].get('optimade', {})
+            for key in _archive_attributes:
+                if key in optimade:
+                    attrs[key] = _archive_to_dict(optimade[key])
 
         attrs['immutable_id'] = entry_id
         attrs['id'] = entry_id
-        attrs['last_modified'] = archive['metadata']['upload_create_time']
+        attrs['last_modified'] = es_result.get('upload_create_time')
 
         # TODO this should be removed, once all data is reprocessed with the right normalization
-        original_formula = attrs['chemical_formula_hill']
+        original_formula = attrs.get('chemical_formula_hill')
         if original_formula is not None:
-            formula = Formula(original_formula)
-            attrs['chemical_formula_reduced'] = formula.format('reduced')
-            attrs['chemical_formula_anonymous'] = formula.format('anonymous')
-            attrs['chemical_formula_hill'] = formula.format('hill')
-            attrs['chemical_formula_descriptive'] = attrs['chemical_formula_hill']
-        dimension_types = attrs['dimension_types']
+            reduced, anonymous, hill = _normalized_formulas(original_formula)
+            attrs['chemical_formula_reduced'] = reduced
+            attrs['chemical_formula_anonymous'] = anonymous
+            attrs['chemical_formula_hill'] = hill
+            attrs['chemical_formula_descriptive'] = hill
+        dimension_types = attrs.get('dimension_types')
         if isinstance(dimension_types, int):
             attrs['dimension_types'] = [1] * dimension_types + [0] * (3 - dimension_types)
             attrs['nperiodic_dimensions'] = dimension_types
         elif isinstance(dimension_types, list):
             attrs['nperiodic_dimensions'] = sum(dimension_types)
 
+        # Required optimade attributes have to be present, even if they have no value.
+        for key in _indexed_attributes | _archive_attributes:
+            attrs.setdefault(key, None)
+
         if response_fields is not None:
+            # Not requested attributes are removed from the response anyway. Partially
+            # available groups of correlated attributes would cause warnings.
+            for group in _correlated_attributes:
+                if group.isdisjoint(response_fields):
+                    for key in group:
+                        attrs[key] = None
+
             for request_field in response_fields:
                 if not request_field.startswith('_nmd_'):
                     continue
@@ -180,17 +289,23 @@ class StructureCollection(EntryCollection):
 
                 try:
                     path = search_quantity.qualified_name.split('.')
-                    if path[0] == 'results':
-                        get_results()
-                    section = archive
+                    if _is_source_field(search_quantity):
+                        section = es_result
+                    elif path[0] == 'results':
+                        section = {'results': get_archive_section('results')}
+                    else:
+                        section = get_archive_section('metadata')
+                    value = None
                     for segment in path:
                         if isinstance(section, list):
                             if len(section) == 0:
                                 value = None
                                 break
                             section = section[0]
-                        value = section[segment]
+                        value = section.get(segment)
                         section = value
+                        if value is None:
+                            break
 
                     # Empty values are not stored and only the magnitude of
                     # Quantities is stored.
@@ -221,6 +336,17 @@ class StructureCollection(EntryCollection):
 
         return optimade_results
 
+    def _required_search_quantities(self, response_fields: Set[str] = None) -> List[str]:
+        ''' The search quantities that are necessary to create the requested results. '''
+        include = ['entry_id', 'upload_id', 'upload_create_time', 'optimade.*']
+        for name, search_quantity in provider_specific_fields().items():
+            if response_fields is not None and f'_nmd_{name}' not in response_fields:
+                continue
+            if _is_source_field(search_quantity):
+                include.append(search_quantity.qualified_name)
+
+        return include
+
     def _run_db_query(self, criteria: Dict[str, Any], single_entry=False):
 
         sort, order = criteria.get('sort', (('chemical_formula_reduced', 1),))[0]
@@ -240,7 +366,8 @@ class StructureCollection(EntryCollection):
         es_response = search(
             owner='public',
             query=search_query,
-            required=MetadataRequired(include=['entry_id', 'upload_id']),
+            required=MetadataRequired(
+                include=self._required_search_quantities(criteria.get('response_fields'))),
             pagination=MetadataPagination(
                 page_size=criteria['limit'],
                 page_offset=criteria.get('skip', 0),
@@ -16,19 +16,67 @@
 # limitations under the License.
 #
 
-from typing import Dict
+from typing import Dict, Tuple
+import copy
+import threading
 from elasticsearch_dsl import Q
-from cachetools import cached
+from elasticsearch_dsl.query import Query
+from cachetools import cached, LRUCache
 
 from optimade.filterparser import LarkParser
 from optimade.filtertransformers.elasticsearch import (
     ElasticsearchQuantity as Quantity, ElasticTransformer as OPTElasticTransformer)
 
+from nomad import config
+
 from .common import provider_specific_fields
 
 
 _parser = LarkParser(version=(1, 0, 1))
 
+_filter_cache_lock = threading.Lock()
+# (grammar version, grammar variant, filter str, without_prefix) -> elasticsearch query
+_filter_cache: LRUCache = None
+
+
+def _get_filter_cache() -> LRUCache:
+    global _filter_cache
+
+    cache_size = config.services.optimade_filter_cache_size
+    if not cache_size:
+        return None
+
+    if _filter_cache is None or _filter_cache.maxsize != cache_size:
+        _filter_cache = LRUCache(maxsize=cache_size)
+    return _filter_cache
+
+
+def _get_cached_query(key: Tuple[Tuple[int, int, int], str, str, bool]) -> Q:
+    with _filter_cache_lock:
+        cache = _get_filter_cache()
+        query = None if cache is None else cache.get(key)
+
+    # queries are mutable, the cached ones must not be changed by the callers
+    return None if query is None else copy.deepcopy(query)
+
+
+def _cache_query(key: Tuple[Tuple[int, int, int], str, str, bool], query: Q) -> Q:
+    with _filter_cache_lock:
+        cache = _get_filter_cache()
+        if cache is None:
+            return query
+        cache[key] = query
+
+    return copy.deepcopy(query)
+
+
+def clear_filter_cache():
+    ''' Clears the cached queries of parsed filters. '''
+    with _filter_cache_lock:
+        cache = _get_filter_cache()
+        if cache is not None:
+            cache.clear()
+
 
 class FilterException(Exception):
     ''' Raised on parsing a filter expression with syntactic of semantic errors. '''
@@ -82,6 +130,11 @@ def parse_filter(filter_str: str, without_prefix=False) -> Q:
         FilterException: If the given str cannot be parsed, or if there are any semantic
             errors in the given expression.
     '''
+    cache_key = (_parser.version, _parser.variant, filter_str, without_prefix)
+    query = _get_cached_query(cache_key)
+    if query is not None:
+        return query
+
     from .elasticsearch import NomadStructureMapper
     transformer = _get_transformer(without_prefix, mapper=NomadStructureMapper)
 
@@ -95,10 +148,40 @@ def parse_filter(filter_str: str, without_prefix=False) -> Q:
     except Exception as e:
         raise FilterException('Semantic error: %s' % str(e))
 
-    return query
+    return _cache_query(cache_key, query)
+
+
+class CachedFilterParser(LarkParser):
+    '''
+    A parser for optimade entry collections that directly returns the transformed
+    elasticsearch query. Queries are cached by grammar version and filter string, and
+    shared with :func:`parse_filter` if it uses the same grammar. The collection's
+    :class:`ElasticTransformer` passes the returned queries through.
+    '''
+    def __init__(self, transformer: 'ElasticTransformer', without_prefix=False, **kwargs):
+        super().__init__(**kwargs)
+        self.transformer = transformer
+        self.without_prefix = without_prefix
+
+    def parse(self, filter_: str) -> Q:  # type: ignore
+        cache_key = (self.version, self.variant, filter_, self.without_prefix)
+        query = _get_cached_query(cache_key)
+        if query is not None:
+            return query
+
+        # raises BadRequest for syntax errors, like the original parser
+        parse_tree = super().parse(filter_)
+        return _cache_query(cache_key, self.transformer.transform(parse_tree))
 
 
 class ElasticTransformer(OPTElasticTransformer):
+    def transform(self, tree):
+        if isinstance(tree, Query):
+            # already transformed by the CachedFilterParser
+            return tree
+
+        return super().transform(tree)
+
     def _query_op(self, quantity, op, value, nested=None):
         """
         Return a range, match, or term query for the given quantity, comparison
@@ -16,6 +16,7 @@
 # limitations under the License.
 #
 import math
+from contextlib import contextmanager
 from datetime import datetime
 
 from typing import Optional, Set, Union, Dict, Iterator, Any, List
@@ -40,7 +41,7 @@ from nomad.files import StreamedFile, create_zipstream
 from nomad.utils import strip
 from nomad.archive import RequiredReader, RequiredValidationError, ArchiveQueryError
 from nomad.search import AuthenticationRequiredError, SearchError, update_metadata as es_update_metadata
-from nomad.search import search, QueryValidationError
+from nomad.search import search_batch, search_iterator, QueryValidationError
 from nomad.metainfo.elasticsearch_extension import entry_type
 
 from .auth import create_user_dependency
@@ -332,17 +333,35 @@ _bad_archive_required_response = status.HTTP_400_BAD_REQUEST, {
         The given required specification could not be understood.''')}
 
 
+_bad_batch_response = status.HTTP_400_BAD_REQUEST, {
+    'model': HTTPExceptionModel,
+    'description': strip('''
+        Too many queries were sent at once.''')}
+
+
 _bad_metadata_edit_response = status.HTTP_400_BAD_REQUEST, {
     'model': HTTPExceptionModel,
     'description': strip('''
         The given edit actions cannot be performed by you on the given query.''')}
 
 
-def perform_search(*args, **kwargs):
+def perform_search(**kwargs):
+    return perform_search_batch([kwargs])[0]
+
+
+def perform_search_batch(searches: List[Dict[str, Any]]):
+    with _search_errors():
+        search_responses = search_batch(searches)
+        for search_response in search_responses:
+            search_response.es_query = None
+        return search_responses
+
+
+@contextmanager
+def _search_errors():
+    ''' Translates search errors into the respective HTTP errors. '''
     try:
-        search_response = search(*args, **kwargs)
-        search_response.es_query = None
-        return search_response
+        yield
     except QueryValidationError as e:
         raise RequestValidationError(errors=e.errors)
     except AuthenticationRequiredError as e:
@@ -391,6 +410,40 @@ async def post_entries_metadata_query(
         user_id=user.user_id if user is not None else None)
 
 
+@router.post(
+    '/query/batch', tags=[metadata_tag],
+    summary='Search entries and retrieve their metadata with multiple queries at once',
+    response_model=List[MetadataResponse],
+    responses=create_responses(_bad_owner_response, _bad_batch_response),
+    response_model_exclude_unset=True,
+    response_model_exclude_none=True)
+async def post_entries_metadata_query_batch(
+        request: Request,
+        data: List[Metadata] = Body(...),
+        user: User = Depends(create_user_dependency())):
+
+    '''
+    Executes multiple queries like `/entries/query` and returns a list with a response
+    for each query. All queries are answered with one request to the search backend,
+    which is faster than sending the queries one after another, e.g. to fill multiple
+    independent statistics on a page.
+
+    The number of queries is limited by the `max_query_batch_size` setting of the
+    deployment. If one query fails, the whole request fails.
+    '''
+    if len(data) > config.services.max_query_batch_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'At most {config.services.max_query_batch_size} queries can be sent at once.')
+
+    user_id = user.user_id if user is not None else None
+    return perform_search_batch([
+        dict(
+            owner=query.owner, query=query.query, pagination=query.pagination,
+            required=query.required, aggregations=query.aggregations, user_id=user_id)
+        for query in data])
+
+
 @router.get(
     '', tags=[metadata_tag],
     summary='Search entries and retrieve their metadata',
@@ -425,22 +478,12 @@ async def get_entries_metadata(
 
 
 def _do_exaustive_search(owner: Owner, query: Query, include: List[str], user: User) -> Iterator[Dict[str, Any]]:
-    page_after_value = None
-    while True:
-        response = perform_search(
-            owner=owner, query=query,
-            pagination=MetadataPagination(page_size=100, page_after_value=page_after_value, order_by='upload_id'),
+    with _search_errors():
+        yield from search_iterator(
+            owner=owner, query=query, order_by='upload_id',
             required=MetadataRequired(include=include),
             user_id=user.user_id if user is not None else None)
 
-        page_after_value = response.pagination.next_page_after_value
-
-        for result in response.data:
-            yield result
-
-        if page_after_value is None or len(response.data) == 0:
-            break
-
 
 class _Uploads:
     '''
@@ -15,10 +15,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-import copy
 import datetime
-from typing import Any, Dict
+import json
+import threading
+from typing import Any, Dict, Tuple
 
+from cachetools import LRUCache
 from fastapi import APIRouter, Path, status, HTTPException
 from pydantic import BaseModel, Field
 
@@ -32,6 +34,36 @@ from nomad import config
 
 logger = get_logger(__name__)
 
+_package_definitions_lock = threading.Lock()
+# section definition id -> JSON serialized package definition
+_package_definitions: LRUCache = None
+# definition ids of packages that are known to be stored in mongo
+_stored_package_definitions: LRUCache = None
+
+
+def _get_package_definition_caches() -> Tuple[LRUCache, LRUCache]:
+    global _package_definitions, _stored_package_definitions
+
+    cache_size = config.process.package_definition_cache_size
+    if not cache_size:
+        return None, None
+
+    if _package_definitions is None or _package_definitions.maxsize != cache_size:
+        _package_definitions = LRUCache(maxsize=cache_size)
+        _stored_package_definitions = LRUCache(maxsize=cache_size)
+    return _package_definitions, _stored_package_definitions
+
+
+def clear_package_definition_cache():
+    '''
+    Clears the cached package definitions. Only necessary if package definitions are
+    removed from mongo, e.g. when the database is reset.
+    '''
+    with _package_definitions_lock:
+        for cache in _get_package_definition_caches():
+            if cache is not None:
+                cache.clear()
+
 
 class PackageDefinition(MSection):
     m_def = Section(a_mongo=MongoDocument())
@@ -84,15 +116,31 @@ class PackageDefinition(MSection):
 
 
 def store_package_definition(package: Package, **kwargs):
+    '''
+    Stores the given package in mongo, if no package with the same definition id
+    is stored yet. The definition ids of stored packages are remembered, so that
+    storing the same package again (e.g. for many entries with the same schema) does
+    not require a database request.
+    '''
     if package is None:
         return
 
-    if PackageDefinition.m_def.a_mongo.objects(definition_id=package.definition_id).count() > 0:
-        logger.info(f'Package {package.definition_id} already exists. Skipping.')
-        return
+    definition_id = package.definition_id
+    with _package_definitions_lock:
+        _, stored_package_definitions = _get_package_definition_caches()
+        if stored_package_definitions is not None and definition_id in stored_package_definitions:
+            return
+
+    if PackageDefinition.m_def.a_mongo.objects(definition_id=definition_id).count() > 0:
+        logger.info(f'Package {definition_id} already exists. Skipping.')
+    else:
+        mongo_package = PackageDefinition(package, **kwargs)
+        mongo_package.a_mongo.save()
 
-    mongo_package = PackageDefinition(package, **kwargs)
-    mongo_package.a_mongo.save()
+    with _package_definitions_lock:
+        _, stored_package_definitions = _get_package_definition_caches()
+        if stored_package_definitions is not None:
+            stored_package_definitions[definition_id] = True
 
 
 #
@@ -121,21 +169,38 @@ class PackageDefinitionResponse(BaseModel):
 
 
 def get_package_by_section_definition_id(section_definition_id: str) -> dict:
-    packages = PackageDefinition.m_def.a_mongo.objects(section_definition_ids=section_definition_id)
-
-    if packages.count() == 0:
-        raise HTTPException(
-            status.HTTP_404_NOT_FOUND,
-            detail='Package not found. The given section definition is not contained in any packages.'
-        )
-
-    result = packages.first()
-
-    pkg_definition = result.package_definition
-    # add entry_id_based_name as a field which will be later used as the package name
-    pkg_definition['entry_id_based_name'] = str(result.qualified_name)
-
-    return copy.deepcopy(pkg_definition)
+    '''
+    Returns the definition of the package that contains the given section definition.
+    Package definitions are immutable (their id is a hash of their content) and are
+    therefore cached. Each call returns a new dict that can be modified by the caller.
+    '''
+    with _package_definitions_lock:
+        package_definitions, _ = _get_package_definition_caches()
+        serialized_pkg_definition = package_definitions.get(section_definition_id) \
+            if package_definitions is not None else None
+
+    if serialized_pkg_definition is None:
+        result = PackageDefinition.m_def.a_mongo.objects(
+            section_definition_ids=section_definition_id).first()
+
+        if result is None:
+            raise HTTPException(
+                status.HTTP_404_NOT_FOUND,
+                detail='Package not found. The given section definition is not contained in any packages.'
+            )
+
+        pkg_definition = dict(result.package_definition)
+        # add entry_id_based_name as a field which will be later used as the package name
+        pkg_definition['entry_id_based_name'] = str(result.qualified_name)
+
+        serialized_pkg_definition = json.dumps(pkg_definition)
+        with _package_definitions_lock:
+            package_definitions, _ = _get_package_definition_caches()
+            if package_definitions is not None:
+                package_definitions[section_definition_id] = serialized_pkg_definition
+
+    # decoding the cached JSON is cheaper than a deep copy of the dict
+    return json.loads(serialized_pkg_definition)
 
 
 @router.get(
@@ -16,18 +16,24 @@
 # limitations under the License.
 #
 
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Set, Tuple
 from collections import defaultdict
+import threading
+import time
+from cachetools import TTLCache
 from pydantic import BaseModel, Field
 from fastapi import APIRouter, Depends, Request, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from elasticsearch_dsl import Search
 from elasticsearch_dsl.utils import AttrList
 from elasticsearch.exceptions import RequestError
 
-from nomad.metainfo.elasticsearch_extension import entry_index, entry_type
+from nomad import config
+from nomad.metainfo.elasticsearch_extension import entry_index, entry_type, index_generation
+from nomad.search import search
 
 from .auth import create_user_dependency
-from ..models import User
+from ..models import User, Aggregation, TermsAggregation, MetadataPagination
 
 
 router = APIRouter()
@@ -36,6 +42,42 @@ router = APIRouter()
 # quantities. FastAPI uses python enums to validate and document options.
 suggestable_quantities: Set[str] = None
 
+_suggestion_cache_lock = threading.Lock()
+# (quantity, size, input) -> (index generation, {value: weight})
+_suggestion_cache: TTLCache = None
+
+_top_suggestions_lock = threading.Lock()
+# quantity -> [(value, weight)] of its most frequent values
+_top_suggestions: Dict[str, List[Tuple[str, float]]] = None
+_top_suggestions_generation: int = None
+_top_suggestions_time = 0.0
+_top_suggestions_updating = False
+
+
+def _get_suggestion_cache() -> TTLCache:
+    global _suggestion_cache
+
+    cache_size = config.elastic.suggestion_cache_size
+    if not cache_size:
+        return None
+
+    if _suggestion_cache is None or _suggestion_cache.maxsize != cache_size or \
+            _suggestion_cache.ttl != config.elastic.suggestion_cache_ttl:
+        _suggestion_cache = TTLCache(maxsize=cache_size, ttl=config.elastic.suggestion_cache_ttl)
+    return _suggestion_cache
+
+
+def clear_suggestion_cache():
+    ''' Clears the cached suggestions and the precomputed most frequent values. '''
+    global _top_suggestions
+
+    with _suggestion_cache_lock:
+        if _suggestion_cache is not None:
+            _suggestion_cache.clear()
+
+    with _top_suggestions_lock:
+        _top_suggestions = None
+
 
 class SuggestionError(Exception): pass
 
@@ -64,41 +106,124 @@ class SuggestionsRequest(BaseModel):
     )
 
 
-@router.post(
-    '',
-    tags=['suggestions'],
-    summary='Get a list of suggestions for the given quantity names and input.',
-    response_model=Dict[str, List[Suggestion]],
-    response_model_exclude_unset=True,
-    response_model_exclude_none=True)
-async def get_suggestions(
-        request: Request,
-        data: SuggestionsRequest,
-        user: User = Depends(create_user_dependency())):
+def _match(name: str, text: str, value: str) -> Optional[str]:
+    '''
+    Returns the given value, or the variant of the value that matches the given text
+    best. Returns None, if neither contains the text.
+    '''
+    variants = entry_type.suggestions[name].variants
+    if variants:
+        best_match = float("Inf")
+        best_option = None
+        for variant in variants(value):
+            match_start = variant.lower().strip().find(text)
+            if match_start >= 0 and match_start < best_match:
+                best_match = match_start
+                best_option = variant
+        return best_option
 
-    global suggestable_quantities
-    if suggestable_quantities is None:
-        suggestable_quantities = set(entry_type.suggestions.keys())
+    if text in value.lower().strip():
+        return value
 
-    search = Search(index=entry_index.index_name)
-    names = [x.name for x in data.quantities]
-    names_es = [x.name.replace(".", "-") for x in data.quantities]
-    for index, quantity in enumerate(data.quantities):
-        name_es = names_es[index]
-        if quantity.name not in suggestable_quantities:
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=[dict(
-                    msg=(
-                        f'The string "{quantity.name}" does not represent a suggestable quantity. '
-                        f'Possible values are {", ".join(suggestable_quantities)}.'),
-                    loc=['quantities', index])
-                ]
-            )
+    return None
+
+
+def _prefix_match(name: str, text: str, value: str) -> Optional[str]:
+    '''
+    Returns the given value, or its first variant, if one of the values that are
+    indexed for the completion suggester starts with the given text. This is how the
+    completion suggester matches inputs. Returns None otherwise.
+    '''
+    annotation = entry_type.suggestions[name]
+    for variant in annotation.variants(value) if annotation.variants else [value]:
+        inputs = annotation.value(variant) if annotation.value is not None else [variant]
+        if any(input.lower().strip().startswith(text) for input in inputs):
+            return variant
+
+    return None
+
+
+def _top_suggestion_quantities() -> Set[str]:
+    ''' The suggestable quantities with precomputed most frequent values. '''
+    return set(
+        name for name in entry_type.suggestions
+        if name in entry_type.quantities and entry_type.quantities[name].aggregatable)
+
+
+def _get_top_suggestions() -> Dict[str, List[Tuple[str, float]]]:
+    '''
+    Returns the most frequent values of all suggestable quantities that can be
+    aggregated. The values are computed with one search and recomputed periodically
+    and after this process modified the indices. While one thread recomputes the
+    values, other threads use the previous values.
+    '''
+    global _top_suggestions, _top_suggestions_generation, _top_suggestions_time, \
+        _top_suggestions_updating
+
+    generation = index_generation()
+    with _top_suggestions_lock:
+        if _top_suggestions is not None:
+            if _top_suggestions_updating or (
+                    _top_suggestions_generation == generation and
+                    time.time() - _top_suggestions_time < config.elastic.suggestion_top_ttl):
+                return _top_suggestions
+        _top_suggestions_updating = True
+
+    try:
+        names = sorted(_top_suggestion_quantities())
+        response = search(
+            owner=None,
+            pagination=MetadataPagination(page_size=0),
+            aggregations={
+                name: Aggregation(terms=TermsAggregation(
+                    quantity=name, size=config.elastic.suggestion_top_size))
+                for name in names})
+
+        top_suggestions: Dict[str, List[Tuple[str, float]]] = {}
+        for name in names:
+            top_suggestions[name] = [
+                (bucket.value, bucket.count)
+                for bucket in response.aggregations[name].terms.data  # pylint: disable=no-member
+                if isinstance(bucket.value, str) and bucket.count > 0]
+    finally:
+        with _top_suggestions_lock:
+            _top_suggestions_updating = False
 
+    with _top_suggestions_lock:
+        _top_suggestions = top_suggestions
+        _top_suggestions_generation = generation
+        _top_suggestions_time = time.time()
+        return _top_suggestions
+
+
+def _top_suggestions_for(quantities: List[Quantity], text: str) -> Dict[str, Dict[str, float]]:
+    '''
+    Suggestions for short inputs from the precomputed most frequent values. Like the
+    completion suggester, values are matched by prefix.
+    '''
+    top_suggestions = _get_top_suggestions()
+    suggestions: Dict[str, Dict[str, float]] = defaultdict(dict)
+    for quantity in quantities:
+        values = suggestions[quantity.name]
+        for value, weight in top_suggestions.get(quantity.name, []):
+            if len(values) >= quantity.size:
+                break
+            match = value if text == '' else _prefix_match(quantity.name, text, value)
+            if match is not None and match not in values:
+                values[match] = weight
+
+    return suggestions
+
+
+def _es_suggestions(quantities: List[Quantity], input_str: str) -> Dict[str, Dict[str, float]]:
+    ''' Suggestions from the elasticsearch completion suggester. '''
+    search = Search(index=entry_index.index_name)
+    names = [x.name for x in quantities]
+    names_es = [x.name.replace(".", "-") for x in quantities]
+    for quantity, name_es in zip(quantities, names_es):
         annotation = entry_type.suggestions[quantity.name]
         postfix = ".suggestion" if annotation.field else "__suggestion"
-        search = search.suggest(name_es, data.input, completion={
+        search = search.suggest(name_es, input_str, completion={
             'field': f'{quantity.name}{postfix}',
             'size': quantity.size,
             'skip_duplicates': True,
@@ -115,7 +240,6 @@ async def get_suggestions(
         raise SuggestionError from e
 
     # We return the original field in the source document.
-    response: Dict[str, List[Suggestion]] = defaultdict(list)
     suggestions: Dict[str, Dict[str, float]] = defaultdict(dict)
 
     def add_suggestion(name, value, weight):
@@ -123,17 +247,17 @@ async def get_suggestions(
         if value not in values or values[value] < weight:
             suggestions[name][value] = weight
 
+    # We use the original input text to do the matching. This works
+    # better than the text returned by the completion suggester
+    # (option.text), since it can match several items if there are
+    # multiple values per quantity.
+    text = input_str.lower().strip()
+
     for name, name_es in zip(names, names_es):
         variants = entry_type.suggestions[name].variants
         for option in es_response.suggest[name_es][0].options:
             weight = option._score
 
-            # We use the original input text to do the matching. This works
-            # better than the text returned by the completion suggester
-            # (option.text), since it can match several items if there are
-            # multiple values per quantity.
-            text = data.input.lower().strip()
-
             # Nested fields use the nested document as _source: we need to
             # modify the path accordingly.
             try:
@@ -169,18 +293,90 @@ async def get_suggestions(
             # value has several variants, we have to expand the original source
             # value and return only the best match.
             for option in options:
-                if variants:
-                    best_match = float("Inf")
-                    best_option = option
-                    for variant in variants(option):
-                        match_start = variant.lower().strip().find(text)
-                        if match_start >= 0 and match_start < best_match:
-                            best_match = match_start
-                            best_option = variant
-                    add_suggestion(name, best_option, weight)
-                elif text in option.lower().strip():
-                    add_suggestion(name, option, weight)
+                match = _match(name, text, option)
+                if match is None and variants:
+                    # the suggester matched the value, even if no variant contains the text
+                    match = option
+                if match is not None:
+                    add_suggestion(name, match, weight)
+
+    return suggestions
+
 
+def _get_suggestions(data: SuggestionsRequest) -> Dict[str, Dict[str, float]]:
+    input_str = data.input if data.input is not None else ''
+    text = input_str.lower().strip()
+    quantities = data.quantities
+    suggestions: Dict[str, Dict[str, float]] = {}
+    if len(text) < config.elastic.suggestion_min_input_length:
+        # Empty and short inputs match too many values to be useful and are expensive
+        # for elasticsearch. They are answered with the most frequent values, if the
+        # quantity can be aggregated.
+        top_quantities = _top_suggestion_quantities()
+        suggestions.update(_top_suggestions_for(
+            [quantity for quantity in quantities if quantity.name in top_quantities], text))
+        quantities = [quantity for quantity in quantities if quantity.name not in top_quantities]
+        if len(quantities) == 0:
+            return suggestions
+
+    # Users type one character after the other and the same inputs are requested
+    # by many users. Suggestions are cached per quantity and input.
+    generation = index_generation()
+    keys = {quantity.name: (quantity.name, quantity.size, input_str) for quantity in quantities}
+    with _suggestion_cache_lock:
+        cache = _get_suggestion_cache()
+        if cache is not None:
+            for name, key in keys.items():
+                cached = cache.get(key)
+                if cached is not None and cached[0] == generation:
+                    suggestions[name] = cached[1]
+
+    missing = [quantity for quantity in quantities if quantity.name not in suggestions]
+    if len(missing) > 0:
+        es_suggestions = _es_suggestions(missing, input_str)
+        with _suggestion_cache_lock:
+            cache = _get_suggestion_cache()
+            for quantity in missing:
+                values = es_suggestions.get(quantity.name, {})
+                suggestions[quantity.name] = values
+                if cache is not None:
+                    cache[keys[quantity.name]] = (generation, values)
+
+    return suggestions
+
+
+@router.post(
+    '',
+    tags=['suggestions'],
+    summary='Get a list of suggestions for the given quantity names and input.',
+    response_model=Dict[str, List[Suggestion]],
+    response_model_exclude_unset=True,
+    response_model_exclude_none=True)
+async def get_suggestions(
+        request: Request,
+        data: SuggestionsRequest,
+        user: User = Depends(create_user_dependency())):
+
+    global suggestable_quantities
+    if suggestable_quantities is None:
+        suggestable_quantities = set(entry_type.suggestions.keys())
+
+    for index, quantity in enumerate(data.quantities):
+        if quantity.name not in suggestable_quantities:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=[dict(
+                    msg=(
+                        f'The string "{quantity.name}" does not represent a suggestable quantity. '
+                        f'Possible values are {", ".join(suggestable_quantities)}.'),
+                    loc=['quantities', index])
+                ]
+            )
+
+    # The elasticsearch requests are blocking and must not block the event loop
+    suggestions = await run_in_threadpool(_get_suggestions, data)
+
+    response: Dict[str, List[Suggestion]] = defaultdict(list)
     for name, suggestion in suggestions.items():
         for value, weight in suggestion.items():
             response[name].append(Suggestion(value=value, weight=weight))
@@ -18,11 +18,14 @@
 import os
 import io
 import shutil
+import asyncio
+import queue
+import threading
 from datetime import datetime
 from typing import Tuple, List, Set, Dict, Any, Optional, Union
 from pydantic import BaseModel, Field, validator
 from mongoengine.queryset.visitor import Q
-from urllib.parse import unquote
+from urllib.parse import unquote, quote
 from fastapi import (
     APIRouter, Request, File, UploadFile, status, Depends, Body, Path, Query as FastApiQuery,
     HTTPException)
@@ -44,7 +47,8 @@ from ..models import (
 from .entries import EntryArchiveResponse, answer_entry_archive_request
 from ..utils import (
     parameter_dependency_from_model, create_responses, DownloadItem, browser_download_headers,
-    create_download_stream_zipped, create_download_stream_raw_file, create_stream_from_string)
+    create_download_stream_zipped, create_download_stream_raw_file, create_stream_from_string,
+    parse_range_header)
 
 router = APIRouter()
 default_tag = 'uploads'
@@ -284,6 +288,24 @@ class RawDirResponse(BaseModel):
     pagination: Optional[PaginationResponse] = Field()
 
 
+class RawManifestFile(BaseModel):
+    ''' A file that can be downloaded independently '''
+    path: str = Field(description='The path of the file within the upload raw files.')
+    size: int = Field()
+    etag: str = Field(description=strip('''
+        The HTTP entity tag of the file, e.g. to use with `If-Range` when downloading
+        parts of the file.'''))
+    url: str = Field(description='The url to download the file.')
+
+
+class RawManifestResponse(BaseModel):
+    upload_id: str = Field()
+    path: str = Field(example='The/requested/path')
+    size: int = Field(description='The total size of all files, including those on other pages.')
+    files: List[RawManifestFile] = Field()
+    pagination: Optional[PaginationResponse] = Field()
+
+
 class ProcessingData(BaseModel):
     upload_id: str = Field()
     path: str = Field()
@@ -721,6 +743,7 @@ async def get_upload_rawdir_path(
     response_model_exclude_unset=True,
     response_model_exclude_none=True)
 async def get_upload_raw_path(
+        request: Request,
         upload_id: str = Path(
             ...,
             description='The unique id of the upload.'),
@@ -765,6 +788,10 @@ async def get_upload_raw_path(
     if the file is compressed before streaming it. You can also specify `offset` and `length`
     to download only a segment of the file (*Note:* `offset` and `length` does not work if
     `compress` is set to true).
+
+    Alternatively, segments of files can be downloaded with a HTTP `Range` header (a single
+    byte range, optionally with `If-Range`), e.g. to resume downloads or to download
+    large files in parallel. This is not supported with `compress` or `decompress`.
     '''
     if files_params.compress and (offset != 0 or length != -1):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=strip('''
@@ -795,12 +822,36 @@ async def get_upload_raw_path(
                     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=strip('''
                         Invalid length provided. Should be greater than 0, or -1 if the remainder
                         of the file should be read.'''))
+                status_code = status.HTTP_200_OK
+                headers: Dict[str, str] = {}
+                if not decompress:
+                    etag = f'"{upload_files.raw_file_etag(path)}"'
+                    headers.update({'Accept-Ranges': 'bytes', 'ETag': etag})
+                    range_header = request.headers.get('Range')
+                    if range_header and offset == 0 and length == -1 and request.headers.get('If-Range', etag) == etag:
+                        size = upload_files.raw_file_size(path)
+                        try:
+                            requested_range = parse_range_header(range_header, size)
+                        except ValueError:
+                            raise HTTPException(
+                                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                                detail='The requested range is not satisfiable.',
+                                headers={'Content-Range': f'bytes */{size}'})
+                        if requested_range is not None:
+                            offset, length = requested_range
+                            status_code = status.HTTP_206_PARTIAL_CONTENT
+                            headers.update({
+                                'Content-Range': f'bytes {offset}-{offset + length - 1}/{size}',
+                                'Content-Length': str(length)})
                 if ignore_mime_type or not (offset == 0 and length == -1):
                     media_type = 'application/octet-stream'
                 else:
                     media_type = upload_files.raw_file_mime_type(path)
                 content = create_download_stream_raw_file(
                     upload_files, path, offset, length, decompress)
+                headers.update(browser_download_headers(
+                    filename=os.path.basename(path), media_type=media_type))
+                return StreamingResponse(content, status_code=status_code, headers=headers)
             return StreamingResponse(content, headers=browser_download_headers(
                 filename=os.path.basename(path) + ('.zip' if files_params.compress else ''),
                 media_type=media_type))
@@ -826,6 +877,67 @@ async def get_upload_raw_path(
         raise
 
 
+@router.get(
+    '/{upload_id}/raw-manifest/{path:path}', tags=[raw_tag],
+    summary='Get a list of all raw files located at the specified path in the specified upload.',
+    response_model=RawManifestResponse,
+    responses=create_responses(_upload_or_path_not_found, _not_authorized_to_upload, _bad_request),
+    response_model_exclude_unset=True,
+    response_model_exclude_none=True)
+async def get_upload_raw_manifest(
+        request: Request,
+        upload_id: str = Path(
+            ...,
+            description='The unique id of the upload.'),
+        path: str = Path(
+            ...,
+            description='The path within the upload raw files.'),
+        pagination: RawDirPagination = Depends(rawdir_pagination_parameters),
+        user: User = Depends(create_user_dependency(required=False))):
+    '''
+    For the upload specified by `upload_id`, lists all files located at the given `path`
+    (recursively) with their size, entity tag, and download url. Instead of downloading a
+    directory as one zip file, clients can use this to download the files independently
+    and in parallel, and to resume interrupted downloads with HTTP `Range` requests.
+    The result is paginated.
+    '''
+    upload = _get_upload_with_read_access(upload_id, user, include_others=True)
+    upload_files = upload.upload_files
+    try:
+        if not upload_files.raw_path_exists(path):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=strip('''
+                Not found. Invalid path?'''))
+
+        path = path.rstrip('/')
+        if upload_files.raw_path_is_file(path):
+            file_sizes = [(path, upload_files.raw_file_size(path))]
+        else:
+            file_sizes = [
+                (path_info.path, path_info.size)
+                for path_info in upload_files.raw_directory_list(path, recursive=True, files_only=True)]
+
+        start = pagination.get_simple_index()
+        end = start + pagination.page_size
+        api_url = config.api_url(api='api/v1')
+        manifest_files = []
+        for file_path, file_size in file_sizes[start:end]:
+            manifest_files.append(RawManifestFile(
+                path=file_path,
+                size=file_size,
+                etag=f'"{upload_files.raw_file_etag(file_path)}"',
+                url=f'{api_url}/uploads/{upload_id}/raw/{quote(file_path)}'))
+
+        pagination_response = PaginationResponse(total=len(file_sizes), **pagination.dict())
+        pagination_response.populate_simple_index_and_urls(request)
+
+        return RawManifestResponse(
+            upload_id=upload_id, path=path, files=manifest_files,
+            size=sum(file_size for _, file_size in file_sizes),
+            pagination=pagination_response)
+    finally:
+        upload_files.close()
+
+
 @router.put(
     '/{upload_id}/raw/{path:path}', tags=[raw_tag],
     summary='Upload a raw file to the specified path (directory) in the specified upload.',
@@ -950,7 +1062,7 @@ async def put_upload_raw_path(
                 detail='Bad source path provided.')
 
     upload_paths, method = await _get_files_if_provided(
-        upload_id, request, file, local_path, file_name, user)
+        upload_id, request, file, local_path, file_name, user, extract_tar=True)
 
     if not upload_paths and not (copy_or_move and copy_or_move_source_path and file_name):
         raise HTTPException(
@@ -969,13 +1081,17 @@ async def put_upload_raw_path(
 
     upload_files = StagingUploadFiles(upload_id)
 
+    has_archives = False
     for upload_path in upload_paths:
         decompress = files.auto_decompress(upload_path)
         if decompress == 'error':
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail='Cannot extract file. Bad file format or file extension?')
-        if not decompress and not overwrite_if_exists:
+        # tar files are extracted into a directory while they are received
+        if decompress or os.path.isdir(upload_path):
+            has_archives = True
+        if not decompress and not os.path.isdir(upload_path) and not overwrite_if_exists:
             full_path = os.path.join(path, os.path.basename(upload_path))
             if upload_files.raw_path_exists(full_path):
                 raise HTTPException(
@@ -1028,7 +1144,7 @@ async def put_upload_raw_path(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail='Cannot move/copy the file with wait_for_processing set to true.')
 
-        if len(upload_paths) != 1 or decompress:
+        if len(upload_paths) != 1 or has_archives:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail='`wait_for_processing` can only be used with single files, and not with compressed files.')
@@ -1311,7 +1427,7 @@ async def post_upload(
     upload_id = utils.create_uuid()
 
     upload_paths, method = await _get_files_if_provided(
-        upload_id, request, file, local_path, file_name, user)
+        upload_id, request, file, local_path, file_name, user, extract_tar=True)
 
     if not upload_name:
         # Try to default upload_name
@@ -1804,11 +1920,13 @@ async def post_upload_bundle(
 
 async def _get_files_if_provided(
         tmp_dir_prefix: str, request: Request, file: List[UploadFile], local_path: str, file_name: str,
-        user: User) -> Tuple[List[str], Union[None, int]]:
+        user: User, extract_tar: bool = False) -> Tuple[List[str], Union[None, int]]:
     '''
     If the user provides one or more files with the api call, load and save them to a temporary
     folder (or, if method 0 is used, just "forward" the file path). The method thus needs to identify
     which file transfer method was used (0 - 2), and save the data to disk (if method is 1 or 2).
+    If `extract_tar` is set, tar files are extracted while received (see
+    ``config.process.stream_tar_uploads``) and a directory with the same name is returned.
 
     Returns a list of os paths to the resulting files and method (0-2), or ([], None) if no file
     data was provided with the api call.
@@ -1853,7 +1971,8 @@ async def _get_files_if_provided(
         for source_stream, file_name in sources:
             upload_path = os.path.join(tmp_dir, file_name)
             try:
-                with open(upload_path, 'wb') as f:
+                f = _UploadWriter(upload_path, extract_tar and config.process.stream_tar_uploads)
+                try:
                     uploaded_bytes = 0
                     log_interval = 1e9
                     log_unit = 'GB'
@@ -1863,12 +1982,18 @@ async def _get_files_if_provided(
                             # End of data stream
                             break
                         uploaded_bytes += len(chunk)
-                        f.write(chunk)
+                        await f.write(chunk)
                         if uploaded_bytes > next_log_at:
                             logger.info('Large upload in progress - uploaded: '
                                         f'{uploaded_bytes // log_interval} {log_unit}')
                             next_log_at += log_interval
                     logger.info(f'Uploaded {uploaded_bytes} bytes')
+                finally:
+                    await f.close()
+            except HTTPException:
+                if os.path.exists(tmp_dir):
+                    shutil.rmtree(tmp_dir)
+                raise
             except Exception as e:
                 if not (isinstance(e, RuntimeError) and 'Stream consumed' in str(e)):
                     if os.path.exists(tmp_dir):
@@ -1898,6 +2023,96 @@ async def _get_files_if_provided(
     return upload_paths, method
 
 
+class _UploadWriter:
+    '''
+    Writes the received data of an uploaded file to the given path. If `extract_tar` is
+    set and the data looks like a tar file, it is extracted into a directory at the given
+    path instead. The extraction runs in a thread that reads the data from a queue.
+    '''
+    def __init__(self, path: str, extract_tar: bool):
+        self.path = path
+        self.extract_tar = extract_tar
+        self._head = b''
+        self._file: Optional[io.BufferedWriter] = None
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[Exception] = None
+
+    def _start(self):
+        if self.extract_tar and files.is_tar_stream(os.path.basename(self.path), self._head):
+            os.makedirs(self.path)
+            self._queue = queue.Queue(maxsize=64)
+            self._thread = threading.Thread(target=self._extract, daemon=True)
+            self._thread.start()
+            self._queue.put(self._head)
+        else:
+            self._file = open(self.path, 'wb')
+            self._file.write(self._head)
+        self._head = b''
+
+    def _extract(self):
+        stream = io.BufferedReader(_QueueReader(self._queue), buffer_size=1024 * 1024)
+        try:
+            files.extract_tar_stream(stream, self.path)
+        except Exception as e:
+            self._error = e
+        # consume the rest, e.g. the padding after the tar end or after errors
+        while stream.read(1024 * 1024):
+            pass
+
+    async def write(self, data: bytes):
+        if self._file is None and self._queue is None:
+            self._head += data
+            if len(self._head) < 512:
+                return
+            self._start()
+        elif self._file is not None:
+            self._file.write(data)
+        else:
+            try:
+                self._queue.put_nowait(data)
+            except queue.Full:
+                await asyncio.get_event_loop().run_in_executor(None, self._queue.put, data)
+
+    async def close(self):
+        if self._file is None and self._queue is None:
+            self._start()
+        if self._file is not None:
+            self._file.close()
+            return
+
+        await asyncio.get_event_loop().run_in_executor(None, self._queue.put, None)
+        await asyncio.get_event_loop().run_in_executor(None, self._thread.join)
+        if self._error is not None:
+            logger.warn('could not extract uploaded tar file', exc_info=self._error)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='Cannot extract file. Bad file format or file extension?')
+
+
+class _QueueReader(io.RawIOBase):
+    ''' A readable that reads the data chunks put into a queue, until None is put. '''
+    def __init__(self, data_queue: queue.Queue):
+        self._queue = data_queue
+        self._buffer = b''
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer and not self._eof:
+            data = self._queue.get()
+            if data is None:
+                self._eof = True
+            else:
+                self._buffer = data
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
 async def _asyncronous_file_reader(f):
     ''' Asynchronous generator to read file-like objects. '''
     while True:
@@ -93,6 +93,16 @@ async def get_users(
         if isinstance(values, str):
             values = [values]
 
+        if key == 'user_id':
+            users_by_id = datamodel.User.get_users(str(value) for value in values)
+            for value in values:
+                user = users_by_id.get(str(value))
+                if user is not None:
+                    user = user.m_copy()
+                    user.email = None
+                    users.append(user)
+            continue
+
         for value in values:
             try:
                 user = datamodel.User.get(**{key: str(value)}).m_copy()
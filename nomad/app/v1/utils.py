@@ -16,7 +16,7 @@
 # limitations under the License.
 #
 
-from typing import List, Dict, Set, Iterator, Any, Optional, Union
+from typing import List, Dict, Set, Iterator, Any, Optional, Union, Tuple
 from types import FunctionType
 import urllib
 import io
@@ -212,6 +212,42 @@ def create_download_stream_raw_file(
     upload_files.close()
 
 
+def parse_range_header(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    '''
+    Parses the value of a HTTP ``Range`` header for a resource with the given size. Only
+    single byte ranges are supported.
+
+    Returns:
+        The offset and length of the requested range, or None if the header cannot be
+        parsed or requests multiple ranges. In this case, the header should be ignored.
+    Raises:
+        ValueError: If the range cannot be satisfied.
+    '''
+    unit, _, ranges = range_header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in ranges:
+        return None
+    first, separator, last = ranges.strip().partition('-')
+    first, last = first.strip(), last.strip()
+    if not separator or not (first or last) or not all(value.isdigit() for value in (first, last) if value):
+        return None
+
+    if not first:
+        # suffix range, i.e. the last bytes
+        suffix_length = int(last)
+        if suffix_length == 0 or size == 0:
+            raise ValueError('Unsatisfiable range')
+        offset = max(0, size - suffix_length)
+        return offset, size - offset
+
+    offset = int(first)
+    if last and int(last) < offset:
+        return None
+    if offset >= size:
+        raise ValueError('Unsatisfiable range')
+    end = min(int(last), size - 1) if last else size - 1
+    return offset, end - offset + 1
+
+
 def create_stream_from_string(content: str) -> io.BytesIO:
     ''' For returning strings as content using '''
     return io.BytesIO(content.encode())
@@ -21,8 +21,6 @@ from __future__ import annotations
 import warnings
 import functools
 import itertools
-from collections import namedtuple
-from array import array
 from itertools import chain
 import math
 import re
@@ -33,7 +31,6 @@ import logging
 from nptyping import NDArray
 
 import numpy as np
-from scipy import sparse
 from scipy.spatial import Voronoi  # pylint: disable=no-name-in-module
 from scipy.stats import linregress
 from ase.utils import pbc2pbc
@@ -47,9 +44,8 @@ import MDAnalysis
 from MDAnalysis.core.topology import Topology
 from MDAnalysis.core._get_readers import get_reader_for
 from MDAnalysis.core.universe import Universe
-import MDAnalysis.analysis.rdf as MDA_RDF
+from MDAnalysis.lib.distances import capped_distance
 
-from nomad.aflow_prototypes import aflow_prototypes
 from nomad.constants import atomic_masses
 from nomad.units import ureg
 
@@ -550,6 +546,49 @@ def get_normalized_wyckoff(atomic_numbers: NDArray[Any], wyckoff_letters: NDArra
     return standard_wyc
 
 
+def get_normalized_wyckoff_key(norm_wyckoff: Dict[str, Dict[str, int]]) -> Tuple:
+    '''
+    Returns a canonical, hashable representation of a normalized Wyckoff
+    sequence as returned by :func:`get_normalized_wyckoff`. Two normalized
+    Wyckoff sequences compare equal exactly when their keys are equal.
+
+    Args:
+        norm_wyckoff: Normalized Wyckoff occupations
+
+    Returns:
+        Tuple of (Wyckoff letter, ((species, count), ...)) pairs sorted by
+        Wyckoff letter and species.
+    '''
+    return tuple(sorted(
+        (letter, tuple(sorted(species.items())))
+        for letter, species in norm_wyckoff.items()))
+
+
+@functools.lru_cache(maxsize=1)
+def get_aflow_prototype_index() -> Dict[Tuple[int, Tuple], dict]:
+    '''
+    Returns an index that maps (space group number, normalized Wyckoff key) to
+    the matching AFLOW prototype. The prototype library is only imported when
+    the index is first requested and the index is built once per process.
+
+    If several prototypes share the same key, the first one in the library
+    is used.
+    '''
+    from nomad.aflow_prototypes import aflow_prototypes
+
+    index: Dict[Tuple[int, Tuple], dict] = {}
+    for space_group, type_descriptions in aflow_prototypes['prototypes_by_spacegroup'].items():
+        for type_description in type_descriptions:
+            norm_wyckoff = cast(
+                Dict[str, Dict[str, int]], type_description.get('normalized_wyckoff_matid'))
+            if not norm_wyckoff:
+                continue
+            index.setdefault(
+                (int(space_group), get_normalized_wyckoff_key(norm_wyckoff)),
+                type_description)
+    return index
+
+
 def search_aflow_prototype(space_group: int, norm_wyckoff: dict) -> dict:
     '''
     Searches the AFLOW prototype library for a match for the given space
@@ -568,14 +607,10 @@ def search_aflow_prototype(space_group: int, norm_wyckoff: dict) -> dict:
     Returns:
         Dictionary containing the AFLOW prototype information.
     '''
-    structure_type_info = None
-    type_descriptions: Any = aflow_prototypes['prototypes_by_spacegroup'].get(space_group, [])
-    for type_description in type_descriptions:
-        current_norm_wyckoffs = type_description.get('normalized_wyckoff_matid')
-        if current_norm_wyckoffs and current_norm_wyckoffs == norm_wyckoff:
-            structure_type_info = type_description
-            break
-    return structure_type_info
+    if not norm_wyckoff or space_group is None:
+        return None
+    return get_aflow_prototype_index().get(
+        (int(space_group), get_normalized_wyckoff_key(norm_wyckoff)))
 
 
 def get_brillouin_zone(reciprocal_lattice: NDArray[Any]) -> dict:
@@ -1319,6 +1354,77 @@ def shifted_correlation_average(function: Callable, times: NDArray, positions: N
     return correlation_times, result
 
 
+def shifted_mean_squared_displacement(times: NDArray, positions: NDArray,
+                                      segments: int = 10, window: float = 0.5, skip: int = 0):
+    '''
+    Vectorized equivalent of :func:`shifted_correlation_average` for the mean squared
+    displacement. The same start frames and logarithmically distributed time lags are
+    used, but all displacements are computed with a single numpy operation instead of
+    calling a python function for each pair of frames.
+
+    Args:
+        times: The times of all frames
+        positions: Positions with shape (n_frames, n_particles, 3)
+        segments: The number of segments the time window will be shifted
+        window: The fraction of the simulation the time series will cover
+        skip: The fraction of the trajectory that will be skipped at the beginning
+
+    Returns:
+        The correlation times and the mean squared displacement at these times.
+    '''
+    if window + skip >= 1:
+        warnings.warn('Invalid parameters for shifted_mean_squared_displacement(), '
+                      'resetting to defaults.', UserWarning)
+        window = 0.5
+        skip = 0
+
+    start_frames = np.unique(np.linspace(
+        len(positions) * skip, len(positions) * (1 - window),
+        num=segments, endpoint=False, dtype=int
+    ))
+    num_frames = int(len(positions) * (window))
+    idx = __log_indices(0, num_frames)
+
+    correlation_times = np.asarray(times)[idx] - times[0]
+
+    displacements = positions[start_frames[:, None] + idx[None, :]] - positions[start_frames][:, None]
+    msd = (displacements ** 2).sum(axis=-1).mean(axis=-1)
+
+    return correlation_times, msd.mean(axis=0)
+
+
+def mean_squared_displacement_fft(positions: NDArray) -> NDArray:
+    '''
+    Calculates the mean squared displacement for all time lags averaged over all
+    possible time origins. Uses the FFT based algorithm of Kneller et al. (Comput. Phys.
+    Commun. 91, 191 (1995)), which scales as O(N log N) in the number of frames.
+
+    Args:
+        positions: Unwrapped positions with shape (n_frames, n_particles, 3)
+
+    Returns:
+        Array of length n_frames with the mean squared displacement (averaged over
+        all particles) for the time lags 0, 1, ..., n_frames - 1.
+    '''
+    positions = np.asarray(positions, dtype=np.float64)
+    n_frames = positions.shape[0]
+    n_origins = (n_frames - np.arange(n_frames))[:, None]
+
+    # S1(m) = 1/(N-m) * sum_k r^2(k) + r^2(k+m)
+    squared = (positions ** 2).sum(axis=2)
+    cumulative = np.concatenate((np.zeros((1, squared.shape[1])), np.cumsum(squared, axis=0)))
+    lags = np.arange(n_frames)
+    s1 = (cumulative[n_frames] - cumulative[lags] + cumulative[n_frames - lags]) / n_origins
+
+    # S2(m) = 1/(N-m) * sum_k r(k) * r(k+m), the position autocorrelation
+    transformed = np.fft.rfft(positions, n=2 * n_frames, axis=0)
+    autocorrelation = np.fft.irfft(
+        transformed * transformed.conjugate(), n=2 * n_frames, axis=0)[:n_frames]
+    s2 = autocorrelation.sum(axis=2) / n_origins
+
+    return (s1 - 2 * s2).mean(axis=1)
+
+
 def __calc_diffusion_constant(times: NDArray, values: NDArray, dim: int = 3):
     '''
     Determines the diffusion constant from a fit of the mean squared displacement
@@ -1344,6 +1450,62 @@ def __get_molecular_bead_groups(universe: MDAnalysis.Universe, moltypes: List[st
     return bead_groups
 
 
+def __calc_rdf_single_pass(universe: MDAnalysis.Universe, bead_groups: Dict[str, BeadGroup],
+                           pairs: List[Tuple[str, str]], frames_start: NDArray, frames_end: NDArray,
+                           n_prune: int, max_rdf_dist: float, n_bins: int):
+    '''
+    Calculates the radial distribution functions of all given pairs of molecule types
+    for all given trajectory intervals with a single pass over the trajectory. The
+    molecular centers of mass are computed once per frame and shared by all pairs.
+    Histogramming and normalization follow :class:`MDAnalysis.analysis.rdf.InterRDF`,
+    with the self-distances excluded for pairs of the same molecule type.
+
+    Returns:
+        The bin centers and a dictionary that maps each pair to an array with the
+        radial distribution function for each interval.
+    '''
+    n_intervals = len(frames_start)
+    _, edges = np.histogram([-1], bins=n_bins, range=(0, max_rdf_dist))
+    counts = {pair: np.zeros((n_intervals, n_bins)) for pair in pairs}
+    volume_cum = np.zeros(n_intervals)
+    n_frames = np.zeros(n_intervals, dtype=int)
+    bins = 0.5 * (edges[:-1] + edges[1:])
+    if not pairs:
+        return bins, {}
+
+    frame_indices: List[int] = []
+    frame_intervals: List[int] = []
+    for i_interval in range(n_intervals):
+        interval_frames = range(frames_start[i_interval], frames_end[i_interval], n_prune)
+        frame_indices.extend(interval_frames)
+        frame_intervals.extend([i_interval] * len(interval_frames))
+
+    moltypes = sorted(set(moltype for pair in pairs for moltype in pair))
+    for ts, i_interval in zip(universe.trajectory[frame_indices], frame_intervals):
+        positions = {moltype: bead_groups[moltype].positions for moltype in moltypes}
+        for moltype_i, moltype_j in pairs:
+            pair_indices, dist = capped_distance(
+                positions[moltype_i], positions[moltype_j], max_rdf_dist, box=ts.dimensions)
+            if moltype_i == moltype_j:
+                dist = dist[pair_indices[:, 0] != pair_indices[:, 1]]
+            count, _ = np.histogram(dist, bins=n_bins, range=(0, max_rdf_dist))
+            counts[(moltype_i, moltype_j)][i_interval] += count
+        volume_cum[i_interval] += ts.volume
+        n_frames[i_interval] += 1
+
+    shell_volumes = 4 / 3 * np.pi * np.diff(np.power(edges, 3))
+    box_volumes = volume_cum / n_frames
+    rdfs = {}
+    for moltype_i, moltype_j in pairs:
+        n_pairs = len(bead_groups[moltype_i]) * len(bead_groups[moltype_j])
+        if moltype_i == moltype_j:
+            n_pairs -= len(bead_groups[moltype_i])
+        norm = n_frames[:, None] * shell_volumes[None, :] * (n_pairs / box_volumes)[:, None]
+        rdfs[(moltype_i, moltype_j)] = counts[(moltype_i, moltype_j)] / norm
+
+    return bins, rdfs
+
+
 def calc_molecular_rdf(universe: MDAnalysis.Universe, n_traj_split: int = 10, n_prune: int = 1, interval_indices=None):
     '''
     Calculates the radial distribution functions between for each unique pair of
@@ -1394,82 +1556,84 @@ def calc_molecular_rdf(universe: MDAnalysis.Universe, n_traj_split: int = 10, n_
     rdf_results['value'] = []
     rdf_results['frame_start'] = []
     rdf_results['frame_end'] = []
+
+    pairs = []
     for i, moltype_i in enumerate(moltypes):
         for j, moltype_j in enumerate(moltypes):
             if j > i:
                 continue
             elif i == j and bead_groups[moltype_i].positions.shape[0] == 1:  # skip if only 1 mol in group
                 continue
-
-            if i == j:
-                exclusion_block = (1, 1)  # remove self-distance
-            else:
-                exclusion_block = None
-            pair_type = f'{moltype_i}-{moltype_j}'
-            rdf_results_interval: Dict[str, Any] = {}
-            rdf_results_interval['types'] = []
-            rdf_results_interval['variables_name'] = []
-            rdf_results_interval['bins'] = []
-            rdf_results_interval['value'] = []
-            rdf_results_interval['frame_start'] = []
-            rdf_results_interval['frame_end'] = []
-            for i_interval in range(n_traj_split):
-                rdf_results_interval['types'].append(pair_type)
-                rdf_results_interval['variables_name'].append(['distance'])
-                rdf = MDA_RDF.InterRDF(
-                    bead_groups[moltype_i], bead_groups[moltype_j], range=(0, max_rdf_dist),
-                    exclusion_block=exclusion_block, nbins=n_bins).run(
-                    frames_start[i_interval], frames_end[i_interval], n_prune)
-                rdf_results_interval['frame_start'].append(frames_start[i_interval])
-                rdf_results_interval['frame_end'].append(frames_end[i_interval])
-
-                rdf_results_interval['bins'].append(rdf.results.bins[int(n_smooth / 2):-int(n_smooth / 2)] * ureg.angstrom)
-                rdf_results_interval['value'].append(np.convolve(
-                    rdf.results.rdf, np.ones((n_smooth,)) / n_smooth,
-                    mode='same')[int(n_smooth / 2):-int(n_smooth / 2)])
-
-            flag_logging_error = False
-            for interval_group in interval_indices:
-                split_weights = n_frames_split[np.array(interval_group)] / np.sum(n_frames_split[np.array(interval_group)])
-                if abs(np.sum(split_weights) - 1.0) > 1e-6:
+            pairs.append((moltype_i, moltype_j))
+
+    # all pairs and intervals are calculated with a single pass over the trajectory
+    bins, rdfs = __calc_rdf_single_pass(
+        universe, bead_groups, pairs, frames_start, frames_end, n_prune, max_rdf_dist, n_bins)
+
+    for moltype_i, moltype_j in pairs:
+        pair_type = f'{moltype_i}-{moltype_j}'
+        rdf_results_interval: Dict[str, Any] = {}
+        rdf_results_interval['types'] = []
+        rdf_results_interval['variables_name'] = []
+        rdf_results_interval['bins'] = []
+        rdf_results_interval['value'] = []
+        rdf_results_interval['frame_start'] = []
+        rdf_results_interval['frame_end'] = []
+        for i_interval in range(n_traj_split):
+            rdf_results_interval['types'].append(pair_type)
+            rdf_results_interval['variables_name'].append(['distance'])
+            rdf_results_interval['frame_start'].append(frames_start[i_interval])
+            rdf_results_interval['frame_end'].append(frames_end[i_interval])
+
+            rdf_results_interval['bins'].append(bins[int(n_smooth / 2):-int(n_smooth / 2)] * ureg.angstrom)
+            rdf_results_interval['value'].append(np.convolve(
+                rdfs[(moltype_i, moltype_j)][i_interval], np.ones((n_smooth,)) / n_smooth,
+                mode='same')[int(n_smooth / 2):-int(n_smooth / 2)])
+
+        flag_logging_error = False
+        for interval_group in interval_indices:
+            split_weights = n_frames_split[np.array(interval_group)] / np.sum(n_frames_split[np.array(interval_group)])
+            if abs(np.sum(split_weights) - 1.0) > 1e-6:
+                flag_logging_error = True
+                continue
+            rdf_values_avg = split_weights[0] * rdf_results_interval['value'][interval_group[0]]
+            for i_interval, interval in enumerate(interval_group[1:]):
+                if rdf_results_interval['types'][interval] != rdf_results_interval['types'][interval - 1]:
                     flag_logging_error = True
                     continue
-                rdf_values_avg = split_weights[0] * rdf_results_interval['value'][interval_group[0]]
-                for i_interval, interval in enumerate(interval_group[1:]):
-                    if rdf_results_interval['types'][interval] != rdf_results_interval['types'][interval - 1]:
-                        flag_logging_error = True
-                        continue
-                    if rdf_results_interval['variables_name'][interval] != rdf_results_interval['variables_name'][interval - 1]:
-                        flag_logging_error = True
-                        continue
-                    if not (rdf_results_interval['bins'][interval] == rdf_results_interval['bins'][interval - 1]).all():
-                        flag_logging_error = True
-                        continue
-                    rdf_values_avg += split_weights[i_interval + 1] * rdf_results_interval['value'][interval]
-                if flag_logging_error:
-                    logging.error('Something went wrong in calc_molecular_rdf(). Some interval groups were skipped.')
-                rdf_results['types'].append(rdf_results_interval['types'][interval_group[0]])
-                rdf_results['variables_name'].append(rdf_results_interval['variables_name'][interval_group[0]])
-                rdf_results['bins'].append(rdf_results_interval['bins'][interval_group[0]])
-                rdf_results['value'].append(rdf_values_avg)
-                rdf_results['frame_start'].append(int(rdf_results_interval['frame_start'][interval_group[0]]))
-                rdf_results['frame_end'].append(int(rdf_results_interval['frame_end'][interval_group[-1]]))
+                if rdf_results_interval['variables_name'][interval] != rdf_results_interval['variables_name'][interval - 1]:
+                    flag_logging_error = True
+                    continue
+                if not (rdf_results_interval['bins'][interval] == rdf_results_interval['bins'][interval - 1]).all():
+                    flag_logging_error = True
+                    continue
+                rdf_values_avg += split_weights[i_interval + 1] * rdf_results_interval['value'][interval]
+            if flag_logging_error:
+                logging.error('Something went wrong in calc_molecular_rdf(). Some interval groups were skipped.')
+            rdf_results['types'].append(rdf_results_interval['types'][interval_group[0]])
+            rdf_results['variables_name'].append(rdf_results_interval['variables_name'][interval_group[0]])
+            rdf_results['bins'].append(rdf_results_interval['bins'][interval_group[0]])
+            rdf_results['value'].append(rdf_values_avg)
+            rdf_results['frame_start'].append(int(rdf_results_interval['frame_start'][interval_group[0]]))
+            rdf_results['frame_end'].append(int(rdf_results_interval['frame_end'][interval_group[-1]]))
 
     return rdf_results
 
 
-def calc_molecular_mean_squared_displacements(universe: MDAnalysis.Universe):
+def calc_molecular_mean_squared_displacements(universe: MDAnalysis.Universe, method: str = 'shifted'):
     '''
     Calculates the mean squared displacement for the center of mass of each
     molecule type.
-    '''
 
-    def mean_squared_displacement(start: NDArray, current: NDArray):
-        '''
-        Calculates mean square displacement between current and initial (start) coordinates.
-        '''
-        vec = start - current
-        return (vec ** 2).sum(axis=1).mean()
+    Args:
+        universe: The MDAnalysis universe with the trajectory
+        method: Either ``'shifted'`` to average over 10 shifted time windows (see
+            :func:`shifted_mean_squared_displacement`) or ``'fft'`` to average over all
+            time origins (see :func:`mean_squared_displacement_fft`). Both report
+            the values at the same logarithmically distributed times.
+    '''
+    if method not in ('shifted', 'fft'):
+        raise ValueError(f'unknown mean squared displacement method {method}')
 
     if not universe or not universe.trajectory or universe.trajectory[0].dimensions is None:
         return
@@ -1494,7 +1658,11 @@ def calc_molecular_mean_squared_displacements(universe: MDAnalysis.Universe):
     msd_results['error_diffusion_constant'] = []
     for moltype in moltypes:
         positions = __get_nojump_positions(universe, bead_groups[moltype])
-        results = shifted_correlation_average(mean_squared_displacement, times, positions)
+        if method == 'fft':
+            idx = __log_indices(0, int(n_frames * 0.5))
+            results = (times[idx] - times[0], mean_squared_displacement_fft(positions)[idx])
+        else:
+            results = shifted_mean_squared_displacement(times, positions)
         if results:
             msd_results['value'].append(results[1])
             msd_results['times'].append(results[0])
@@ -1512,53 +1680,19 @@ def calc_molecular_mean_squared_displacements(universe: MDAnalysis.Universe):
     return msd_results
 
 
-def __parse_jumps(universe: MDAnalysis.Universe, selection: MDAnalysis.AtomGroup):
-    __ = universe.trajectory[0]
-    prev = np.array(selection.positions)
-    box = universe.trajectory[0].dimensions[:3]
-    sparse_data = namedtuple('SparseData', ['data', 'row', 'col'])  # type: ignore[name-match]
-    jump_data = (
-        sparse_data(data=array('b'), row=array('l'), col=array('l')),
-        sparse_data(data=array('b'), row=array('l'), col=array('l')),
-        sparse_data(data=array('b'), row=array('l'), col=array('l'))
-    )
-
-    for i_frame, _ in enumerate(universe.trajectory[1:]):
-        curr = np.array(selection.positions)
-        delta = ((curr - prev) / box).round().astype(np.int8)
-        prev = np.array(curr)
-        for d in range(3):
-            col, = np.where(delta[:, d] != 0)
-            jump_data[d].col.extend(col)
-            jump_data[d].row.extend([i_frame] * len(col))
-            jump_data[d].data.extend(delta[col, d])
-
-    return jump_data
-
-
-def __generate_nojump_matrices(universe: MDAnalysis.Universe, selection: MDAnalysis.AtomGroup):
-    jump_data = __parse_jumps(universe, selection)
-    n_frames = len(universe.trajectory)
-    n_atoms = selection.positions.shape[0]
-
-    nojump_matrices = tuple(
-        sparse.csr_matrix((np.array(m.data), (m.row, m.col)), shape=(n_frames, n_atoms)) for m in jump_data
-    )
-    return nojump_matrices
-
-
 def __get_nojump_positions(universe: MDAnalysis.Universe, selection: MDAnalysis.AtomGroup):
-    nojump_matrices = __generate_nojump_matrices(universe, selection)
+    '''
+    Returns the positions of the selection for all frames with the jumps over the
+    periodic boundaries removed. A jump is detected whenever a position moves by more
+    than half the box length between two consecutive frames.
+    '''
     box = universe.trajectory[0].dimensions[:3]
+    positions = np.array([np.array(selection.positions) for _ in universe.trajectory])
 
-    nojump_positions = []
-    for i_frame, __ in enumerate(universe.trajectory):
-        delta = np.array(np.vstack(
-            [m[:i_frame, :].sum(axis=0) for m in nojump_matrices]
-        ).T) * box
-        nojump_positions.append(selection.positions - delta)
+    jumps = np.rint(np.diff(positions, axis=0) / box)
+    shifts = np.concatenate((np.zeros((1,) + positions.shape[1:]), np.cumsum(jumps, axis=0)))
 
-    return np.array(nojump_positions)
+    return positions - shifts * box
 
 
 def calc_radius_of_gyration(universe: MDAnalysis.Universe, molecule_atom_indices: NDArray):
@@ -457,19 +457,34 @@ def rm(ctx, uploads, skip_es, skip_mongo, skip_files):
 @click.option('--process-running', is_flag=True, help='Also reprocess already running processes.')
 @click.option('--setting', type=str, multiple=True, help='key=value to overwrite a default reprocess config setting.')
 @click.option('--print-progress', default=0, type=int, help='Prints a dot every given seconds. Can be used to keep terminal open that have an i/o-based timeout.')
+@click.option('--dry-run', is_flag=True, help='Only report how many entries would be reparsed with reprocess_only_changed_entries.')
+@click.option('--skip-hashes', is_flag=True, help='Do not hash the entry files for --dry-run and assume unchanged files.')
 @click.pass_context
-def process(ctx, uploads, parallel: int, process_running: bool, setting: typing.List[str], print_progress: int):
+def process(
+        ctx, uploads, parallel: int, process_running: bool, setting: typing.List[str], print_progress: int,
+        dry_run: bool, skip_hashes: bool):
     _, uploads = _query_uploads(uploads, **ctx.obj.uploads_kwargs)
     settings: typing.Dict[str, bool] = {}
     for settings_str in setting:
         key, value = settings_str.split('=')
         settings[key] = bool(value)
+
+    if dry_run:
+        totals: typing.Dict[str, int] = {}
+        for upload in uploads:
+            report = upload.plan_reprocessing(settings, check_entry_hashes=not skip_hashes)
+            print(f'{upload.upload_id}: ' + ', '.join(f'{key}={value}' for key, value in report.items()))
+            for key, value in report.items():
+                totals[key] = totals.get(key, 0) + value
+        print('total: ' + ', '.join(f'{key}={value}' for key, value in totals.items()))
+        return
+
     _run_processing(
         uploads, parallel, lambda upload: upload.process_upload(reprocess_settings=settings),
         'processing', process_running=process_running, reset_first=True, print_progress=print_progress)
 
 
-@uploads.command(help='Repack selected uploads.')
+@uploads.command(help='Repack selected uploads and create their raw file indexes.')
 @click.argument('UPLOADS', nargs=-1)
 @click.pass_context
 def re_pack(ctx, uploads):
@@ -481,6 +496,7 @@ def re_pack(ctx, uploads):
             continue
 
         upload.upload_files.re_pack(upload.with_embargo)
+        upload.upload_files.update_raw_zip_index()
         print(f'successfully re-packed {upload.upload_id}')
 
 
@@ -131,6 +131,22 @@ class Services(NomadSettings):
 
         Page-after-value-based pagination is independent and can be used without limitations.
     ''')
+    max_query_batch_size = Field(20, description='''
+        The maximum number of queries that can be sent with one batch request, e.g. to
+        `/entries/query/batch`.
+    ''')
+    user_cache_size = Field(2048, description='''
+        The number of users from the user management that are cached per process. The
+        cache is shared by all user lookups. Use 0 to disable.
+    ''')
+    user_cache_ttl = Field(24 * 3600, description='''
+        The time in seconds a user from the user management is cached.
+    ''')
+    optimade_filter_cache_size = Field(1024, description='''
+        The number of OPTIMADE filters whose parsed elasticsearch queries are cached per
+        process. Harvesters repeat the same filters with different page offsets. Use 0
+        to disable.
+    ''')
     unavailable_value = Field('unavailable', description='''
         Value that is used in `results` section Enum fields (e.g. system type, spacegroup, etc.)
         to indicate that the value could not be determined.
@@ -322,6 +338,49 @@ class Elastic(NomadSettings):
     entries_per_material_cap = 1000
     entries_index = 'nomad_entries_v1'
     materials_index = 'nomad_materials_v1'
+    search_cache_size = Field(0, description='''
+        The number of search results that are cached per process. Repeated searches with
+        the same owner, user, query, aggregations, pagination, and required fields are
+        answered from the cache. Use 0 to disable.
+    ''')
+    search_cache_ttl = Field(10, description='''
+        The time in seconds a cached search result is used. Cached results are also
+        invalidated when this process modifies or refreshes the indices. Modifications by
+        other processes (e.g. processing workers) only become visible after this time.
+    ''')
+    suggestion_cache_size = Field(10000, description='''
+        The number of suggestion results (per quantity, size, and input) that are cached
+        per process. Use 0 to disable.
+    ''')
+    suggestion_cache_ttl = Field(60, description='''
+        The time in seconds cached suggestions are used. Cached suggestions are also
+        invalidated when this process modifies or refreshes the indices.
+    ''')
+    suggestion_min_input_length = Field(2, description='''
+        Suggestions for inputs with less characters are not queried from elasticsearch.
+        They are taken from the precomputed most frequent values of each quantity.
+    ''')
+    suggestion_top_size = Field(100, description='''
+        The number of most frequent values that are precomputed for each suggestable
+        quantity.
+    ''')
+    suggestion_top_ttl = Field(600, description='''
+        The time in seconds after which the most frequent values are computed again.
+        They are also recomputed when this process modifies or refreshes the indices.
+    ''')
+    search_iterator_page_size = Field(1000, description='''
+        The number of results that are read with one request when iterating over all
+        search results, e.g. for bulk operations.
+    ''')
+    search_iterator_slices = Field(4, description='''
+        The number of parallel sliced searches that are used to iterate over all
+        search results if no particular order is required. Use 1 to read results with
+        one search after the other.
+    ''')
+    search_iterator_keep_alive = Field('1m', description='''
+        How long elasticsearch keeps the point in time for iterating over all search
+        results between two requests.
+    ''')
 
 
 class Keycloak(NomadSettings):
@@ -332,6 +391,14 @@ class Keycloak(NomadSettings):
     password = 'password'
     client_id = 'nomad_public'
     client_secret: str = None
+    token_cache_size = Field(10000, description='''
+        The number of verified access tokens that are cached per process. Otherwise,
+        the token of each API request is decoded and verified. Use 0 to disable.
+    ''')
+    token_cache_ttl = Field(300, description='''
+        The time in seconds a verified access token is cached. Tokens are never cached
+        beyond their expiry.
+    ''')
 
 
 class Mongo(NomadSettings):
@@ -416,6 +483,29 @@ class Normalize(NomadSettings):
         ''')
     springer_db_path = Field(
         os.path.join(os.path.dirname(os.path.abspath(__file__)), 'normalizing/data/springer.msg'))
+    symmetry_cache_size = Field(
+        1024, description='''
+            The maximum number of symmetry analysis results kept in memory by each
+            process. Structures with the same cell, positions, atomic numbers, and
+            periodicity reuse the results of the first analysis. Use 0 to disable the
+            cache.
+        ''')
+    parallel_workers = Field(
+        0, description='''
+            The number of processes used to normalize independent parts of a single
+            entry, e.g. the systems of a geometry optimization or the DOS fingerprints
+            of all calculations. Use 0 to normalize everything in the processing
+            process.
+        ''')
+    parallel_min_tasks = Field(
+        100, description='''
+            The minimum number of independent parts in one entry for the parallel
+            normalization to be used. Smaller entries are normalized serially.
+        ''')
+    symmetry_cache_path: str = Field(None, description='''
+            An optional directory that stores symmetry analysis results on disk to share
+            them between processes and processing runs.
+        ''')
 
 
 class Resources(NomadSettings):
@@ -460,13 +550,65 @@ class Process(NomadSettings):
         The `m_def_id` will be exported with the `with_def_id=True` via `m_to_dict`.
     ''')
     write_definition_id_to_archive = Field(False, description='Write `m_def_id` to the archive.')
+    package_definition_cache_size = Field(1000, description='''
+        The number of package definitions (custom schemas) that are cached per process.
+        Package definitions that were stored or retrieved before do not require database
+        requests. Use 0 to disable.
+    ''')
     index_materials = True
     reuse_parser = True
     metadata_file_name = 'nomad'
     metadata_file_extensions = ('json', 'yaml', 'yml')
     auxfile_cutoff = 100
     parser_matching_size = 150 * 80  # 150 lines of 80 ASCII characters per line
+    match_workers = Field(0, description='''
+        The number of processes used to match the files of an upload with parsers. Use
+        0 to match all files in the processing process.
+    ''')
+    match_chunk_size = Field(200, description='''
+        The number of files that are matched by one matching process at a time.
+    ''')
+    raw_directory_index_size = Field(16, description='''
+        The number of uploads whose staging raw directory listings are kept in memory per
+        process. Otherwise, directories with many mainfiles are listed again for each
+        entry. Only the names and types of directory elements are kept. Use 0 to disable.
+    ''')
+    raw_directory_index_ttl = Field(60, description='''
+        The time in seconds a cached raw directory listing is used. Listings are also
+        invalidated if the directory or the upload's files are modified.
+    ''')
+    raw_zip_index_size = Field(16, description='''
+        The number of raw zip file indexes of published uploads that are kept in memory
+        per process. The indexes allow to list and read raw files without parsing
+        the zip files' central directories. Use 0 to disable.
+    ''')
+    raw_file_compression_level = Field(0, description='''
+        The deflate compression level (1-9) used for the raw files in the raw zip files
+        of published uploads. The default 0 stores raw files without compression.
+        Compression makes packing uploads slower and reading individual raw files from
+        published uploads a little slower.
+    ''')
+    raw_file_compression_levels: Dict[str, int] = Field({
+        extension: 0 for extension in [
+            'zip', 'gz', 'tgz', 'bz2', 'xz', 'zst', '7z', 'rar', 'npz',
+            'png', 'jpg', 'jpeg', 'gif', 'webp', 'mp4', 'pdf']}, description='''
+        Compression levels for raw files with the given file extensions, overriding
+        `raw_file_compression_level`. By default, files that are already compressed
+        are stored without compression.
+    ''')
+    pack_workers = Field(0, description='''
+        The number of processes used to compress the raw files of an upload when it is
+        packed for publishing. Use 0 to compress all files in the packing process.
+    ''')
+    pack_chunk_size = Field(16 * 1024 ** 2, description='''
+        The number of bytes that are compressed by one packing process at a time. Larger
+        files are compressed by the packing process itself.
+    ''')
     max_upload_size = 32 * (1024 ** 3)
+    stream_tar_uploads = Field(True, description='''
+        If true, uploaded tar files are extracted while they are received by the API,
+        instead of storing the tar file and extracting it later.
+    ''')
     use_empty_parsers = False
     redirect_stdouts: bool = Field(False, description='''
         True will redirect lines to stdout (e.g. print output) that occur during
@@ -486,6 +628,20 @@ class Reprocess(NomadSettings):
     add_matched_entries_to_published = True
     delete_unmatched_published_entries = False
     index_individual_entries = False
+    extract_raw_files_on_demand = Field(False, description='''
+        If true, the raw files of published uploads are not extracted to the staging
+        area all at once. Instead, only the mainfile directories of reprocessed entries
+        (including all sub directories) are extracted from the raw zip file when the
+        entries are processed. Only applies if `rematch_published` is false, because
+        matching requires all files. Parsers that read files outside of the mainfile
+        directory, e.g. in parent or sibling directories, do not find these files.
+        Do not use this for uploads with such parsers.
+    ''')
+    reprocess_only_changed_entries = Field(False, description='''
+        If true, existing entries are only reparsed if their files, their parser, or the
+        normalizers have changed since they were last processed successfully. The
+        archives of all other entries are preserved as they are.
+    ''')
 
 
 class RFC3161Timestamp(NomadSettings):
@@ -605,6 +761,14 @@ class Archive(NomadSettings):
         20, description='Maximum number of processes can be assigned to process archive query.')
     min_entries_per_process = Field(
         20, description='Minimum number of entries per process.')
+    context_archive_cache_size = Field(100, description='''
+        The number of referenced archives that a server context (e.g. while processing an
+        entry) keeps in memory to resolve references.
+    ''')
+    context_upload_files_cache_size = Field(16, description='''
+        The number of upload files of referenced uploads that a server context keeps open
+        to resolve references.
+    ''')
 
 
 class UISetting(NomadSettings, extra=Extra.forbid):
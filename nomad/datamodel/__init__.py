@@ -72,7 +72,7 @@ section. We currently have the following domain specific metadata classes/sectio
 import sys
 
 from nomad.metainfo import Environment
-from .data import (User, Author, user_reference, author_reference)
+from .data import (User, Author, user_reference, author_reference, prefetch_users)
 from .datamodel import (
     Dataset, EditableUserMetadata, AuthLevel,
     MongoUploadMetadata, MongoEntryMetadata, MongoSystemMetadata,
@@ -16,12 +16,14 @@
 # limitations under the License.
 #
 
-from typing import Dict
+from typing import Any, Dict, List, Set
 from urllib.parse import urlsplit, urlunsplit
 import re
 import os.path
+import weakref
 
 import requests
+from cachetools import LRUCache
 
 from nomad import utils, config
 from nomad.datamodel.util import parse_path
@@ -203,14 +205,165 @@ class Context(MetainfoContext):
         self.urls[archive] = url
 
 
+class _ClosingLRUCache(LRUCache):
+    ''' An LRU cache that closes the values that it evicts. '''
+    def popitem(self):
+        key, value = super().popitem()
+        value.close()
+        return key, value
+
+
+# the key of the lazy loader in the m_cache of lazily loaded archives
+_lazy_archive_key = '_lazy_archive'
+
+
+class _LazyArchive:
+    '''
+    Loads the top-level sections of an archive lazily. Initially, only the metadata and
+    definitions are loaded. The other top-level sections are loaded when a reference is
+    resolved into them, or when the whole archive is requested. The instance is kept in
+    the ``m_cache`` of the archive, because references within the archive can
+    require to load more sections long after the archive was loaded.
+    '''
+
+    lazy_keys = set(
+        name for name in EntryArchive.m_def.all_sub_sections
+        if name not in ['metadata', 'definitions'])
+
+    def __init__(self, context: 'ServerContext', entry_id: str):
+        self.context = context
+        self.entry_id = entry_id
+        self.keys: List[str] = []
+        self.loaded_keys: Set[str] = set()
+        archive_dict = self._read()
+        self.loaded_keys.update(archive_dict)
+        self.archive = EntryArchive.m_from_dict(archive_dict, m_context=context)
+        self.archive.m_cache[_lazy_archive_key] = self
+
+    def _read(self, keys: List[str] = None) -> Dict[str, Any]:
+        '''
+        Reads the given top-level keys from the archive file. If no keys are given, all
+        keys that are not loaded lazily are read.
+        '''
+        from nomad.files import StagingUploadFiles
+        from nomad.archive.storage import ArchiveDict, ArchiveList
+
+        upload_files = self.context.upload_files
+        reader = upload_files.read_archive(self.entry_id)
+        try:
+            data = reader[self.entry_id]
+            if keys is None:
+                self.keys = list(data)
+                keys = [key for key in self.keys if key not in self.lazy_keys]
+
+            result = {}
+            for key in keys:
+                value = data[key]
+                if isinstance(value, ArchiveDict):
+                    value = value.to_dict()
+                elif isinstance(value, ArchiveList):
+                    value = value.to_list()
+                result[key] = value
+            return result
+        finally:
+            # the readers of published uploads are shared and closed with the upload files
+            if isinstance(upload_files, StagingUploadFiles):
+                reader.close()
+
+    def load(self, fragment: str = None) -> EntryArchive:
+        '''
+        Makes sure that the sections needed to resolve the given fragment are loaded
+        and returns the archive. Loads the whole archive, if no fragment is given.
+        '''
+        keys = self.keys
+        if fragment:
+            key = fragment.split('@')[0].strip('/').split('/')[0]
+            if key not in self.lazy_keys:
+                return self.archive
+            keys = [key]
+
+        missing_keys = [key for key in keys if key not in self.loaded_keys]
+        if len(missing_keys) > 0:
+            self.archive.m_update_from_dict(self._read(missing_keys))
+            self.loaded_keys.update(missing_keys)
+
+        return self.archive
+
+
+class ServerContextCache:
+    '''
+    The caches that a :class:`ServerContext` shares with all the contexts that it creates
+    for referenced uploads: the open upload files, the contexts of referenced uploads,
+    and the (lazily) loaded archives. The caches are bounded by
+    ``config.archive.context_upload_files_cache_size`` and
+    ``config.archive.context_archive_cache_size``.
+    '''
+    def __init__(self, root: 'ServerContext'):
+        self.root = root
+        self.upload_files = _ClosingLRUCache(maxsize=config.archive.context_upload_files_cache_size)
+        self.contexts = LRUCache(maxsize=config.archive.context_upload_files_cache_size)
+        self.archives = LRUCache(maxsize=config.archive.context_archive_cache_size)
+
+    def get_upload_files(self, upload_id: str):
+        upload_files = self.upload_files.get(upload_id)
+        if upload_files is None:
+            # delayed import, context is part of datamodel which should be available in
+            # base install, files however requires [infrastructure].
+            # TODO move server context to some infrastructure package!
+            from nomad import files
+            upload_files = files.UploadFiles.get(upload_id)
+            assert upload_files and upload_files.upload_id == upload_id
+            self.upload_files[upload_id] = upload_files
+
+        return upload_files
+
+    def get_context(self, upload_id: str) -> 'ServerContext':
+        if upload_id == self.root.upload_id:
+            return self.root
+
+        context = self.contexts.get(upload_id)
+        if context is None:
+            from nomad.processing import Upload
+            context = ServerContext(Upload(upload_id=upload_id), cache=self)
+            self.contexts[upload_id] = context
+
+        return context
+
+    def get_archive(self, upload_files, entry_id: str, fragment: str = None) -> EntryArchive:
+        key = (upload_files.upload_id, entry_id)
+        lazy_archive = self.archives.get(key)
+        if lazy_archive is None:
+            lazy_archive = _LazyArchive(self.get_context(upload_files.upload_id), entry_id)
+            self.archives[key] = lazy_archive
+
+        return lazy_archive.load(fragment)
+
+    def close(self):
+        ''' Closes all upload files opened by this cache and clears the caches. '''
+        for upload_files in self.upload_files.values():
+            upload_files.close()
+        for context in [self.root, *self.contexts.values()]:
+            context.urls.clear()
+        self.upload_files.clear()
+        self.contexts.clear()
+        self.archives.clear()
+
+
 class ServerContext(Context):
-    def __init__(self, upload=None):
+    def __init__(self, upload=None, cache: ServerContextCache = None):
         super().__init__()
         self.upload = upload
+        # contexts for referenced uploads share the cache of the context that created them
+        self._nested = cache is not None
+        self.cache = cache if cache is not None else ServerContextCache(self)
+        # the urls of archives in the shared cache must not keep evicted archives alive
+        self.urls: Dict[MSection, str] = weakref.WeakKeyDictionary()  # type: ignore
 
     @property
     def upload_files(self):
         if self.upload:
+            if self._nested:
+                return self.cache.get_upload_files(self.upload.upload_id)
             return self.upload.upload_files
 
     @property
@@ -225,19 +378,15 @@ class ServerContext(Context):
         if self.upload_files and self.upload_files.upload_id == upload_id:
             return self.upload_files
 
-        # delayed import, context is part of datamodel which should be available in
-        # base install, files however requires [infrastructure].
-        # TODO move server context to some infrastructure package!
-        from nomad import files
-        upload_files = files.UploadFiles.get(upload_id)
-        assert upload_files and upload_files.upload_id == upload_id
-        return upload_files
+        return self.cache.get_upload_files(upload_id)
 
-    def load_archive(self, entry_id: str, upload_id: str, installation_url: str) -> EntryArchive:
+    def _load_archive(
+            self, entry_id: str, upload_id: str, installation_url: str,
+            fragment: str = None) -> EntryArchive:
         upload_files = self._get_upload_files(upload_id, installation_url)
 
         try:
-            archive_dict = upload_files.read_archive(entry_id)[entry_id].to_dict()
+            return self.cache.get_archive(upload_files, entry_id, fragment)
         except KeyError:
             if upload_id != self.upload_id:
                 raise MetainfoReferenceError(f'Referencing another Upload is not allowed.')
@@ -246,12 +395,43 @@ class ServerContext(Context):
                 return self.load_raw_file(entry.mainfile, upload_id, installation_url)
             raise MetainfoReferenceError(f'Could not load {entry_id}.')
 
-        context = self
-        if upload_id != self.upload_id:
-            from nomad.processing import Upload
-            context = ServerContext(Upload(upload_id=upload_id))
+    def load_archive(self, entry_id: str, upload_id: str, installation_url: str) -> EntryArchive:
+        return self._load_archive(entry_id, upload_id, installation_url)
+
+    def resolve_archive_url(self, url: str) -> MSection:
+        return self.resolve_archive_url_for_fragment(url, None)
+
+    def resolve_archive_url_for_fragment(self, url: str, fragment: str) -> MSection:
+        if url in self.archives:
+            # archives given with the data (m_ref_archives) or loaded from raw files
+            return self.archives[url]
+
+        installation_url, upload_id, kind, entry_id = self._parse_url(url)
+        if kind != 'archive':
+            return super().resolve_archive_url(url)
+
+        archive = self._load_archive(entry_id, upload_id, installation_url, fragment=fragment)
+        if _lazy_archive_key in archive.m_cache:
+            # the (lazily loaded) archive is kept by the shared cache, only its url is
+            # needed to create references
+            self.urls[archive] = url
+        else:
+            # not a processed archive, e.g. loaded from a raw file
+            self.cache_archive(url, archive)
+
+        return archive
+
+    def load_fragment(self, root: MSection, fragment: str):
+        lazy_archive = root.m_cache.get(_lazy_archive_key)
+        if lazy_archive is not None:
+            lazy_archive.load(fragment)
 
-        return EntryArchive.m_from_dict(archive_dict, m_context=context)
+    def close(self):
+        '''
+        Closes all upload files that were opened to resolve references and clears
+        the cached archives.
+        '''
+        self.cache.close()
 
     def load_raw_file(self, path: str, upload_id: str, installation_url: str) -> EntryArchive:
         upload_files = self._get_upload_files(upload_id, installation_url)
@@ -17,9 +17,10 @@
 #
 
 import os.path
+import threading
 
-from typing import Any
-from cachetools import cached, TTLCache
+from typing import Any, Dict, Iterable
+from cachetools import TTLCache
 from nomad.metainfo.metainfo import (
     predefined_datatypes, Category, MCategory, MSection, Quantity, Reference, MetainfoReferenceError,
     MProxy, Capitalized, Section, Datetime)
@@ -91,6 +92,37 @@ class EntryData(ArchiveSection):
             archive.results = Results()
 
 
+_user_cache_lock = threading.Lock()
+_user_cache: TTLCache = None
+
+
+def _get_user_cache() -> TTLCache:
+    global _user_cache
+    cache_size = config.services.user_cache_size
+    if not cache_size:
+        return None
+
+    if _user_cache is None or _user_cache.maxsize != cache_size or \
+            _user_cache.ttl != config.services.user_cache_ttl:
+        _user_cache = TTLCache(maxsize=cache_size, ttl=config.services.user_cache_ttl)
+    return _user_cache
+
+
+def _cache_user(cache: TTLCache, user: 'User'):
+    for key in ['user_id', 'username', 'email']:
+        value = getattr(user, key)
+        if value is not None:
+            cache[(key, value)] = user
+
+
+def clear_user_cache():
+    ''' Removes all users from the process-wide user cache. '''
+    with _user_cache_lock:
+        cache = _get_user_cache()
+        if cache is not None:
+            cache.clear()
+
+
 class Author(MSection):
     ''' A person that is author of data in NOMAD or references by NOMAD. '''
     name = Quantity(
@@ -149,10 +181,63 @@ class User(Author):
     is_oasis_admin = Quantity(type=bool, default=False)
 
     @staticmethod
-    @cached(cache=TTLCache(maxsize=2048, ttl=24 * 3600))
     def get(*args, **kwargs) -> 'User':
+        '''
+        Returns the user for the given `user_id`, `username`, or `email` from the user
+        management. Users are kept in a process-wide cache that is shared with
+        :func:`get_users`.
+        '''
         from nomad import infrastructure
-        return infrastructure.user_management.get_user(*args, **kwargs)  # type: ignore
+
+        keys = dict(zip(['user_id', 'username', 'email'], args), **kwargs)
+        key = next(((name, keys[name]) for name in ['user_id', 'username', 'email'] if keys.get(name)), None)
+        if key is not None:
+            with _user_cache_lock:
+                cache = _get_user_cache()
+                user = cache.get(key) if cache is not None else None
+            if user is not None:
+                return user
+
+        user = infrastructure.user_management.get_user(*args, **kwargs)  # type: ignore
+        if user is not None and key is not None:
+            with _user_cache_lock:
+                cache = _get_user_cache()
+                if cache is not None:
+                    _cache_user(cache, user)
+                    cache[key] = user
+        return user
+
+    @staticmethod
+    def get_users(user_ids: Iterable[str]) -> Dict[str, 'User']:
+        '''
+        Returns the users for all given `user_ids` as a dict with user_ids as keys. Uncached
+        users are retrieved with a single call to the user management. Unknown
+        user_ids are omitted.
+        '''
+        from nomad import infrastructure
+
+        users: Dict[str, User] = {}
+        missing = []
+        with _user_cache_lock:
+            cache = _get_user_cache()
+            for user_id in dict.fromkeys(user_ids):
+                user = cache.get(('user_id', user_id)) if cache is not None else None
+                if user is not None:
+                    users[user_id] = user
+                else:
+                    missing.append(user_id)
+
+        if len(missing) > 0:
+            retrieved = infrastructure.user_management.get_users(missing)  # type: ignore
+            with _user_cache_lock:
+                cache = _get_user_cache()
+                if cache is not None:
+                    for user_id, user in retrieved.items():
+                        _cache_user(cache, user)
+                        cache[('user_id', user_id)] = user
+            users.update(retrieved)
+
+        return users
 
     def full_user(self) -> 'User':
         ''' Returns a User object with all attributes loaded from the user management system. '''
@@ -229,3 +314,30 @@ class AuthorReference(Reference):
 
 author_reference = AuthorReference()
 predefined_datatypes["Author"] = author_reference
+
+
+def prefetch_users(sections: Iterable[MSection]):
+    '''
+    Retrieves the users of all unresolved user and author references in the given
+    sections (without their sub-sections) with one call to the user management. This
+    fills the user cache, so that resolving the references later does not require
+    a user management request per user.
+    '''
+    user_ids = set()
+    for section in sections:
+        for quantity in section.m_def.all_quantities.values():
+            if quantity.derived is not None or quantity.type not in [user_reference, author_reference]:
+                continue
+
+            values = section.__dict__.get(quantity.name)
+            if values is None:
+                continue
+            if not isinstance(values, list):
+                values = [values]
+            for value in values:
+                if isinstance(value, MProxy) and value.m_proxy_resolved is None and \
+                        isinstance(value.m_proxy_value, str):
+                    user_ids.add(value.m_proxy_value)
+
+    if len(user_ids) > 0:
+        User.get_users(user_ids)
@@ -45,18 +45,27 @@ original mainfile, and vice versa.
 
 from abc import ABCMeta
 import sys
-from typing import IO, Set, Dict, Iterable, Iterator, List, Tuple, Any, NamedTuple
+from typing import (
+    IO, BinaryIO, Set, Dict, Iterable, Iterator, List, Tuple, Any, NamedTuple, Optional, Union, cast)
 from functools import lru_cache
 from pydantic import BaseModel
 from datetime import datetime
+from collections import deque
+from cachetools import TTLCache, LRUCache
 import os.path
 import os
+import stat
 import shutil
+import struct
+import tempfile
+import threading
+import time
 import tarfile
 import zipstream
 import hashlib
 import io
 import json
+import zlib
 import yaml
 import magic
 
@@ -73,6 +82,7 @@ else:
     import zipfile37 as zipfile
 
 decompress_file_extensions = ('.zip', '.tgz', '.gz', '.tar.gz', '.tar.bz2', '.tar')
+tar_stream_file_extensions = ('.tgz', '.tar.gz', '.tar.bz2', '.tar')
 bundle_info_filename = 'bundle_info.json'
 
 # Used to check if zip-files/archive files are empty
@@ -109,6 +119,91 @@ def auto_decompress(path: str):
     return None
 
 
+def is_tar_stream(file_name: str, head: bytes) -> bool:
+    '''
+    Returns True if a file with the given name and first bytes (at least 512 bytes or
+    all data) looks like a (compressed) tar file that can be extracted as a stream.
+    '''
+    if not file_name.lower().endswith(tar_stream_file_extensions):
+        return False
+    if head.startswith((b'\x1f\x8b', b'BZh', b'\xfd7zXZ\x00')):
+        return True
+    return head[257:262] == b'ustar'
+
+
+def _safe_member_path(name: str) -> Optional[str]:
+    ''' Normalizes the path of an archive member, returns None for unsafe paths. '''
+    path = os.path.normpath(name.lstrip('/'))
+    if path == '.' or not is_safe_relative_path(path):
+        return None
+    return path
+
+
+def _archive_members(archive: Union[zipfile.ZipFile, tarfile.TarFile]) -> Iterator[Tuple[str, Any]]:
+    '''
+    Yields the path and contents of all directories, files, and hard links in the given
+    zip or tar file. The contents are None for directories, a file-like for files, and the
+    path of an earlier member for hard links. Tar files can be opened as a stream
+    (mode "r|*"). Symbolic links, special files, and members with unsafe paths are skipped.
+    '''
+    if isinstance(archive, zipfile.ZipFile):
+        for zip_info in archive.infolist():
+            path = _safe_member_path(zip_info.filename)
+            if path is None:
+                continue
+            if zip_info.is_dir():
+                yield path, None
+            else:
+                with archive.open(zip_info) as f:
+                    yield path, f
+        return
+
+    for tar_info in archive:
+        path = _safe_member_path(tar_info.name)
+        if path is None:
+            continue
+        if tar_info.isdir():
+            yield path, None
+        elif tar_info.isfile():
+            with archive.extractfile(tar_info) as f:
+                yield path, f
+        elif tar_info.islnk():
+            link_path = _safe_member_path(tar_info.linkname)
+            if link_path is not None:
+                yield path, link_path
+
+
+def _extract_archive(archive: Union[zipfile.ZipFile, tarfile.TarFile], os_path: str) -> None:
+    '''
+    Extracts the members of the given zip or tar file (see :func:`_archive_members`)
+    into the given directory. Zip file members are checked against their crc while
+    they are extracted.
+    '''
+    for path, contents in _archive_members(archive):
+        target_path = os.path.join(os_path, path)
+        if contents is None:
+            os.makedirs(target_path, exist_ok=True)
+            continue
+
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        if isinstance(contents, str):
+            link_target_path = os.path.join(os_path, contents)
+            if os.path.isfile(link_target_path):
+                shutil.copyfile(link_target_path, target_path)
+        else:
+            with open(target_path, 'wb') as f:
+                shutil.copyfileobj(contents, f, 1024 * 1024)
+
+
+def extract_tar_stream(stream: IO, os_path: str) -> None:
+    '''
+    Extracts tar data (optionally gz, bz2, or xz compressed) that is read sequentially
+    from the given stream into the given directory.
+    '''
+    with tarfile.open(fileobj=stream, mode='r|*') as tf:
+        _extract_archive(tf, os_path)
+
+
 def copytree(src, dst):
     '''
     A close on ``shutils.copytree`` that does not try to copy the stats on all files.
@@ -648,6 +743,16 @@ class UploadFiles(DirectoryObject, metaclass=ABCMeta):
         '''
         raise NotImplementedError()
 
+    def raw_file_etag(self, file_path: str) -> str:
+        '''
+        Returns:
+            A string that changes whenever the contents of the given raw file change,
+            e.g. to be used as HTTP entity tag.
+        Raises:
+            KeyError: If the file does not exist.
+        '''
+        raise NotImplementedError()
+
     def raw_file_mime_type(self, file_path: str) -> str:
         assert self.raw_path_is_file(file_path), 'Provided path does not specify a file, or is invalid.'
         raw_file = self.raw_file(file_path, 'br')
@@ -658,6 +763,38 @@ class UploadFiles(DirectoryObject, metaclass=ABCMeta):
             mime_type = 'application/octet-stream'
         return mime_type
 
+    def entry_files(self, mainfile: str, with_mainfile: bool = True, with_cutoff: bool = True) -> Iterable[str]:
+        '''
+        Returns all the auxfiles and mainfile for a given mainfile. This implements
+        nomad's logic about what is part of an entry and what not. The mainfile
+        is the first element, the rest is sorted.
+        Arguments:
+            mainfile: The mainfile path relative to upload
+            with_mainfile: Do include the mainfile, default is True
+        '''
+        raise NotImplementedError()
+
+    def entry_hash(self, mainfile: str, mainfile_key: str) -> str:
+        '''
+        Calculates a hash for the given entry based on file contents and aux file contents.
+        Arguments:
+            mainfile: The mainfile path relative to the upload that identifies the entry in
+                the folder structure.
+            mainfile_key: The mainfile_key of the entry (if any)
+        Returns:
+            The calculated hash
+        Raises:
+            KeyError: If the mainfile does not exist.
+        '''
+        hash = hashlib.sha512()
+        for filepath in self.entry_files(mainfile):
+            with self.raw_file(filepath, 'rb') as f:
+                for data in iter(lambda: f.read(65536), b''):
+                    hash.update(data)
+        if mainfile_key:
+            hash.update(mainfile_key.encode('utf8'))
+        return utils.make_websave(hash)
+
     def read_archive(self, entry_id: str, use_blocked_toc: bool = True) -> ArchiveReader:
         '''
         Returns an :class:`nomad.archive.ArchiveReader` that contains the
@@ -701,6 +838,279 @@ class UploadFiles(DirectoryObject, metaclass=ABCMeta):
         raise NotImplementedError()
 
 
+_raw_directory_index_lock = threading.Lock()
+_raw_directory_index: TTLCache = None
+
+
+def _get_raw_directory_index() -> TTLCache:
+    global _raw_directory_index
+
+    cache_size = config.process.raw_directory_index_size
+    if not cache_size:
+        return None
+
+    if _raw_directory_index is None or _raw_directory_index.maxsize != cache_size or \
+            _raw_directory_index.ttl != config.process.raw_directory_index_ttl:
+        _raw_directory_index = TTLCache(
+            maxsize=cache_size, ttl=config.process.raw_directory_index_ttl)
+    return _raw_directory_index
+
+
+_raw_size_index_lock = threading.Lock()
+_raw_size_indexes: LRUCache = LRUCache(maxsize=16)
+
+
+def _raw_directory_ancestors(path: str, include_self: bool = False) -> Iterator[str]:
+    ''' Yields the parent directories of the given raw path up to the raw directory ''. '''
+    path = path.rstrip('/')
+    if include_self:
+        yield path
+    while path:
+        path = os.path.dirname(path)
+        yield path
+
+
+def _raw_file_compression_level(path: str) -> int:
+    ''' The configured deflate level for the given raw file, 0 means no compression. '''
+    name = os.path.basename(path).lower()
+    extension_levels = config.process.raw_file_compression_levels
+    for extension in sorted(extension_levels, key=len, reverse=True):
+        if name.endswith('.' + extension.lower()):
+            return extension_levels[extension]
+    return config.process.raw_file_compression_level
+
+
+# The local file header and central directory header of zip file members, and the
+# size of the end of central directory record (without comment), see the zip file
+# format specification
+_zip_file_header_struct = '<4s2B4HL2L2H'
+_zip_file_header_size = 30
+_zip_file_header_signature = b'PK\x03\x04'
+_zip_central_directory_struct = '<4s4B4HL2L5H2L'
+_zip_central_directory_signature = b'PK\x01\x02'
+_zip_end_of_central_directory_size = 22
+_zip_utf8_flag = 0x800
+_zip_max_size = 0xFFFFFFFF
+# like zipfile, zip64 extensions are used for sizes and offsets above this limit
+_zip64_limit = (1 << 31) - 1
+
+
+def _compress_raw_files(files: List[Tuple[str, int]]) -> List[Tuple[int, int, bytes]]:
+    '''
+    Compresses the given (os_path, level) files with raw deflate as used in zip files.
+    Used by the packing processes.
+
+    Returns:
+        A (crc, file_size, compressed data) tuple for each file.
+    '''
+    results = []
+    for os_path, level in files:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        crc, file_size = 0, 0
+        data = []
+        with open(os_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                crc = zlib.crc32(block, crc)
+                file_size += len(block)
+                data.append(compressor.compress(block))
+        data.append(compressor.flush())
+        results.append((crc, file_size, b''.join(data)))
+    return results
+
+
+class _RawZipWriter:
+    '''
+    Writes a zip file with members that can be compressed by other processes. zipfile
+    has no API to add already compressed data. Therefore, this writes the local file
+    headers, the central directory, and the end of central directory records itself,
+    see the zip file format specification. Zip64 extensions are used for large
+    members and zip files.
+    '''
+    def __init__(self, f: BinaryIO):
+        self._file = f
+        self.infos: List[zipfile.ZipInfo] = []
+
+    def _local_header(self, info: zipfile.ZipInfo, zip64: bool) -> bytes:
+        name = info.filename.encode('utf-8')
+        file_size, compress_size, extra = info.file_size, info.compress_size, b''
+        if zip64:
+            extra = struct.pack('<2H2Q', 1, 16, file_size, compress_size)
+            file_size, compress_size = _zip_max_size, _zip_max_size
+        year, month, day, hour, minute, second = info.date_time
+        return struct.pack(
+            _zip_file_header_struct, _zip_file_header_signature,
+            45 if zip64 else 20, 0, 0 if info.filename.isascii() else _zip_utf8_flag,
+            info.compress_type, hour << 11 | minute << 5 | second // 2,
+            (year - 1980) << 9 | month << 5 | day, info.CRC, compress_size, file_size,
+            len(name), len(extra)) + name + extra
+
+    def _central_directory_header(self, info: zipfile.ZipInfo) -> bytes:
+        name = info.filename.encode('utf-8')
+        values = [info.file_size, info.compress_size, info.header_offset]
+        zip64_values = [value for value in values if value > _zip64_limit]
+        extra = b''
+        if zip64_values:
+            extra = struct.pack(f'<2H{len(zip64_values)}Q', 1, len(zip64_values) * 8, *zip64_values)
+            values = [_zip_max_size if value > _zip64_limit else value for value in values]
+        file_size, compress_size, header_offset = values
+        version = 45 if zip64_values else 20
+        year, month, day, hour, minute, second = info.date_time
+        return struct.pack(
+            _zip_central_directory_struct, _zip_central_directory_signature,
+            version, 3, version, 0, 0 if info.filename.isascii() else _zip_utf8_flag,
+            info.compress_type, hour << 11 | minute << 5 | second // 2,
+            (year - 1980) << 9 | month << 5 | day, info.CRC, compress_size, file_size,
+            len(name), len(extra), 0, 0, 0, info.external_attr, header_offset) + name + extra
+
+    def _create_info(self, path: str, os_path: str, compress_type: int) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo.from_file(os_path, path)
+        info.compress_type = compress_type
+        info.CRC, info.compress_size = 0, 0
+        info.header_offset = self._file.tell()
+        self.infos.append(info)
+        return info
+
+    def write(self, path: str, os_path: str, level: int):
+        '''
+        Writes the given file or directory. Files are deflated with the given level by
+        this process, or stored if the level is 0.
+        '''
+        info = self._create_info(path, os_path, zipfile.ZIP_DEFLATED if level else zipfile.ZIP_STORED)
+        if info.is_dir():
+            info.compress_type = zipfile.ZIP_STORED
+            self._file.write(self._local_header(info, zip64=False))
+            return
+
+        # the sizes are unknown before the file is written, the header is rewritten afterwards
+        zip64 = info.file_size * 1.05 > _zip64_limit
+        self._file.write(self._local_header(info, zip64))
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15) if level else None
+        crc, file_size, compress_size = 0, 0, 0
+        with open(os_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                crc = zlib.crc32(block, crc)
+                file_size += len(block)
+                if compressor is not None:
+                    block = compressor.compress(block)
+                self._file.write(block)
+                compress_size += len(block)
+        if compressor is not None:
+            block = compressor.flush()
+            self._file.write(block)
+            compress_size += len(block)
+
+        if not zip64 and max(file_size, compress_size) > _zip64_limit:
+            raise zipfile.LargeZipFile(f'{path} has grown too large while it was packed')
+        info.CRC, info.file_size, info.compress_size = crc, file_size, compress_size
+        end = self._file.tell()
+        self._file.seek(info.header_offset)
+        self._file.write(self._local_header(info, zip64))
+        self._file.seek(end)
+
+    def write_compressed(self, path: str, os_path: str, crc: int, file_size: int, data: bytes):
+        ''' Writes the given file with its already deflated data. '''
+        info = self._create_info(path, os_path, zipfile.ZIP_DEFLATED)
+        info.CRC, info.file_size, info.compress_size = crc, file_size, len(data)
+        self._file.write(self._local_header(info, zip64=max(file_size, len(data)) > _zip64_limit))
+        self._file.write(data)
+
+    def close(self):
+        ''' Writes the central directory and the end of central directory records. '''
+        directory_offset = self._file.tell()
+        for info in self.infos:
+            self._file.write(self._central_directory_header(info))
+        directory_size = self._file.tell() - directory_offset
+
+        n_entries = len(self.infos)
+        if n_entries > 0xFFFF or max(directory_offset, directory_size) > _zip64_limit:
+            zip64_end_offset = self._file.tell()
+            self._file.write(struct.pack(
+                '<4sQ2H2L4Q', b'PK\x06\x06', 44, 45, 45, 0, 0,
+                n_entries, n_entries, directory_size, directory_offset))
+            self._file.write(struct.pack('<4sLQL', b'PK\x06\x07', 0, zip64_end_offset, 1))
+            n_entries = min(n_entries, 0xFFFF)
+            directory_size = min(directory_size, _zip_max_size)
+            directory_offset = min(directory_offset, _zip_max_size)
+
+        self._file.write(struct.pack(
+            '<4s4H2LH', b'PK\x05\x06', 0, 0, n_entries, n_entries,
+            directory_size, directory_offset, 0))
+
+
+def _write_raw_zip(f: BinaryIO, files: Iterable[Tuple[str, str]]) -> List[zipfile.ZipInfo]:
+    '''
+    Writes the given (path in zip, os path) files and directories as zip file into the
+    given binary file. Files are compressed with the levels configured by
+    ``config.process.raw_file_compression_level(s)``. If ``config.process.pack_workers``
+    is set, files are compressed in chunks by a pool of processes, while the zip file
+    is written by this process in the order of the given files.
+
+    Returns:
+        The zip infos of all written files and directories.
+    '''
+    zip_writer = _RawZipWriter(f)
+    executor = utils.create_process_pool(config.process.pack_workers)
+    max_pending_chunks = config.process.pack_workers * 2
+    chunk_size = config.process.pack_chunk_size
+    pending_chunks: deque = deque()
+
+    def write_chunk():
+        chunk, future = pending_chunks.popleft()
+        if future is None:
+            for path, os_path, level in chunk:
+                zip_writer.write(path, os_path, level)
+            return
+
+        for (path, os_path, _), (crc, file_size, data) in zip(chunk, future.result()):
+            zip_writer.write_compressed(path, os_path, crc, file_size, data)
+
+    def submit(chunk, parallel: bool):
+        future = None
+        if parallel:
+            future = executor.submit(_compress_raw_files, [(os_path, level) for _, os_path, level in chunk])
+        pending_chunks.append((chunk, future))
+        while len(pending_chunks) > max_pending_chunks:
+            write_chunk()
+
+    try:
+        chunk: List[Tuple[str, str, int]] = []
+        chunk_bytes = 0
+        for path, os_path in files:
+            level = _raw_file_compression_level(path) if os.path.isfile(os_path) else 0
+            if executor is None:
+                zip_writer.write(path, os_path, level)
+                continue
+
+            size = os.path.getsize(os_path) if level else 0
+            if not level or size > chunk_size:
+                # directories, stored, and large files are written by this process
+                if chunk:
+                    submit(chunk, parallel=True)
+                    chunk, chunk_bytes = [], 0
+                submit([(path, os_path, level)], parallel=False)
+                continue
+
+            chunk.append((path, os_path, level))
+            chunk_bytes += size
+            if chunk_bytes >= chunk_size:
+                submit(chunk, parallel=True)
+                chunk, chunk_bytes = [], 0
+
+        if chunk:
+            submit(chunk, parallel=True)
+        while pending_chunks:
+            write_chunk()
+    finally:
+        if executor is not None:
+            for _, future in pending_chunks:
+                if future is not None:
+                    future.cancel()
+            executor.shutdown(wait=True)
+
+    zip_writer.close()
+    return zip_writer.infos
+
+
 class StagingUploadFiles(UploadFiles):
     def __init__(self, upload_id: str, create: bool = False):
         super().__init__(upload_id, create)
@@ -708,6 +1118,7 @@ class StagingUploadFiles(UploadFiles):
         self._raw_dir = self.join_dir('raw', create)
         self._archive_dir = self.join_dir('archive', create)
         self._frozen_file = self.join_file('.frozen')
+        self._raw_size_index_file = self.join_file('.raw_sizes.json')
 
         self._size = 0
 
@@ -737,6 +1148,43 @@ class StagingUploadFiles(UploadFiles):
         except IsADirectoryError:
             raise KeyError(path_object.os_path)
 
+    def extract_raw_directory(self, public_upload_files: 'PublicUploadFiles', path: str):
+        '''
+        Extracts the files of the given raw directory and all its sub directories from
+        the raw zip file of the given public upload files, unless the directory or one
+        of its parent directories was already extracted. This allows to reprocess the
+        entries of published uploads without extracting all raw files. Other processes
+        might extract the same directory concurrently.
+        '''
+        assert is_safe_relative_path(path)
+        path = path.rstrip('/')
+        markers_dir = self.join_dir('.extracted', create=True)
+
+        def marker(directory: str) -> PathObject:
+            return markers_dir.join_file(hashlib.md5(directory.encode('utf-8')).hexdigest())
+
+        if any(marker(directory).exists() for directory in _raw_directory_ancestors(path, include_self=True)):
+            return
+
+        self._invalidate_raw_directory_index()
+        self._delete_raw_size_index()
+        raw_zip = public_upload_files._open_raw_zip_file()
+        for path_info in public_upload_files.raw_directory_list(path, recursive=True, files_only=True):
+            target_path = self.raw_file_object(path_info.path).os_path
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            # extract to a temporary file first, other processes might use the file
+            fd, tmp_path = tempfile.mkstemp(dir=self.os_path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as target_f, raw_zip.open(path_info.path) as source_f:
+                shutil.copyfileobj(source_f, target_f)
+            os.replace(tmp_path, target_path)
+
+        with open(marker(path).os_path, 'wt') as f:
+            f.write(path)
+
+    def delete(self) -> None:
+        self._invalidate_raw_directory_index()
+        super().delete()
+
     def is_empty(self) -> bool:
         return not os.path.exists(self._raw_dir.os_path) or not os.listdir(self._raw_dir.os_path)
 
@@ -748,35 +1196,239 @@ class StagingUploadFiles(UploadFiles):
     def raw_path_is_file(self, path: str) -> bool:
         if not is_safe_relative_path(path):
             return False
+        directory, name = os.path.split(path)
+        elements = self._raw_directory_elements(directory, cached_only=True)
+        if elements is not None:
+            return elements.get(name, False)
         return os.path.isfile(os.path.join(self._raw_dir.os_path, path))
 
     def raw_create_directory(self, path: str):
         assert path and is_safe_relative_path(path), 'Bad path provided'
+        self._invalidate_raw_directory_index()
         os.makedirs(os.path.join(self._raw_dir.os_path, path))
+        self._update_raw_size_index(directories=[path])
+
+    def _raw_directory_elements(self, path: str, cached_only: bool = False) -> Dict[str, bool]:
+        '''
+        Returns the elements of the given raw directory as dict with the element names
+        as keys and whether the element is a file as values, or None if the path is not a
+        directory. The listings are kept in a per process index with the listings of
+        ``config.process.raw_directory_index_size`` uploads. Listings are validated with
+        the directory's modification time and invalidated by the file operations of this
+        class. File sizes are not indexed, because rewriting a file does not modify its
+        directory. With ``cached_only``, None is also returned for directories that are
+        not in the index. The returned dict must not be modified.
+        '''
+        os_path = os.path.join(self._raw_dir.os_path, path)
+        index = _get_raw_directory_index()
+        if cached_only and index is None:
+            return None
+
+        try:
+            directory_stat = os.stat(os_path)
+        except OSError:
+            return None
+        if not stat.S_ISDIR(directory_stat.st_mode):
+            return None
+
+        path = path.rstrip('/')
+        if index is not None:
+            with _raw_directory_index_lock:
+                listings = index.get(self._raw_dir.os_path)
+                cached = listings.get(path) if listings is not None else None
+            if cached is not None and cached[0] == directory_stat.st_mtime_ns:
+                return cached[1]
+        if cached_only:
+            return None
+
+        elements: Dict[str, bool] = {}
+        with os.scandir(os_path) as entries:
+            for entry in entries:
+                try:
+                    elements[entry.name] = entry.is_file()
+                except FileNotFoundError:
+                    continue
+
+        # Modifications within the timestamp granularity might not change the
+        # modification time, we only keep listings of directories that were not
+        # modified recently.
+        if index is not None and time.time_ns() - directory_stat.st_mtime_ns > 1e9:
+            with _raw_directory_index_lock:
+                listings = index.get(self._raw_dir.os_path)
+                if listings is None:
+                    listings = {}
+                    index[self._raw_dir.os_path] = listings
+                listings[path] = (directory_stat.st_mtime_ns, elements)
+
+        return elements
+
+    def _raw_element_size(self, path: str) -> int:
+        ''' The size of the given raw file, or 0 if it does not exist anymore. '''
+        try:
+            return os.path.getsize(os.path.join(self._raw_dir.os_path, path))
+        except FileNotFoundError:
+            return 0
+
+    def _invalidate_raw_directory_index(self):
+        index = _get_raw_directory_index()
+        if index is None:
+            return
+        with _raw_directory_index_lock:
+            index.pop(self._raw_dir.os_path, None)
+
+    def _read_raw_size_index(self) -> Dict[str, List[int]]:
+        '''
+        Returns the persisted index with the total size and number of files (including
+        all sub directories) for each raw directory, or None if there is no index. The
+        returned dict is shared and must not be modified.
+        '''
+        os_path = self._raw_size_index_file.os_path
+        try:
+            file_stat = os.stat(os_path)
+        except OSError:
+            return None
+
+        version = (file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size)
+        with _raw_size_index_lock:
+            cached = _raw_size_indexes.get(os_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        try:
+            with open(os_path, 'rt') as f:
+                index = json.load(f)
+        except Exception as e:
+            self.logger.warning('could not read raw size index', exc_info=e)
+            return None
+
+        with _raw_size_index_lock:
+            _raw_size_indexes[os_path] = (version, index)
+        return index
+
+    def _write_raw_size_index(self, index: Dict[str, List[int]]):
+        # write to a temporary file first, other processes might read concurrently
+        fd, tmp_path = tempfile.mkstemp(dir=self.os_path, suffix='.tmp')
+        with os.fdopen(fd, 'wt') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._raw_size_index_file.os_path)
+
+    def _delete_raw_size_index(self):
+        try:
+            os.remove(self._raw_size_index_file.os_path)
+        except FileNotFoundError:
+            pass
+
+    def update_raw_size_index(self):
+        '''
+        Crawls all raw files and persists the index with the total size and number of
+        files for each raw directory. The file operations of this class update the
+        index incrementally. Other modifications of the raw files (e.g. by parsers)
+        remove the index or require an update, which is done at the end of processing.
+        Without index, directory sizes are computed by crawling the directories.
+        '''
+        self._invalidate_raw_directory_index()
+        index: Dict[str, List[int]] = {}
+
+        def crawl(path: str) -> List[int]:
+            size, count = 0, 0
+            for element_name, is_file in (self._raw_directory_elements(path) or {}).items():
+                if is_file:
+                    size += self._raw_element_size(os.path.join(path, element_name))
+                    count += 1
+                else:
+                    sub_size, sub_count = crawl(os.path.join(path, element_name))
+                    size += sub_size
+                    count += sub_count
+            index[path] = [size, count]
+            return index[path]
+
+        crawl('')
+        self._write_raw_size_index(index)
+
+    def _update_raw_size_index(
+            self, files: Iterable[Tuple[str, Optional[int], Optional[int]]] = (),
+            directories: Iterable[str] = ()):
+        '''
+        Incrementally updates the persisted raw size index with newly created
+        directories and changed files given as ``(path, old_size, new_size)``. The sizes
+        are None for files that did not exist before or do not exist anymore.
+        '''
+        index = self._read_raw_size_index()
+        if index is None:
+            return
+
+        index = dict(index)
+        for directory in directories:
+            for ancestor in _raw_directory_ancestors(directory, include_self=True):
+                index.setdefault(ancestor, [0, 0])
+        for path, old_size, new_size in files:
+            size_delta = (new_size or 0) - (old_size or 0)
+            count_delta = (new_size is not None) - (old_size is not None)
+            for ancestor in _raw_directory_ancestors(path):
+                size, count = index.get(ancestor, (0, 0))
+                index[ancestor] = [size + size_delta, count + count_delta]
+
+        self._write_raw_size_index(index)
+
+    def _remove_directory_from_raw_size_index(self, path: str):
+        index = self._read_raw_size_index()
+        if index is None:
+            return
+
+        path = path.rstrip('/')
+        if not path:
+            self._write_raw_size_index({'': [0, 0]})
+            return
+        if path not in index:
+            # inconsistent index
+            self._delete_raw_size_index()
+            return
+
+        size, count = index[path]
+        prefix = path + '/'
+        index = {
+            directory: value for directory, value in index.items()
+            if directory != path and not directory.startswith(prefix)}
+        for ancestor in _raw_directory_ancestors(path):
+            ancestor_size, ancestor_count = index.get(ancestor, (0, 0))
+            index[ancestor] = [ancestor_size - size, ancestor_count - count]
+
+        self._write_raw_size_index(index)
 
     def raw_directory_list(
             self, path: str = '', recursive=False, files_only=False, path_prefix=None) -> Iterable[RawPathInfo]:
         if not is_safe_relative_path(path):
             return
-        os_path = os.path.join(self._raw_dir.os_path, path)
-        if not os.path.isdir(os_path):
+        yield from self._raw_directory_list(
+            path, recursive, files_only, path_prefix, self._read_raw_size_index())
+
+    def _raw_directory_list(
+            self, path: str, recursive: bool, files_only: bool, path_prefix: str,
+            size_index: Optional[Dict[str, List[int]]]) -> Iterable[RawPathInfo]:
+        elements = self._raw_directory_elements(path)
+        if elements is None:
             return
-        for element_name in sorted(os.listdir(os_path)):
+        for element_name in sorted(elements):
             element_raw_path = os.path.join(path, element_name)
-            element_os_path = os.path.join(os_path, element_name)
-            is_file = os.path.isfile(element_os_path)
+            is_file = elements[element_name]
+            size = self._raw_element_size(element_raw_path) if is_file else 0
             if not is_file:
-                # Crawl sub directory.
-                dir_size = 0
-                for sub_path_info in self.raw_directory_list(element_raw_path, True, files_only):
-                    if sub_path_info.is_file:
-                        dir_size += sub_path_info.size
-                    if recursive:
-                        if not path_prefix or sub_path_info.path.startswith(path_prefix):
-                            yield sub_path_info
+                indexed = size_index.get(element_raw_path) if size_index is not None else None
+                if recursive or (indexed is None and not files_only):
+                    # Crawl sub directory.
+                    dir_size = 0
+                    for sub_path_info in self._raw_directory_list(
+                            element_raw_path, True, files_only, None, size_index):
+                        if sub_path_info.is_file:
+                            dir_size += sub_path_info.size
+                        if recursive:
+                            if not path_prefix or sub_path_info.path.startswith(path_prefix):
+                                yield sub_path_info
+                    size = dir_size
+                elif indexed is not None:
+                    size = indexed[0]
 
             if not files_only or is_file:
-                size = os.stat(element_os_path).st_size if is_file else dir_size
                 if not path_prefix or element_raw_path.startswith(path_prefix):
                     yield RawPathInfo(
                         path=element_raw_path,
@@ -786,12 +1438,24 @@ class StagingUploadFiles(UploadFiles):
 
     def raw_file(self, file_path: str, *args, **kwargs) -> IO:
         assert is_safe_relative_path(file_path)
+        mode = args[0] if args else kwargs.get('mode', 'r')
+        if any(flag in mode for flag in 'wax+'):
+            self._invalidate_raw_directory_index()
+            self._delete_raw_size_index()
         return self._file(self.raw_file_object(file_path), *args, **kwargs)
 
     def raw_file_size(self, file_path: str) -> int:
         assert is_safe_relative_path(file_path)
         return self.raw_file_object(file_path).size
 
+    def raw_file_etag(self, file_path: str) -> str:
+        assert is_safe_relative_path(file_path)
+        try:
+            stat_result = os.stat(self.raw_file_object(file_path).os_path)
+        except FileNotFoundError:
+            raise KeyError(file_path)
+        return f'{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}'
+
     def raw_file_object(self, file_path: str) -> PathObject:
         assert is_safe_relative_path(file_path)
         return self._raw_dir.join_file(file_path)
@@ -826,14 +1490,13 @@ class StagingUploadFiles(UploadFiles):
             updated_files: Set[str] = None) -> None:
         '''
         Adds the file or folder specified by `path` to this upload, in the raw directory
-        specified by `target_dir`. If `path` denotes a zip or tar archive file, it will
-        first be extracted to a temporary directory. The file(s) are *merged* with the
+        specified by `target_dir`. If `path` denotes a zip or tar archive file, its
+        members are extracted directly into the raw directory. The file(s) are *merged* with the
         existing upload files, i.e. new files are added, replacing old files if there
         already exists file(s) by the same names, the rest of the old files are left
         untouched.
 
         Cleanup
-        The method is responsible for trying to clean up temporarily extracted files.
         If `cleanup_source_file_and_dir` is True, the source file (defined by `path`), and
         its parent directory (which we also assume is temporary) are also cleaned up.
         Note: the cleanup steps are always carried out, also if the operation fails.
@@ -850,74 +1513,103 @@ class StagingUploadFiles(UploadFiles):
             updated_files: An optional set of paths. If provided with the call, the raw
                 path of all files added or updated by the operation will be added to this set.
         '''
-        tmp_dir = None
         try:
             assert not self.is_frozen
             assert os.path.exists(path), f'{path} does not exist'
             assert is_safe_relative_path(target_dir)
+            self._invalidate_raw_directory_index()
             self._size += os.stat(path).st_size
 
             is_dir = os.path.isdir(path)
             decompress = auto_decompress(path)
-            if decompress:
-                tmp_dir = create_tmp_dir(self.upload_id + '_unzip')
-                if decompress == 'zip':
-                    with zipfile.ZipFile(path) as zf:
-                        zf.extractall(tmp_dir)
-                elif decompress == 'tar':
-                    with tarfile.open(path) as tf:
-                        tf.extractall(tmp_dir)
-                elif decompress == 'error':
-                    # Unknown / bad file format
-                    assert False, 'Cannot extract file. Bad file format or file extension?'
-
-            # Determine what to merge
-            elements_to_merge: Iterable[Tuple[str, List[str], List[str]]] = []
-            if is_dir:
-                # Directory
-                source_dir = path
-                elements_to_merge = os.walk(source_dir)
-            elif decompress:
-                # Zipped archive
-                source_dir = tmp_dir
-                elements_to_merge = os.walk(source_dir)
-            else:
-                # Single, non-compressed file
-                source_dir = os.path.dirname(path)
-                elements_to_merge = [(source_dir, [], [os.path.basename(path)])]
+            if decompress == 'error':
+                # Unknown / bad file format
+                assert False, 'Cannot extract file. Bad file format or file extension?'
 
             # Do the merge
+            created_dirs: List[str] = []
+            changed_files: List[Tuple[str, Optional[int], Optional[int]]] = []
             os_target_dir = os.path.join(self._raw_dir.os_path, target_dir)
             if not os.path.isdir(os_target_dir):
                 os.makedirs(os_target_dir)
-            for source_root, dirs, files in elements_to_merge:
-                elements = dirs + files
-                for element in elements:
-                    element_source_path = os.path.join(source_root, element)
-                    element_relative_path = os.path.relpath(element_source_path, source_dir)
-                    element_target_path = os.path.join(os_target_dir, element_relative_path)
-                    if os.path.islink(element_source_path):
-                        continue  # Skip links, could pose security risk
-                    if os.path.exists(element_target_path):
-                        if os.path.isfile(element_target_path) != os.path.isfile(element_source_path):
-                            assert False, f'Cannot merge a file with a directory or vice versa: {element_relative_path}'
-
-                    # Copy or move the element
-                    if os.path.isdir(element_source_path):
-                        # Directory - just create corresponding directory in the target if needed.
-                        if not os.path.exists(element_target_path):
-                            os.makedirs(element_target_path)
-                    else:
-                        # File - copy or move it
-                        if cleanup_source_file_and_dir or decompress:
-                            # Move the file
-                            shutil.move(element_source_path, element_target_path)
+                created_dirs.append(target_dir)
+
+            def merge_directory(element_relative_path: str):
+                # Directory - just create corresponding directory in the target if needed.
+                element_target_path = os.path.join(os_target_dir, element_relative_path)
+                if os.path.isdir(element_target_path):
+                    return
+                if os.path.exists(element_target_path):
+                    assert False, f'Cannot merge a file with a directory or vice versa: {element_relative_path}'
+                parent_relative_path = os.path.dirname(element_relative_path)
+                if parent_relative_path:
+                    merge_directory(parent_relative_path)
+                os.mkdir(element_target_path)
+                created_dirs.append(os.path.join(target_dir, element_relative_path))
+
+            def merge_file(element_relative_path: str, source: str, move: bool):
+                # File - copy or move it
+                element_target_path = os.path.join(os_target_dir, element_relative_path)
+                old_size = None
+                if os.path.exists(element_target_path):
+                    if not os.path.isfile(element_target_path):
+                        assert False, f'Cannot merge a file with a directory or vice versa: {element_relative_path}'
+                    old_size = os.stat(element_target_path).st_size
+                parent_relative_path = os.path.dirname(element_relative_path)
+                if parent_relative_path:
+                    merge_directory(parent_relative_path)
+
+                if move:
+                    shutil.move(source, element_target_path)
+                else:
+                    shutil.copyfile(source, element_target_path)
+
+                changed_files.append((
+                    os.path.join(target_dir, element_relative_path),
+                    old_size, os.stat(element_target_path).st_size))
+                if updated_files is not None:
+                    updated_files.add(os.path.join(target_dir, element_relative_path))
+
+            def merge_directory_tree(source_dir: str, move: bool):
+                for source_root, dirs, files in os.walk(source_dir):
+                    for element in dirs + files:
+                        element_source_path = os.path.join(source_root, element)
+                        element_relative_path = os.path.relpath(element_source_path, source_dir)
+                        if os.path.islink(element_source_path):
+                            continue  # Skip links, could pose security risk
+                        if os.path.isdir(element_source_path):
+                            merge_directory(element_relative_path)
                         else:
-                            # Copy the file
-                            shutil.copyfile(element_source_path, element_target_path)
-                        if updated_files is not None:
-                            updated_files.add(os.path.join(target_dir, element_relative_path))
+                            merge_file(element_relative_path, element_source_path, move=move)
+
+            if decompress:
+                # Zip or tar archive - archives can only be validated by reading them
+                # completely, e.g. zip file members are checked against their crc while
+                # they are read. We extract into a temporary sibling of the raw directory
+                # (i.e. on the same file system) and move the files, which only renames
+                # them. Corrupt archives leave the raw files untouched.
+                tmp_dir = os.path.join(self.os_path, f'.extract-{utils.create_uuid()}')
+                try:
+                    if decompress == 'zip':
+                        with zipfile.ZipFile(path) as archive:
+                            _extract_archive(archive, tmp_dir)
+                    else:
+                        with open(path, 'rb') as f:
+                            extract_tar_stream(f, tmp_dir)
+                    merge_directory_tree(tmp_dir, move=True)
+                finally:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+            elif is_dir:
+                # Directory
+                merge_directory_tree(path, move=cleanup_source_file_and_dir)
+            else:
+                # Single, non-compressed file
+                merge_file(os.path.basename(path), path, move=cleanup_source_file_and_dir)
+
+            self._update_raw_size_index(changed_files, created_dirs)
         except Exception:
+            # the raw size index might not reflect the partial changes
+            self._delete_raw_size_index()
             if cleanup_source_file_and_dir:
                 parent_dir = os.path.dirname(path)
                 if os.path.exists(parent_dir):
@@ -925,8 +1617,6 @@ class StagingUploadFiles(UploadFiles):
             raise
         finally:
             # Cleanup
-            if tmp_dir and os.path.exists(tmp_dir):
-                shutil.rmtree(tmp_dir)
             if cleanup_source_file_and_dir:
                 if os.path.exists(path):
                     if os.path.isdir(path):
@@ -939,6 +1629,7 @@ class StagingUploadFiles(UploadFiles):
 
     def delete_rawfiles(self, path, updated_files: Set[str] = None):
         assert is_safe_relative_path(path)
+        self._invalidate_raw_directory_index()
         raw_os_path = os.path.join(self.os_path, 'raw')
         os_path = os.path.join(raw_os_path, path)
         if not os.path.exists(os_path):
@@ -947,7 +1638,9 @@ class StagingUploadFiles(UploadFiles):
             # Deleting a file
             if updated_files is not None:
                 updated_files.add(path)
+            size = os.stat(os_path).st_size
             os.remove(os_path)
+            self._update_raw_size_index([(path, size, None)])
         else:
             # Deleting a directory
             if updated_files is not None:
@@ -957,6 +1650,7 @@ class StagingUploadFiles(UploadFiles):
                         file_raw_path = os.path.relpath(file_os_path, raw_os_path)
                         updated_files.add(file_raw_path)
             shutil.rmtree(os_path)
+            self._remove_directory_from_raw_size_index(path)
         if path == '':
             # Special case - deleting everything, i.e. the entire raw folder. Need to recreate.
             os.makedirs(os_path)
@@ -964,6 +1658,7 @@ class StagingUploadFiles(UploadFiles):
     def copy_or_move_rawfile(self, path_to_existing_file, path_to_target_file, copy_or_move, updated_files: Set[str] = None):
         assert is_safe_relative_path(path_to_existing_file)
         assert is_safe_relative_path(path_to_target_file)
+        self._invalidate_raw_directory_index()
         os_path_exisitng = os.path.join(self._raw_dir.os_path, path_to_existing_file)
         os_path_target = os.path.join(self._raw_dir.os_path, path_to_target_file)
         if not os.path.exists(os_path_exisitng):
@@ -972,10 +1667,14 @@ class StagingUploadFiles(UploadFiles):
             # copying or moving a file
             if os.path.exists(os_path_target):
                 raise ValueError('A file with the same name already exists.')
+            size = os.stat(os_path_exisitng).st_size
             if copy_or_move.lower() == 'copy':
                 shutil.copyfile(os_path_exisitng, os_path_target)
+                self._update_raw_size_index([(path_to_target_file, None, size)])
             elif copy_or_move.lower() == 'move':
                 shutil.move(os_path_exisitng, os_path_target)
+                self._update_raw_size_index([
+                    (path_to_existing_file, size, None), (path_to_target_file, None, size)])
 
             if updated_files is not None:
                 updated_files.add(path_to_target_file)
@@ -1099,23 +1798,34 @@ class StagingUploadFiles(UploadFiles):
     def _pack_raw_files(self, target_dir: DirectoryObject, access: str, other_access: str):
         try:
             raw_zip_file_object = PublicUploadFiles._create_raw_zip_file_object(target_dir, access)
-            with zipfile.ZipFile(raw_zip_file_object.os_path, mode='w') as raw_zip:
-                for path_info in self.raw_directory_list(recursive=True):
-                    basename = os.path.basename(path_info.path)
-                    if basename.startswith('POTCAR'):
-                        if not basename.endswith('.stripped'):
-                            continue  # Skip the unstripped POTCAR files when publishing
-                        if basename.endswith('.stripped.stripped'):
-                            continue  # Skip redundantly stripped POTCAR files (created due to bug #979) when publishing
-                    raw_zip.write(self._raw_dir.join_file(path_info.path).os_path, path_info.path)
+            with open(raw_zip_file_object.os_path, 'wb') as f:
+                zip_infos = _write_raw_zip(f, self._raw_files_to_pack())
+            _write_raw_zip_index(
+                PublicUploadFiles._create_raw_zip_index_file_object(target_dir, access).os_path,
+                raw_zip_file_object.os_path, zip_infos)
             # Remove the zip file with the opposite access, if it exists
             other_raw_zip_file_object = PublicUploadFiles._create_raw_zip_file_object(target_dir, other_access)
             if other_raw_zip_file_object.exists():
                 other_raw_zip_file_object.delete()  # This file should be empty, if it exists
+            other_raw_zip_index_file_object = PublicUploadFiles._create_raw_zip_index_file_object(
+                target_dir, other_access)
+            if other_raw_zip_index_file_object.exists():
+                other_raw_zip_index_file_object.delete()
         except Exception as e:
             self.logger.error('exception during packing raw files', exc_info=e)
             raise
 
+    def _raw_files_to_pack(self) -> Iterator[Tuple[str, str]]:
+        ''' Yields (path, os_path) of the raw files and directories that are published. '''
+        for path_info in self.raw_directory_list(recursive=True):
+            basename = os.path.basename(path_info.path)
+            if basename.startswith('POTCAR'):
+                if not basename.endswith('.stripped'):
+                    continue  # Skip the unstripped POTCAR files when publishing
+                if basename.endswith('.stripped.stripped'):
+                    continue  # Skip redundantly stripped POTCAR files (created due to bug #979) when publishing
+            yield path_info.path, self._raw_dir.join_file(path_info.path).os_path
+
     def entry_files(self, mainfile: str, with_mainfile: bool = True, with_cutoff: bool = True) -> Iterable[str]:
         '''
         Returns all the auxfiles and mainfile for a given mainfile. This implements
@@ -1135,10 +1845,9 @@ class StagingUploadFiles(UploadFiles):
 
         file_count = 0
         aux_files: List[str] = []
-        dir_elements = os.listdir(entry_dir)
-        dir_elements.sort()
-        for dir_element in dir_elements:
-            if dir_element != mainfile_basename and os.path.isfile(os.path.join(entry_dir, dir_element)):
+        dir_elements = self._raw_directory_elements(entry_relative_dir) or {}
+        for dir_element in sorted(dir_elements):
+            if dir_element != mainfile_basename and dir_elements[dir_element]:
                 aux_files.append(os.path.join(entry_relative_dir, dir_element))
                 file_count += 1
 
@@ -1155,27 +1864,6 @@ class StagingUploadFiles(UploadFiles):
         else:
             return aux_files
 
-    def entry_hash(self, mainfile: str, mainfile_key: str) -> str:
-        '''
-        Calculates a hash for the given entry based on file contents and aux file contents.
-        Arguments:
-            mainfile: The mainfile path relative to the upload that identifies the entry in
-                the folder structure.
-            mainfile_key: The mainfile_key of the entry (if any)
-        Returns:
-            The calculated hash
-        Raises:
-            KeyError: If the mainfile does not exist.
-        '''
-        hash = hashlib.sha512()
-        for filepath in self.entry_files(mainfile):
-            with open(self._raw_dir.join_file(filepath).os_path, 'rb') as f:
-                for data in iter(lambda: f.read(65536), b''):
-                    hash.update(data)
-        if mainfile_key:
-            hash.update(mainfile_key.encode('utf8'))
-        return utils.make_websave(hash)
-
     def files_to_bundle(self, export_settings: BundleExportSettings) -> Iterable[FileSource]:
         # Defines files for upload bundles of staging uploads.
         if export_settings.include_raw_files:
@@ -1195,6 +1883,269 @@ class StagingUploadFiles(UploadFiles):
             yield bundle_file_source.sub_source(bundle_info_filename)
 
 
+class _FileSegment(io.RawIOBase):
+    '''
+    A seekable, read-only file-like for a segment of a file, e.g. the data of an
+    uncompressed zip file member.
+    '''
+    def __init__(self, os_path: str, offset: int, size: int):
+        super().__init__()
+        self._file = open(os_path, 'rb')
+        self._offset = offset
+        self._size = size
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), self._size - self._position)
+        if n <= 0:
+            return 0
+        self._file.seek(self._offset + self._position)
+        n = self._file.readinto(memoryview(b)[:n])
+        self._position += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        if offset < 0:
+            raise ValueError('negative seek position')
+        self._position = offset
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class _InflatedFileSegment(io.RawIOBase):
+    '''
+    A read-only file-like that inflates the raw deflate data of a compressed zip file
+    member from the given :class:`_FileSegment` and checks the member's crc. Seeking
+    forward inflates and skips the data in between, seeking backward starts again from
+    the beginning.
+    '''
+    chunk_size = 1024 * 1024
+
+    def __init__(self, segment: _FileSegment, info: zipfile.ZipInfo):
+        super().__init__()
+        self._segment = segment
+        self._info = info
+        self._start()
+
+    def _start(self):
+        self._segment.seek(0)
+        self._decompressor = zlib.decompressobj(-15)
+        self._buffer = b''
+        self._eof = False
+        self._crc = 0
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def _inflate(self):
+        try:
+            data = self._decompressor.unconsumed_tail
+            if not data:
+                data = self._segment.read(self.chunk_size)
+            if data:
+                self._buffer = self._decompressor.decompress(data, self.chunk_size)
+            else:
+                self._buffer = self._decompressor.flush()
+                self._eof = True
+        except zlib.error as e:
+            raise zipfile.BadZipFile(f'Bad compressed data for {self._info.filename}') from e
+
+    def readinto(self, b):
+        while not self._buffer and not self._eof:
+            self._inflate()
+
+        n = min(len(b), len(self._buffer))
+        if n == 0:
+            if self._crc != self._info.CRC or self._position != self._info.file_size:
+                raise zipfile.BadZipFile(f'Bad CRC-32 for file {self._info.filename}')
+            return 0
+
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        self._crc = zlib.crc32(memoryview(b)[:n], self._crc)
+        self._position += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._info.file_size
+        if offset < 0:
+            raise ValueError('negative seek position')
+        if offset < self._position:
+            self._start()
+
+        buffer = bytearray(min(self.chunk_size, max(offset - self._position, 1)))
+        while self._position < offset:
+            view = memoryview(buffer)[:offset - self._position]
+            if self.readinto(view) == 0:
+                break
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        self._segment.close()
+        super().close()
+
+
+def _zip_member_data_offset(os_path: str, info: zipfile.ZipInfo) -> int:
+    ''' Returns the position of the given zip file member's data in the zip file. '''
+    with open(os_path, 'rb') as f:
+        f.seek(info.header_offset)
+        header = f.read(_zip_file_header_size)
+    if len(header) != _zip_file_header_size or header[:4] != _zip_file_header_signature:
+        raise zipfile.BadZipFile(f'Bad local file header for {info.filename}')
+    name_length, extra_length = struct.unpack(_zip_file_header_struct, header)[-2:]
+    return info.header_offset + _zip_file_header_size + name_length + extra_length
+
+
+_raw_zip_index_version = 1
+_raw_zip_index_lock = threading.Lock()
+_raw_zip_indexes: LRUCache = None
+
+
+class _RawZipIndex(NamedTuple):
+    '''
+    The content of a raw zip file as loaded from its index file: the
+    :class:`RawPathInfo` of all directory elements by directory path and the zip infos
+    of all files by path.
+    '''
+    directories: Dict[str, Dict[str, RawPathInfo]]
+    files: Dict[str, zipfile.ZipInfo]
+
+
+def _get_raw_zip_indexes() -> LRUCache:
+    global _raw_zip_indexes
+
+    cache_size = config.process.raw_zip_index_size
+    if not cache_size:
+        return None
+
+    if _raw_zip_indexes is None or _raw_zip_indexes.maxsize != cache_size:
+        _raw_zip_indexes = LRUCache(maxsize=cache_size)
+    return _raw_zip_indexes
+
+
+def _zip_file_end(os_path: str) -> str:
+    ''' The end of central directory record of a zip file (without comment) as hex string. '''
+    with open(os_path, 'rb') as f:
+        f.seek(0, io.SEEK_END)
+        f.seek(max(f.tell() - _zip_end_of_central_directory_size, 0))
+        return f.read().hex()
+
+
+def _write_raw_zip_index(os_path: str, zip_os_path: str, zip_infos: Iterable[zipfile.ZipInfo]):
+    '''
+    Writes the index file for a raw zip file. The index contains the size of all
+    directories and the position, size, compression, and crc of all files. This
+    allows to list and read the raw files without parsing the zip file's central
+    directory.
+    '''
+    files: List[list] = []
+    directory_sizes: Dict[str, int] = {'': 0}
+    for info in zip_infos:
+        path = info.filename.rstrip('/')
+        if info.is_dir():
+            for ancestor in _raw_directory_ancestors(path, include_self=True):
+                directory_sizes.setdefault(ancestor, 0)
+            continue
+
+        files.append([
+            info.filename, info.header_offset, info.file_size, info.compress_size,
+            info.compress_type, info.CRC])
+        for ancestor in _raw_directory_ancestors(path):
+            directory_sizes[ancestor] = directory_sizes.get(ancestor, 0) + info.file_size
+
+    index = dict(
+        version=_raw_zip_index_version, zip_end=_zip_file_end(zip_os_path),
+        directories=directory_sizes, files=files)
+    # write to a temporary file first, other processes might read concurrently
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os_path), suffix='.tmp')
+    with os.fdopen(fd, 'wt') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp_path, os_path)
+
+
+def _read_raw_zip_index(os_path: str, zip_os_path: str, access: str) -> Optional[_RawZipIndex]:
+    '''
+    Returns the content of the raw zip file from its index file, or None if there is
+    no index file or the index does not belong to the zip file. Loaded indexes are kept
+    in a per process cache (``config.process.raw_zip_index_size``). The returned
+    index is shared and must not be modified.
+    '''
+    try:
+        index_stat = os.stat(os_path)
+        zip_stat = os.stat(zip_os_path)
+    except OSError:
+        return None
+
+    version = (
+        index_stat.st_ino, index_stat.st_mtime_ns, index_stat.st_size,
+        zip_stat.st_ino, zip_stat.st_mtime_ns, zip_stat.st_size, access)
+    indexes = _get_raw_zip_indexes()
+    if indexes is not None:
+        with _raw_zip_index_lock:
+            cached = indexes.get(os_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    try:
+        with open(os_path, 'rt') as f:
+            data = json.load(f)
+        if data.get('version') != _raw_zip_index_version or data['zip_end'] != _zip_file_end(zip_os_path):
+            return None
+
+        directories: Dict[str, Dict[str, RawPathInfo]] = {path: {} for path in data['directories']}
+        for path, size in data['directories'].items():
+            if path:
+                directories[os.path.dirname(path)][os.path.basename(path)] = RawPathInfo(
+                    path=path, is_file=False, size=size, access=access)
+
+        files: Dict[str, zipfile.ZipInfo] = {}
+        for path, header_offset, file_size, compress_size, compress_type, crc in data['files']:
+            info = zipfile.ZipInfo(path)
+            info.header_offset = header_offset
+            info.file_size = file_size
+            info.compress_size = compress_size
+            info.compress_type = compress_type
+            info.CRC = crc
+            files[path] = info
+            directories[os.path.dirname(path)][os.path.basename(path)] = RawPathInfo(
+                path=path, is_file=True, size=file_size, access=access)
+    except Exception as e:
+        utils.get_logger(__name__).warning('could not read raw zip index', exc_info=e, path=os_path)
+        return None
+
+    index = _RawZipIndex(directories=directories, files=files)
+    if indexes is not None:
+        with _raw_zip_index_lock:
+            indexes[os_path] = (version, index)
+    return index
+
+
 class PublicUploadFiles(UploadFiles):
 
     def __init__(self, upload_id: str, create: bool = False):
@@ -1202,6 +2153,8 @@ class PublicUploadFiles(UploadFiles):
         self._directories: Dict[str, Dict[str, RawPathInfo]] = None
         self._raw_zip_file_object: PathObject = None
         self._raw_zip_file: zipfile.ZipFile = None
+        self._raw_zip_index: Optional[_RawZipIndex] = None
+        self._raw_zip_index_loaded: bool = False
         self._archive_msg_file_object: PathObject = None
         self._archive_msg_file: ArchiveReader = None
         self._access: str = None
@@ -1282,6 +2235,70 @@ class PublicUploadFiles(UploadFiles):
 
         return self._raw_zip_file
 
+    @staticmethod
+    def _create_raw_zip_index_file_object(target_dir: DirectoryObject, access: str) -> PathObject:
+        return target_dir.join_file(f'raw-{access}.index.json')
+
+    def raw_zip_index_file_object(self) -> PathObject:
+        '''
+        Gets the index file of the raw zip file, either public or restricted, depending
+        on which one is used. The index file might not exist, e.g. for uploads that were
+        packed by older versions.
+        '''
+        self.access  # Invoke to initialize
+        return PublicUploadFiles._create_raw_zip_index_file_object(self, self._access)
+
+    def _open_raw_zip_index(self) -> Optional[_RawZipIndex]:
+        '''
+        Returns the content of the raw zip file from its index file, or None if there
+        is no valid index and the zip file's central directory has to be used.
+        '''
+        if not self._raw_zip_index_loaded:
+            self._raw_zip_index = _read_raw_zip_index(
+                self.raw_zip_index_file_object().os_path, self.raw_zip_file_object().os_path,
+                self.access)
+            self._raw_zip_index_loaded = True
+        return self._raw_zip_index
+
+    def update_raw_zip_index(self):
+        '''
+        Creates the index file of the raw zip file from the zip file's central directory,
+        e.g. for uploads that were packed without index.
+        '''
+        raw_zip_file_object = self.raw_zip_file_object()
+        if not raw_zip_file_object.exists():
+            return
+        with zipfile.ZipFile(raw_zip_file_object.os_path) as zf:
+            _write_raw_zip_index(
+                self.raw_zip_index_file_object().os_path, raw_zip_file_object.os_path, zf.infolist())
+        self._raw_zip_index = None
+        self._raw_zip_index_loaded = False
+
+    def _raw_zip_info(self, file_path: str) -> zipfile.ZipInfo:
+        ''' Returns the zip info of the given raw file, raises KeyError if it does not exist. '''
+        index = self._open_raw_zip_index()
+        if index is not None:
+            return index.files[file_path]
+        try:
+            return self._open_raw_zip_file().getinfo(file_path)
+        except FileNotFoundError:
+            raise KeyError(file_path)
+
+    def _open_raw_zip_member(self, info: zipfile.ZipInfo) -> BinaryIO:
+        '''
+        Opens a raw zip file member by reading its data directly from the zip file. This
+        does not require the zip file's central directory and allows to seek
+        uncompressed members efficiently. Compressed members are inflated with zlib.
+        '''
+        os_path = self.raw_zip_file_object().os_path
+        segment = _FileSegment(os_path, _zip_member_data_offset(os_path, info), info.compress_size)
+        if info.compress_type == zipfile.ZIP_STORED:
+            return cast(BinaryIO, io.BufferedReader(segment))
+        if info.compress_type == zipfile.ZIP_DEFLATED:
+            return cast(BinaryIO, io.BufferedReader(_InflatedFileSegment(segment, info)))
+        segment.close()
+        raise NotImplementedError(f'Unsupported compression for {info.filename}')
+
     @property
     def missing_raw_files(self):
         if self._missing_raw_files is None:
@@ -1347,6 +2364,11 @@ class PublicUploadFiles(UploadFiles):
         faster future access.
         '''
         if self._directories is None:
+            index = self._open_raw_zip_index()
+            if index is not None:
+                self._directories = index.directories
+                return
+
             self._directories = dict()
             self._directories[''] = {}  # Root folder
             directory_sizes: Dict[str, int] = {}
@@ -1451,8 +2473,11 @@ class PublicUploadFiles(UploadFiles):
         mode = mode if mode else 'rb'
 
         try:
-            zf = self._open_raw_zip_file()
-            f = zf.open(file_path, 'r', **kwargs)
+            info = self._raw_zip_info(file_path)
+            if info.is_dir() or kwargs:
+                f = self._open_raw_zip_file().open(info, 'r', **kwargs)
+            else:
+                f = self._open_raw_zip_member(info)
             if 't' in mode:
                 return io.TextIOWrapper(f)
             else:
@@ -1468,16 +2493,31 @@ class PublicUploadFiles(UploadFiles):
 
     def raw_file_size(self, file_path: str) -> int:
         assert is_safe_relative_path(file_path)
-        try:
-            zf = self._open_raw_zip_file()
-            info = zf.getinfo(file_path)
-            return info.file_size
-        except FileNotFoundError:
-            pass
-        except KeyError:
-            pass
+        return self._raw_zip_info(file_path).file_size
 
-        raise KeyError(file_path)
+    def raw_file_etag(self, file_path: str) -> str:
+        assert is_safe_relative_path(file_path)
+        info = self._raw_zip_info(file_path)
+        return f'{info.file_size:x}-{info.CRC:08x}'
+
+    def entry_files(self, mainfile: str, with_mainfile: bool = True, with_cutoff: bool = True) -> Iterable[str]:
+        if not self.raw_path_is_file(mainfile):
+            raise KeyError(mainfile)
+
+        mainfile_basename = os.path.basename(mainfile)
+        aux_files: List[str] = []
+        for path_info in self.raw_directory_list(os.path.dirname(mainfile), files_only=True):
+            if os.path.basename(path_info.path) != mainfile_basename:
+                aux_files.append(path_info.path)
+
+            if with_cutoff and len(aux_files) > config.process.auxfile_cutoff:
+                # Same logic as for staging uploads, see StagingUploadFiles.entry_files
+                break
+
+        if with_mainfile:
+            return [mainfile] + aux_files
+        else:
+            return aux_files
 
     def read_archive(self, entry_id: str, use_blocked_toc: bool = True) -> Any:
         try:
@@ -1515,10 +2555,16 @@ class PublicUploadFiles(UploadFiles):
             if raw_zip_file_object_new.exists():
                 raw_zip_file_object_new.delete()  # We have checked that the file is empty anyway
             os.rename(raw_zip_file_object.os_path, raw_zip_file_object_new.os_path)
+        raw_zip_index_file_object = self.raw_zip_index_file_object()
+        raw_zip_index_file_object_new = PublicUploadFiles._create_raw_zip_index_file_object(self, new_access)
+        if raw_zip_index_file_object.exists():
+            os.replace(raw_zip_index_file_object.os_path, raw_zip_index_file_object_new.os_path)
 
         # Clear the cached values
         self._access = None
         self._raw_zip_file = self._raw_zip_file_object = None
+        self._raw_zip_index = self._directories = None
+        self._raw_zip_index_loaded = False
         self._archive_msg_file = self._archive_msg_file_object = None
 
     def files_to_bundle(self, export_settings: BundleExportSettings) -> Iterable[FileSource]:
@@ -23,9 +23,14 @@ is run once for each *api* and *worker* process. Individual functions for partia
 exist to facilitate testing, aspects of :py:mod:`nomad.cli`, etc.
 '''
 
+from typing import Any, Dict, Iterable
 import os.path
 import os
 import shutil
+import hashlib
+import threading
+import time
+from cachetools import TTLCache
 from elasticsearch_dsl import connections
 from mongoengine import connect, disconnect
 from mongoengine.connection import ConnectionFailure
@@ -116,6 +121,8 @@ class Keycloak():
     def __init__(self):
         self.__oidc_client = None
         self.__public_keys = None
+        self.__token_cache_lock = threading.Lock()
+        self.__token_cache: TTLCache = None
 
     @property
     def _oidc_client(self):
@@ -167,7 +174,7 @@ class Keycloak():
     def decode_access_token(self, access_token: str) -> dict:
         try:
             kid = jwt.get_unverified_header(access_token)['kid']
-            key = keycloak._public_keys.get(kid)
+            key = self._public_keys.get(kid)
             if key is None:
                 logger.error('The user provided keycloak public key does not exist. Does the UI use the right realm?')
                 raise KeycloakError(utils.strip('''
@@ -183,6 +190,37 @@ class Keycloak():
         except jwt.InvalidTokenError:
             raise KeycloakError('Could not validate credentials. The given token is invalid.')
 
+    def _get_token_cache(self) -> TTLCache:
+        cache_size = config.keycloak.token_cache_size
+        if not cache_size:
+            return None
+
+        if self.__token_cache is None or self.__token_cache.maxsize != cache_size or \
+                self.__token_cache.ttl != config.keycloak.token_cache_ttl:
+            self.__token_cache = TTLCache(maxsize=cache_size, ttl=config.keycloak.token_cache_ttl)
+        return self.__token_cache
+
+    def _verified_token_payload(self, access_token: str) -> dict:
+        '''
+        Decodes and verifies the given access token like :func:`decode_access_token`.
+        Verified payloads are cached (``config.keycloak.token_cache_size``), but never
+        longer than the token's expiry. The returned dict must not be modified.
+        '''
+        with self.__token_cache_lock:
+            cache = self._get_token_cache()
+            key = hashlib.sha256(access_token.encode('utf-8')).digest()
+            payload = cache.get(key) if cache is not None else None
+        if cache is None:
+            return self.decode_access_token(access_token)
+        if payload is not None and payload['exp'] > time.time():
+            return payload
+
+        payload = self.decode_access_token(access_token)
+        if isinstance(payload.get('exp'), (int, float)):
+            with self.__token_cache_lock:
+                cache[key] = payload
+        return payload
+
     def tokenauth(self, access_token: str) -> object:
         '''
         Authenticates the given access_token
@@ -191,7 +229,7 @@ class Keycloak():
             The user
         '''
         try:
-            payload = self.decode_access_token(access_token)
+            payload = self._verified_token_payload(access_token)
 
             user_id: str = payload.get('sub')
             if user_id is None:
@@ -235,6 +273,22 @@ class UserManagement():
         '''
         raise NotImplementedError()
 
+    def get_users(self, user_ids: Iterable[str]) -> Dict[str, Any]:
+        '''
+        Retrieves the users for all the given user_ids. Returns a dict with the user_ids as
+        keys. User_ids of users that do not exist are omitted. Implementations should
+        retrieve all users with as few requests as possible.
+        '''
+        users = {}
+        for user_id in user_ids:
+            try:
+                user = self.get_user(user_id=user_id)
+            except KeyError:
+                continue
+            if user is not None:
+                users[user_id] = user
+        return users
+
 
 class OasisUserManagement(UserManagement):
     def __init__(self, users_api_url: str = None):
@@ -284,10 +338,29 @@ class OasisUserManagement(UserManagement):
 
         return self.__user_from_api_user(data['data'][0])
 
+    def get_users(self, user_ids: Iterable[str]) -> Dict[str, Any]:
+        import requests
+
+        user_ids = list(user_ids)
+        users = {}
+        # limit the number of ids per request to keep the URLs reasonably short
+        for i in range(0, len(user_ids), 100):
+            response = requests.get(self._users_api_url, params=dict(user_id=user_ids[i:i + 100]))
+            if response.status_code != 200:
+                raise KeycloakError('Could not request central nomad\'s user management.')
+
+            for api_user in response.json()['data']:
+                user = self.__user_from_api_user(api_user)
+                users[user.user_id] = user
+
+        return users
+
 
 class KeycloakUserManagement(UserManagement):
     def __init__(self):
         self.__admin_client = None
+        self.__admin_client_lock = threading.Lock()
+        self.__admin_token_expires = 0.
 
     def __create_username(self, user):
         if user.first_name is not None and user.last_name is not None:
@@ -449,17 +522,38 @@ class KeycloakUserManagement(UserManagement):
 
     @property
     def _admin_client(self):
-        if True:  # TODO (self.__admin_client is None:), client becomes unusable after 60s
-            self.__admin_client = KeycloakAdmin(
-                server_url=config.keycloak.server_url,
-                username=config.keycloak.username,
-                password=config.keycloak.password,
-                realm_name=config.keycloak.realm_name,
-                verify=True)
-            self.__admin_client.realm_name = config.keycloak.realm_name
+        '''
+        The keycloak admin client. The client is reused and refreshes its access token
+        before it expires (and on authorization errors). Only if refreshing fails, a
+        new client with a new login is created.
+        '''
+        with self.__admin_client_lock:
+            if self.__admin_client is not None and time.time() > self.__admin_token_expires:
+                try:
+                    self.__admin_client.refresh_token()
+                    self.__admin_token_expires = self.__token_expires(self.__admin_client.token)
+                except Exception as e:
+                    logger.warning('could not refresh the keycloak admin token', exc_info=e)
+                    self.__admin_client = None
+
+            if self.__admin_client is None:
+                self.__admin_client = KeycloakAdmin(
+                    server_url=config.keycloak.server_url,
+                    username=config.keycloak.username,
+                    password=config.keycloak.password,
+                    realm_name=config.keycloak.realm_name,
+                    verify=True,
+                    auto_refresh_token=['get', 'put', 'post', 'delete'])
+                self.__admin_client.realm_name = config.keycloak.realm_name
+                self.__admin_token_expires = self.__token_expires(self.__admin_client.token)
 
         return self.__admin_client
 
+    @staticmethod
+    def __token_expires(token: dict) -> float:
+        # refresh a bit before the token actually expires
+        return time.time() + token.get('expires_in', 60) - 10
+
 
 user_management: UserManagement
 if config.oasis.uses_central_user_management:
@@ -149,6 +149,7 @@ sub-sections as if they were direct sub-sections.
 .. autofunction:: index_entry
 .. autofunction:: index_entries
 .. autofunction:: create_indices
+.. autofunction:: index_generation
 
 
 .. autoclass:: Elasticsearch
@@ -161,6 +162,7 @@ from typing import Union, Any, Dict, cast, Set, List, Callable, Tuple, DefaultDi
 from collections import defaultdict
 import numpy as np
 import re
+import threading
 
 from nomad import config, utils
 
@@ -428,6 +430,25 @@ class DocumentType():
         return self.name
 
 
+_index_generation_lock = threading.Lock()
+_index_generation = 0
+
+
+def index_generation() -> int:
+    '''
+    Returns a number that is incremented whenever this process modifies or refreshes
+    one of the indices. Search results that were cached with an older generation might
+    be outdated.
+    '''
+    return _index_generation
+
+
+def bump_index_generation():
+    global _index_generation
+    with _index_generation_lock:
+        _index_generation += 1
+
+
 class Index():
     '''
     Allows to access an Elasticsearch index. It forwards method calls to Python's
@@ -453,6 +474,8 @@ class Index():
             kwargs['index'] = self.index_name
 
         results = getattr(self.elastic_client, name)(*args, **kwargs)
+        if name in ['index', 'bulk']:
+            bump_index_generation()
         return results
 
     @property
@@ -505,9 +528,11 @@ class Index():
     def delete(self):
         if self.elastic_client.indices.exists(index=self.index_name):
             self.elastic_client.indices.delete(index=self.index_name)
+        bump_index_generation()
 
     def refresh(self):
         self.elastic_client.indices.refresh(index=self.index_name)
+        bump_index_generation()
 
 
 # TODO type 'doc' because it's the default used by elasticsearch_dsl and the v0 entries index.
@@ -575,7 +575,10 @@ class Reference(DataType):
                 definition, definition_id = f'{url.archive_url}#{url.fragment}'.split('@')
                 return context.resolve_section_definition(definition, definition_id).m_def
 
-            context_section = context.resolve_archive_url(url.archive_url)
+            context_section = context.resolve_archive_url_for_fragment(url.archive_url, url.fragment)
+
+        elif context_section is not None and isinstance(context_section.m_context, Context):
+            context_section.m_context.load_fragment(context_section, url.fragment)
 
         return self.resolve_fragment(context_section, url.fragment)
 
@@ -952,6 +955,22 @@ class Context:
         '''
         raise NotImplementedError()
 
+    def resolve_archive_url_for_fragment(self, url: str, fragment: str) -> MSection:
+        '''
+        Like :func:`resolve_archive_url`, but the given fragment is the only part of the
+        archive that needs to be resolved. Contexts can use this to only load the necessary
+        parts of an archive. By default, the whole archive is resolved.
+        '''
+        return self.resolve_archive_url(url)
+
+    def load_fragment(self, root: MSection, fragment: str):
+        '''
+        Called before the given fragment is resolved within the given root section, e.g.
+        for references within an archive. Contexts that only load parts of an archive can
+        use this to load the parts that are needed. By default, nothing is done.
+        '''
+        pass
+
     def resolve_archive(self, *args, **kwargs):
         return self.resolve_archive_url(*args, **kwargs)
 
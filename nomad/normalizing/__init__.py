@@ -36,7 +36,10 @@ There is one ABC for all normalizer:
     :members:
 '''
 
-from typing import List, Any, Iterable, Type
+from typing import List, Any, Iterable, Type, Optional
+import os
+
+from nomad import config, utils
 
 from .system import SystemNormalizer
 from .optimade import OptimadeNormalizer
@@ -58,3 +61,44 @@ normalizers: Iterable[Type[Normalizer]] = [
     ResultsNormalizer,
     MetainfoNormalizer
 ]
+
+
+# Modules outside of this package that determine the normalization results
+_normalizer_modules = [
+    'nomad.atomutils', 'nomad.datamodel.results', 'nomad.datamodel.datamodel',
+    'nomad.datamodel.metainfo', 'nomad.metainfo']
+
+# The distributions used by the normalizers, their versions affect the normalization results
+_normalizer_dependencies = ['matid', 'nomad_dos_fingerprints']
+
+# Normalize settings that only affect the performance or the deployment, but not the
+# normalization results. The content of the springer database is versioned separately.
+_normalizer_performance_settings = {
+    'springer_db_path', 'symmetry_cache_size', 'symmetry_cache_path',
+    'parallel_workers', 'parallel_min_tasks'}
+
+
+def _springer_db_version() -> Optional[str]:
+    ''' The path, size, and modification time of the used springer database. '''
+    path = config.normalize.springer_db_path
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def normalizers_version() -> str:
+    '''
+    A version of the set of normalizers. It is used to decide if entries have to be
+    reprocessed. This is a hash of the nomad version, the source code of this package,
+    the source code of the modules and the versions of the distributions used by the
+    normalizers, the springer database, and the normalize configuration that affects
+    the results.
+    '''
+    return utils.hash(
+        config.meta.version,
+        utils.source_code_hash(__name__),
+        *[utils.source_code_hash(module_name) for module_name in _normalizer_modules],
+        *[utils.package_version(package_name) for package_name in _normalizer_dependencies],
+        _springer_db_version(),
+        config.normalize.dict(exclude=_normalizer_performance_settings))
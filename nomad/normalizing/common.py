@@ -15,9 +15,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import os
+import copy
+import hashlib
+import hmac
+import pickle
+import tempfile
+import threading
 import numpy as np
 from ase import Atoms
-from typing import List, Set, Any, Optional
+from typing import List, Set, Any, Optional, cast
+from cachetools import LRUCache
 from nptyping import NDArray
 from matid import SymmetryAnalyzer  # pylint: disable=import-error
 from matid.symmetry.wyckoffset import WyckoffSet as WyckoffSetMatID  # pylint: disable=import-error
@@ -36,6 +44,167 @@ from nomad.datamodel.results import (
 )
 
 
+_symmetry_analyzer_cache_lock = threading.Lock()
+_symmetry_analyzer_cache: Optional[LRUCache] = None
+
+
+def symmetry_fingerprint(system: Atoms, *args, **kwargs) -> str:
+    '''
+    Returns a fingerprint of the given structure and the given symmetry analysis
+    arguments. Structures with the same fingerprint have the same cell, positions
+    (up to 1e-8 Å), atomic numbers, and periodicity and thus the same symmetry.
+    '''
+    def rounded(array):
+        # adding 0.0 turns -0.0 into 0.0
+        return (np.round(np.asarray(array, dtype=np.float64), 8) + 0.0).tobytes()
+
+    fingerprint = hashlib.sha1()
+    fingerprint.update(rounded(system.get_cell()))
+    fingerprint.update(rounded(system.get_positions()))
+    fingerprint.update(np.asarray(system.get_atomic_numbers(), dtype=np.int64).tobytes())
+    fingerprint.update(np.asarray(system.get_pbc(), dtype=bool).tobytes())
+    fingerprint.update(repr((args, sorted(kwargs.items()))).encode())
+    return fingerprint.hexdigest()
+
+
+def _warm_symmetry_analyzer(symmetry_analyzer: SymmetryAnalyzer) -> bool:
+    '''
+    Runs all analyses that the normalizers use, so that a stored analyzer carries the
+    results. Returns False if any of them fails.
+    '''
+    try:
+        symmetry_analyzer.get_space_group_number()
+        symmetry_analyzer.get_space_group_international_short()
+        symmetry_analyzer.get_hall_number()
+        symmetry_analyzer.get_point_group()
+        symmetry_analyzer.get_crystal_system()
+        symmetry_analyzer.get_bravais_lattice()
+        symmetry_analyzer.get_conventional_system()
+        symmetry_analyzer.get_primitive_system()
+        symmetry_analyzer.get_wyckoff_letters_original()
+        symmetry_analyzer.get_wyckoff_letters_primitive()
+        symmetry_analyzer.get_wyckoff_letters_conventional()
+        symmetry_analyzer.get_wyckoff_sets_conventional(return_parameters=True)
+        symmetry_analyzer.get_equivalent_atoms_original()
+        symmetry_analyzer.get_equivalent_atoms_primitive()
+        symmetry_analyzer.get_equivalent_atoms_conventional()
+    except Exception:
+        return False
+    return True
+
+
+class _SharedSymmetryAnalyzer:
+    '''
+    Wraps a cached SymmetryAnalyzer that is shared between entries. All results are
+    returned as copies, because callers modify them, e.g. set the periodicity of the
+    conventional and primitive systems.
+    '''
+    def __init__(self, symmetry_analyzer: SymmetryAnalyzer):
+        self._symmetry_analyzer = symmetry_analyzer
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        attribute = getattr(self._symmetry_analyzer, name)
+        if not callable(attribute):
+            return copy.deepcopy(attribute)
+
+        def method(*args, **kwargs):
+            return copy.deepcopy(attribute(*args, **kwargs))
+
+        return method
+
+
+def _symmetry_cache_file(fingerprint: str) -> str:
+    return os.path.join(
+        config.normalize.symmetry_cache_path, fingerprint[:2], f'{fingerprint}.pickle')
+
+
+def _symmetry_cache_signature(fingerprint: str, data: bytes) -> bytes:
+    '''
+    The signature of a stored analyzer. Only files signed with this installation's
+    secret are unpickled.
+    '''
+    return hmac.new(
+        config.services.api_secret.encode('utf-8'), fingerprint.encode('utf-8') + data,
+        hashlib.sha256).digest()
+
+
+def _load_symmetry_analyzer(fingerprint: str) -> Optional[SymmetryAnalyzer]:
+    try:
+        with open(_symmetry_cache_file(fingerprint), 'rb') as f:
+            signature = f.read(hashlib.sha256().digest_size)
+            data = f.read()
+    except Exception:
+        return None
+
+    if not hmac.compare_digest(signature, _symmetry_cache_signature(fingerprint, data)):
+        return None
+
+    try:
+        return pickle.loads(data)
+    except Exception:
+        return None
+
+
+def _store_symmetry_analyzer(fingerprint: str, symmetry_analyzer: SymmetryAnalyzer):
+    path = _symmetry_cache_file(fingerprint)
+    try:
+        data = pickle.dumps(symmetry_analyzer)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to a temporary file first, other processes might read concurrently
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_symmetry_cache_signature(fingerprint, data))
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        pass
+
+
+def get_symmetry_analyzer(system: Atoms, *args, **kwargs) -> SymmetryAnalyzer:
+    '''
+    Returns a MatID SymmetryAnalyzer for the given structure. All arguments are passed
+    to the SymmetryAnalyzer constructor. Analyzers are cached by the
+    :func:`symmetry_fingerprint` of the structure and arguments: in memory per
+    process (``config.normalize.symmetry_cache_size``) and optionally on disk
+    (``config.normalize.symmetry_cache_path``). Entries with the same structure, e.g.
+    in convergence studies, reuse the conventional and primitive cells, Wyckoff sets,
+    and other results of the first analysis. Cached analyzers return copies of their
+    results. Files in the disk cache are signed with ``config.services.api_secret``
+    and only loaded if the signature is valid.
+    '''
+    global _symmetry_analyzer_cache
+
+    cache_size = config.normalize.symmetry_cache_size
+    cache_path = config.normalize.symmetry_cache_path
+    if not cache_size and not cache_path:
+        return SymmetryAnalyzer(system, *args, **kwargs)
+
+    fingerprint = symmetry_fingerprint(system, *args, **kwargs)
+
+    if cache_size:
+        with _symmetry_analyzer_cache_lock:
+            if _symmetry_analyzer_cache is None or _symmetry_analyzer_cache.maxsize != cache_size:
+                _symmetry_analyzer_cache = LRUCache(maxsize=cache_size)
+            symmetry_analyzer = _symmetry_analyzer_cache.get(fingerprint)
+        if symmetry_analyzer is not None:
+            return cast(SymmetryAnalyzer, _SharedSymmetryAnalyzer(symmetry_analyzer))
+
+    symmetry_analyzer = _load_symmetry_analyzer(fingerprint) if cache_path else None
+    if symmetry_analyzer is None:
+        symmetry_analyzer = SymmetryAnalyzer(system, *args, **kwargs)
+        if cache_path and _warm_symmetry_analyzer(symmetry_analyzer):
+            _store_symmetry_analyzer(fingerprint, symmetry_analyzer)
+
+    if cache_size:
+        with _symmetry_analyzer_cache_lock:
+            _symmetry_analyzer_cache[fingerprint] = symmetry_analyzer
+
+    return cast(SymmetryAnalyzer, _SharedSymmetryAnalyzer(symmetry_analyzer))
+
+
 def wyckoff_sets_from_matid(wyckoff_sets: List[WyckoffSetMatID]) -> List[WyckoffSet]:
     '''Given a dictionary of wyckoff sets, returns the metainfo equivalent.
 
@@ -348,7 +517,7 @@ def structures_2d(original_atoms, logger=None):
         # for SymmetryAnalyzer to use the symmetry analysis designed for 2D
         # systems.
         symm_system.set_pbc(periodicity)
-        symmetry_analyzer = SymmetryAnalyzer(
+        symmetry_analyzer = get_symmetry_analyzer(
             symm_system,
             config.normalize.symmetry_tolerance,
             config.normalize.flat_dim_threshold
@@ -24,7 +24,19 @@ from nomad_dos_fingerprints import DOSFingerprint  # pylint: disable=import-erro
 from nomad.datamodel.metainfo.simulation.calculation import (
     Dos, DosFingerprint, BandGap)
 
-from .normalizer import Normalizer
+from .normalizer import Normalizer, parallel_map
+
+
+def calculate_dos_fingerprint(energies: NDArray, values: NDArray):
+    '''
+    Calculates the fingerprint of a DOS with energies relative to the highest occupied
+    state. Returns the exception instead of raising it, so that it can be reported in
+    the processing process.
+    '''
+    try:
+        return DOSFingerprint().calculate(energies, values)
+    except Exception as e:
+        return e
 
 
 class DosNormalizer(Normalizer):
@@ -48,6 +60,10 @@ class DosNormalizer(Normalizer):
         if calculations is None:
             return
 
+        # The fingerprints are independent of each other and are calculated after all
+        # DOS are normalized, potentially in parallel.
+        fingerprint_tasks = []
+
         for calc in calculations:
             # Normalize electronic DOS
             dos_electronic = calc.dos_electronic
@@ -66,7 +82,7 @@ class DosNormalizer(Normalizer):
                     dos_values = [dos_total.value.magnitude for dos_total in dos.total]
                     self.add_energy_references(dos, energy_fermi, energy_highest, energy_lowest, dos_values)
 
-                    # Calculate the DOS fingerprint for successfully normalized DOS
+                    # Determine the energy reference for the DOS fingerprint
                     normalization_reference = None
                     for info in dos.band_gap:
                         energy_highest = info.energy_highest_occupied
@@ -77,21 +93,7 @@ class DosNormalizer(Normalizer):
                                 normalization_reference = max(normalization_reference, energy_highest)
                     if normalization_reference is not None:
                         dos_energies_normalized = dos.energies - normalization_reference
-
-                        try:
-                            dos_fingerprint = DOSFingerprint().calculate(
-                                dos_energies_normalized.magnitude,
-                                dos_values
-                            )
-                        except Exception as e:
-                            self.logger.error('could not generate dos fingerprint', exc_info=e)
-                        else:
-                            sec_dos_fingerprint = dos.m_create(DosFingerprint)
-                            sec_dos_fingerprint.bins = dos_fingerprint.bins
-                            sec_dos_fingerprint.indices = dos_fingerprint.indices
-                            sec_dos_fingerprint.stepsize = dos_fingerprint.stepsize
-                            sec_dos_fingerprint.grid_id = dos_fingerprint.grid_id
-                            sec_dos_fingerprint.filling_factor = dos_fingerprint.filling_factor
+                        fingerprint_tasks.append((dos, dos_energies_normalized.magnitude, dos_values))
 
             # Normalize phonon DOS
             dos_phonons = calc.dos_phonon
@@ -99,6 +101,23 @@ class DosNormalizer(Normalizer):
                 for dos_phonon in dos_phonons:
                     self.add_phononic_normalization_factor(calc, dos_phonon)
 
+        # Calculate the DOS fingerprint for successfully normalized DOS
+        with parallel_map(len(fingerprint_tasks)) as map_function:
+            fingerprints = (map_function or map)(
+                calculate_dos_fingerprint,
+                [energies for _, energies, _ in fingerprint_tasks],
+                [values for _, _, values in fingerprint_tasks])
+            for (dos, _, _), dos_fingerprint in zip(fingerprint_tasks, fingerprints):
+                if isinstance(dos_fingerprint, Exception):
+                    self.logger.error('could not generate dos fingerprint', exc_info=dos_fingerprint)
+                    continue
+                sec_dos_fingerprint = dos.m_create(DosFingerprint)
+                sec_dos_fingerprint.bins = dos_fingerprint.bins
+                sec_dos_fingerprint.indices = dos_fingerprint.indices
+                sec_dos_fingerprint.stepsize = dos_fingerprint.stepsize
+                sec_dos_fingerprint.grid_id = dos_fingerprint.grid_id
+                sec_dos_fingerprint.filling_factor = dos_fingerprint.filling_factor
+
     def add_electronic_normalization_factor(self, calc, dos):
         """Returns a factor that returns a size intensive electronic DOS.
         The values are divided by integral(DOS, lowest state, Fermi energy), or likewise sum(<atomic numbers>)."""
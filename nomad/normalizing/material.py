@@ -39,7 +39,7 @@ from nomad.units import ureg
 from nomad.normalizing.common import (
     cell_from_ase_atoms,
     cell_from_structure,
-    nomad_atoms_from_ase_atoms, structures_2d
+    nomad_atoms_from_ase_atoms, structures_2d, get_symmetry_analyzer
 )
 
 
@@ -749,7 +749,7 @@ class MaterialNormalizer():
             largest_region_system = regions[largest_region_index].cell
 
             # TODO: only SymmetryAnalyzer for 2D and surface
-            symm = SymmetryAnalyzer(largest_region_system)
+            symm = get_symmetry_analyzer(largest_region_system)
             cluster_symmetries += [symm]
         return cluster_indices_list, cluster_symmetries
 
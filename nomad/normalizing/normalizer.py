@@ -17,13 +17,104 @@
 #
 
 from abc import ABCMeta, abstractmethod
-from typing import List
+from typing import List, Callable, Iterator, Optional, Tuple
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import math
+import multiprocessing
+import os
+import threading
 
-from nomad.utils import get_logger
+from nomad import config
+from nomad.utils import get_logger, create_process_pool
 from nomad.metainfo import MSection
 from nomad.datamodel import EntryArchive
 
 
+_executor_lock = threading.Lock()
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_key: Optional[Tuple[int, int]] = None
+_executor_unavailable = False
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    '''
+    Returns the process pool for parallel normalization. The pool is created once per
+    process and reused for all entries. Returns None within daemonic processes (e.g.
+    celery workers), which cannot have child processes, or if no pool can be created.
+    Both is only detected once per process.
+    '''
+    global _executor, _executor_key, _executor_unavailable
+
+    n_workers = config.normalize.parallel_workers
+    if not n_workers or n_workers < 2:
+        return None
+
+    with _executor_lock:
+        if _executor_unavailable:
+            return None
+
+        # pools are not inherited by forked processes
+        key = (os.getpid(), n_workers)
+        if _executor is not None and _executor_key == key:
+            return _executor
+        if _executor is not None and _executor_key[0] == key[0]:
+            _executor.shutdown(wait=False)
+        _executor, _executor_key = None, None
+
+        if multiprocessing.current_process().daemon:
+            _executor_unavailable = True
+            return None
+
+        _executor = create_process_pool(n_workers)
+        if _executor is None:
+            _executor_unavailable = True
+            return None
+        _executor_key = key
+        return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor):
+    ''' Removes a broken pool, the next entry creates a new one. '''
+    global _executor, _executor_key
+
+    with _executor_lock:
+        if _executor is executor:
+            _executor, _executor_key = None, None
+    executor.shutdown(wait=False)
+
+
+@contextmanager
+def parallel_map(n_tasks: int) -> Iterator[Optional[Callable]]:
+    '''
+    A context manager that provides a map function that runs independent tasks of a
+    single entry in the process pool with ``config.normalize.parallel_workers``
+    processes. The pool is shared by all entries of a process. Yields None, if there
+    are less than ``config.normalize.parallel_min_tasks`` tasks, parallel normalization
+    is disabled, or no pool can be created (e.g. within daemonic processes). Functions
+    and arguments have to be picklable. The results are returned in the order of the
+    arguments, which keeps the merged archive deterministic.
+    '''
+    executor = None
+    if n_tasks >= max(config.normalize.parallel_min_tasks, 2):
+        executor = _get_executor()
+    if executor is None:
+        yield None
+        return
+
+    chunksize = max(1, math.ceil(n_tasks / (config.normalize.parallel_workers * 4)))
+
+    def map_function(function, *iterables):
+        try:
+            yield from executor.map(function, *iterables, chunksize=chunksize)
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            raise
+
+    yield map_function
+
+
 class Normalizer(metaclass=ABCMeta):
     '''
     A base class for normalizers. Normalizers work on a :class:`EntryArchive` section
@@ -79,6 +170,15 @@ class SystemBasedNormalizer(Normalizer, metaclass=ABCMeta):
     def _normalize_system(self, system, is_representative):
         return self.normalize_system(system, is_representative)
 
+    def prepare_systems(self, systems: List[MSection], map_function: Callable) -> None:
+        '''
+        Called with all non representative systems before they are normalized, if
+        they are normalized in parallel. Sub-classes can use the given map function
+        (see :func:`parallel_map`) to compute independent per system results in other
+        processes and use them in :func:`normalize_system`.
+        '''
+        pass
+
     @abstractmethod
     def normalize_system(self, system: MSection, is_representative: bool) -> bool:
         ''' Normalize the given section and returns True, iff successful'''
@@ -180,6 +280,15 @@ class SystemBasedNormalizer(Normalizer, metaclass=ABCMeta):
 
         # All the rest if requested
         if not self.only_representatives:
-            for isys, system in enumerate(self.section_run.system):
-                if isys != repr_sys_idx:
-                    self.__normalize_system(system, False, logger)
+            systems = [
+                system for isys, system in enumerate(self.section_run.system)
+                if isys != repr_sys_idx]
+            with parallel_map(len(systems)) as map_function:
+                if map_function is not None:
+                    try:
+                        self.prepare_systems(systems, map_function)
+                    except Exception as e:
+                        self.logger.warning(
+                            'could not prepare systems in parallel', exc_info=e)
+            for system in systems:
+                self.__normalize_system(system, False, logger)
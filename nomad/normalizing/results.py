@@ -21,7 +21,6 @@ from nomad.datamodel.metainfo.workflow import Workflow
 import numpy as np
 from typing import List, Union, Any, Set, Optional
 import ase.data
-from matid import SymmetryAnalyzer  # pylint: disable=import-error
 import matid.geometry  # pylint: disable=import-error
 
 from nomad import config
@@ -35,7 +34,8 @@ from nomad.datamodel.metainfo.simulation.system import System, Symmetry as Syste
 from nomad.normalizing.common import (
     structure_from_ase_atoms,
     structure_from_nomad_system,
-    structures_2d
+    structures_2d,
+    get_symmetry_analyzer
 )
 from nomad.datamodel.results import (
     BandGapElectronic,
@@ -840,7 +840,7 @@ class ResultsNormalizer(Normalizer):
             # First get a symmetry analyzer and the primitive system
             symm_system = original_atoms.copy()
             symm_system.set_pbc(True)
-            symmetry_analyzer = SymmetryAnalyzer(
+            symmetry_analyzer = get_symmetry_analyzer(
                 symm_system,
                 config.normalize.symmetry_tolerance,
                 config.normalize.flat_dim_threshold
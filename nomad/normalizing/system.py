@@ -16,14 +16,16 @@
 # limitations under the License.
 #
 
-from typing import Any, Dict
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 from nptyping import NDArray
 import ase
 from ase import Atoms
 import numpy as np
 import json
 import re
-from matid import SymmetryAnalyzer, Classifier  # pylint: disable=import-error
+from matid import Classifier  # pylint: disable=import-error
 from matid.classifications import Class0D, Atom, Class1D, Material2D, Surface, Class3D  # pylint: disable=import-error
 
 from nomad import atomutils, archive
@@ -34,6 +36,7 @@ from nomad.datamodel.metainfo.simulation.system import (
     Atoms, Symmetry, SpringerMaterial, Prototype)
 
 from .normalizer import SystemBasedNormalizer
+from .common import get_symmetry_analyzer
 
 # use a regular expression to check atom labels; expression is build from list of
 # all labels sorted desc to find Br and not B when searching for Br.
@@ -71,6 +74,59 @@ def formula_normalizer(atoms):
     return ''.join(atoms_normed)
 
 
+def system_properties(
+        atom_labels: List[str], pbc: List[bool], positions: NDArray = None,
+        lattice_vectors: NDArray = None, reciprocal_cell: bool = True) -> Dict[str, Any]:
+    '''
+    Computes the formulas, the configuration id, and (if `reciprocal_cell` is set)
+    the reciprocal lattice vectors of a system from its validated atom labels,
+    periodicity, positions (in m), and lattice vectors (in m). This function does not
+    depend on the archive and can be run in another process. Properties that cannot be
+    computed from the given values are omitted.
+    '''
+    atoms = ase.Atoms(symbols=atom_labels)
+    atoms.set_pbc(pbc)
+
+    result: Dict[str, Any] = {}
+    formula = Formula(atoms.get_chemical_formula())
+    result['chemical_composition'] = atoms.get_chemical_formula(mode='all')
+    result['chemical_composition_reduced'] = formula.format('reduced')
+    result['chemical_composition_hill'] = formula.format("hill")
+
+    if positions is None or len(positions) != len(atoms):
+        return result
+    try:
+        atoms.set_positions(1e10 * positions)
+        if lattice_vectors is not None:
+            atoms.set_cell(1e10 * lattice_vectors)
+    except Exception:
+        return result
+
+    if lattice_vectors is not None and reciprocal_cell:
+        result['lattice_vectors_reciprocal'] = 2 * np.pi * atomutils.reciprocal_cell(lattice_vectors)  # there is also a get_reciprocal_cell method in ase
+
+    configuration = [
+        atom_labels, atoms.positions.tolist(),
+        atoms.cell.tolist() if atoms.cell is not None else None,
+        atoms.pbc.tolist()]
+    result['configuration_raw_gid'] = utils.hash(json.dumps(configuration).encode('utf-8'))
+    return result
+
+
+def _array_equal(a, b) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    return np.array_equal(a, b)
+
+
+def _system_properties_from_args(args) -> Dict[str, Any]:
+    try:
+        return system_properties(*args)
+    except Exception:
+        # the system is normalized serially and errors are reported there
+        return None
+
+
 class SystemNormalizer(SystemBasedNormalizer):
     '''
     This normalizer performs all system (atoms, cells, etc.) related normalizations
@@ -88,6 +144,53 @@ class SystemNormalizer(SystemBasedNormalizer):
 
         return 0
 
+    @staticmethod
+    def _system_properties_args(system) -> Optional[Tuple]:
+        '''
+        Returns the arguments for :func:`system_properties` if they can be read from the
+        system without any fixes, otherwise None.
+        '''
+        atoms = system.atoms
+        if atoms is None or atoms.labels is None or atoms.periodic is None:
+            return None
+        atom_labels = normalized_atom_labels(atoms.labels)
+        positions = atoms.positions.magnitude if atoms.positions is not None else None
+        lattice_vectors = atoms.lattice_vectors.magnitude if atoms.lattice_vectors is not None else None
+        reciprocal_cell = atoms.lattice_vectors_reciprocal is None
+        return atom_labels, np.asarray(atoms.periodic).tolist(), positions, lattice_vectors, reciprocal_cell
+
+    def prepare_systems(self, systems, map_function) -> None:
+        self._prepared_system_properties: Dict[int, Tuple[Tuple, Dict[str, Any]]] = {}
+        prepared = []
+        for system in systems:
+            args = self._system_properties_args(system)
+            if args is not None:
+                prepared.append((system.m_parent_index, args))
+
+        results = map_function(_system_properties_from_args, [args for _, args in prepared])
+        for (index, args), result in zip(prepared, results):
+            self._prepared_system_properties[index] = (args, result)
+
+    def get_system_properties(
+            self, system, atom_labels: List[str], pbc: List[bool], positions: NDArray,
+            lattice_vectors: NDArray, reciprocal_cell: bool) -> Dict[str, Any]:
+        '''
+        Returns the result of :func:`system_properties` for the given values. Uses the
+        results computed by :func:`prepare_systems`, if they were computed from the
+        same values.
+        '''
+        prepared = getattr(self, '_prepared_system_properties', {}).pop(system.m_parent_index, None)
+        if prepared is not None:
+            (prepared_labels, prepared_pbc, prepared_positions, prepared_lattice_vectors,
+                prepared_reciprocal_cell), result = prepared
+            if result is not None and prepared_labels == atom_labels and prepared_pbc == pbc \
+                    and prepared_reciprocal_cell == reciprocal_cell \
+                    and _array_equal(prepared_positions, positions) \
+                    and _array_equal(prepared_lattice_vectors, lattice_vectors):
+                return result
+
+        return system_properties(atom_labels, pbc, positions, lattice_vectors, reciprocal_cell)
+
     def normalize_system(self, system, is_representative) -> bool:
         '''
         The 'main' method of this :class:`SystemBasedNormalizer`.
@@ -179,14 +282,26 @@ class SystemNormalizer(SystemBasedNormalizer):
                 'cannot use pbc with ase atoms', exc_info=e, pbc=pbc, error=str(e))
             return False
 
-        # formulas
-        formula = Formula(atoms.get_chemical_formula())
-        system.chemical_composition = atoms.get_chemical_formula(mode='all')
-        system.chemical_composition_reduced = formula.format('reduced')
-        system.chemical_composition_hill = formula.format("hill")
+        # formulas, configuration id, and reciprocal lattice vectors
+        atom_positions = get_value(Atoms.positions, numpy=True, source=system.atoms)
+        lattice_vectors = get_value(Atoms.lattice_vectors, numpy=True, source=system.atoms)
+        lattice_vectors_reciprocal = get_value(
+            Atoms.lattice_vectors_reciprocal, numpy=True, source=system.atoms)
+        try:
+            properties = self.get_system_properties(
+                system, atom_labels, pbc,
+                atom_positions.magnitude if atom_positions is not None else None,
+                lattice_vectors.magnitude if lattice_vectors is not None else None,
+                lattice_vectors_reciprocal is None)
+        except Exception as e:
+            self.logger.error(
+                'cannot compute system properties', exc_info=e, error=str(e))
+            return False
+        system.chemical_composition = properties['chemical_composition']
+        system.chemical_composition_reduced = properties['chemical_composition_reduced']
+        system.chemical_composition_hill = properties['chemical_composition_hill']
 
         # positions
-        atom_positions = get_value(Atoms.positions, numpy=True, source=system.atoms)
         if atom_positions is None:
             self.logger.warning('no atom positions, skip further system analysis')
             return False
@@ -203,7 +318,6 @@ class SystemNormalizer(SystemBasedNormalizer):
             return False
 
         # lattice vectors
-        lattice_vectors = get_value(Atoms.lattice_vectors, numpy=True, source=system.atoms)
         if lattice_vectors is None:
             if any(pbc):
                 self.logger.error('no lattice vectors but periodicity', pbc=pbc)
@@ -216,21 +330,14 @@ class SystemNormalizer(SystemBasedNormalizer):
                 return False
 
         # reciprocal lattice vectors
-        lattice_vectors_reciprocal = get_value(
-            Atoms.lattice_vectors_reciprocal, numpy=True, source=system.atoms)
         if lattice_vectors_reciprocal is None:
             if lattice_vectors is None:
                 self.logger.error('no lattice vectors, so no reciprocal lattice vectors')
             else:
-                system.atoms.lattice_vectors_reciprocal = 2 * np.pi * atomutils.reciprocal_cell(lattice_vectors.magnitude)  # there is also a get_reciprocal_cell method in ase
+                system.atoms.lattice_vectors_reciprocal = properties['lattice_vectors_reciprocal']
 
         # configuration
-        configuration = [
-            atom_labels, atoms.positions.tolist(),
-            atoms.cell.tolist() if atoms.cell is not None else None,
-            atoms.pbc.tolist()]
-        configuration_id = utils.hash(json.dumps(configuration).encode('utf-8'))
-        system.configuration_raw_gid = configuration_id
+        system.configuration_raw_gid = properties['configuration_raw_gid']
 
         if is_representative:
             # Save the Atoms as a temporary variable
@@ -304,7 +411,7 @@ class SystemNormalizer(SystemBasedNormalizer):
         '''
         # Try to use MatID's symmetry analyzer to analyze the ASE object.
         try:
-            symm = SymmetryAnalyzer(atoms, symmetry_tol=config.normalize.symmetry_tolerance)
+            symm = get_symmetry_analyzer(atoms, symmetry_tol=config.normalize.symmetry_tolerance)
 
             space_group_number = symm.get_space_group_number()
 
@@ -452,12 +559,57 @@ class SystemNormalizer(SystemBasedNormalizer):
                 sec_prototype.m_cache["strukturbericht_designation"] = aflow_strukturbericht_designation
 
 
+_springer_db_lock = threading.Lock()
+_springer_db: Optional[Tuple[int, str, archive.ArchiveReader]] = None
+
+
+def get_springer_db() -> Optional[archive.ArchiveReader]:
+    '''
+    Returns a reader for the Springer msgpack database at
+    ``config.normalize.springer_db_path``. The reader is opened once per process and
+    reused for all following queries. A reader inherited through ``fork`` is not
+    used; the child process opens its own, because a file object shared with the
+    parent would also share its file position.
+    '''
+    global _springer_db
+
+    path = config.normalize.springer_db_path
+    if path is None:
+        return None
+
+    pid = os.getpid()
+    with _springer_db_lock:
+        if _springer_db is not None:
+            db_pid, db_path, reader = _springer_db
+            if db_pid == pid and db_path == path and not reader.is_closed():
+                return reader
+            if db_pid == pid:
+                reader.close()
+
+        reader = archive.ArchiveReader(path)
+        _springer_db = (pid, path, reader)
+        return reader
+
+
+def close_springer_db():
+    ''' Closes the reader opened by :func:`get_springer_db` in this process. '''
+    global _springer_db
+
+    with _springer_db_lock:
+        if _springer_db is not None and _springer_db[0] == os.getpid():
+            _springer_db[2].close()
+        _springer_db = None
+
+
 def query_springer_data(normalized_formula: str, space_group_number: int) -> Dict[str, Any]:
     ''' Queries a msgpack database for springer-related quantities. '''
-    if config.normalize.springer_db_path is None:
+    reader = get_springer_db()
+    if reader is None:
         return {}
 
-    entries = archive.query_archive(config.normalize.springer_db_path, {str(space_group_number): {normalized_formula: '*'}})
+    # the reader reads from a shared file object with seek and read
+    with _springer_db_lock:
+        entries = archive.query_archive(reader, {str(space_group_number): {normalized_formula: '*'}})
     db_dict = {}
     entries = entries.get(str(space_group_number), {}).get(normalized_formula, {})
 
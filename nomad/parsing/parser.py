@@ -48,6 +48,29 @@ class ParserMetadata(BaseModel, use_enum_values=True, extra=Extra.allow):
     status: ParserStatus
 
 
+# The metainfo schemas and parser utilities that are used by all parsers
+_parser_common_modules = [
+    'nomad.parsing.file_parser', 'nomad.metainfo', 'nomad.datamodel.metainfo',
+    'nomad.datamodel.datamodel']
+
+
+@lru_cache(maxsize=None)
+def parser_code_version(module_name: str) -> str:
+    '''
+    A version of the code of a parser that is implemented in the given module. This is
+    a hash of the nomad version, the installed version and source code of the
+    top-level package that contains the module, and the source code of the modules that
+    are used by all parsers. For parsers within nomad, only the module itself is hashed
+    instead of its top-level package.
+    '''
+    package_name = module_name.split('.')[0]
+    return utils.hash(
+        config.meta.version,
+        utils.package_version(package_name),
+        utils.source_code_hash(module_name if package_name == 'nomad' else package_name),
+        *[utils.source_code_hash(common_module) for common_module in _parser_common_modules])
+
+
 class Parser(metaclass=ABCMeta):
     '''
     Instances specify a parser. It allows to find *main files* from  given uploaded
@@ -116,6 +139,15 @@ class Parser(metaclass=ABCMeta):
         '''
         pass
 
+    @property
+    def version(self) -> str:
+        '''
+        A version of the parser code. It is used to decide if entries processed with
+        this parser have to be reprocessed. By default, this is a hash of the
+        source code of the module that implements the parser.
+        '''
+        return parser_code_version(type(self).__module__)
+
     def after_normalization(self, archive: EntryArchive, logger=None) -> None:
         '''
         This is called after the archive produced by `parsed` has been normalized. This
@@ -404,6 +436,10 @@ class MatchingParserInterface(MatchingParser):
                 raise e
         return self._mainfile_parser
 
+    @property
+    def version(self) -> str:
+        return parser_code_version(self._parser_class_name.rsplit('.', 1)[0])
+
     def parse(self, mainfile: str, archive: EntryArchive, logger=None, child_archives=None):
         # TODO include child_archives in parse
         if child_archives:
@@ -17,7 +17,8 @@
 #
 
 import os.path
-from typing import Tuple, List, Dict
+import re
+from typing import Tuple, List, Dict, Optional
 from collections.abc import Iterable
 import pkgutil
 from pathlib import Path
@@ -26,7 +27,8 @@ from nomad import config
 from nomad.datamodel import EntryArchive, EntryMetadata, results
 from nomad.datamodel.context import Context, ClientContext
 
-from .parser import MissingParser, BrokenParser, Parser, ArchiveParser, MatchingParserInterface
+from .parser import (
+    MissingParser, BrokenParser, Parser, ArchiveParser, MatchingParser, MatchingParserInterface)
 from .artificial import EmptyParser, GenerateRandomParser, TemplateParser, ChaosParser
 from .tabular import TabularDataParser
 
@@ -50,6 +52,150 @@ try:
 except ImportError:
     pass
 
+try:
+    from re import _parser as sre_parse  # type: ignore
+except ImportError:  # python < 3.11
+    import sre_parse  # type: ignore
+
+_repeat_ops = tuple(
+    getattr(sre_parse, op) for op in ['MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT']
+    if hasattr(sre_parse, op))
+
+
+def _required_literals(parsed) -> List[str]:
+    literals: List[str] = []
+    current: List[str] = []
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+        if current:
+            literals.append(''.join(current))
+            current = []
+        if op is sre_parse.SUBPATTERN:
+            _, add_flags, _, sub_pattern = av
+            if not add_flags & re.IGNORECASE:
+                literals.extend(_required_literals(sub_pattern))
+        elif op in _repeat_ops:
+            min_repeat, _, sub_pattern = av
+            if min_repeat > 0:
+                literals.extend(_required_literals(sub_pattern))
+    if current:
+        literals.append(''.join(current))
+    return literals
+
+
+def required_literal(regex: Optional[re.Pattern]) -> Optional[str]:
+    '''
+    Returns the longest literal string that has to be contained in any string matched
+    by the given regular expression, or None if no such literal can be determined.
+    '''
+    if regex is None or not isinstance(regex.pattern, str) or regex.flags & re.IGNORECASE:
+        return None
+    try:
+        literals = _required_literals(sre_parse.parse(regex.pattern, regex.flags))
+    except Exception:
+        return None
+    return max(literals, key=len) if literals else None
+
+
+class ParserMatcher:
+    '''
+    A prefilter for the ordered list of parsers. For all parsers that rely on the
+    :class:`MatchingParser` criteria, the literals that are required by their
+    mainfile name and contents regular expressions, their binary header, and
+    supported compressions are compiled into one index. The distinct literals are
+    only tested once per file and only the remaining candidate parsers (in their
+    original order) need to run their full :func:`Parser.is_mainfile` checks.
+
+    Arguments:
+        parsers: The parsers in the order of their matching priority.
+    '''
+
+    # is_mainfile implementations that only match if the MatchingParser criteria match
+    prefilterable_is_mainfile = [
+        MatchingParser.is_mainfile,
+        MatchingParserInterface.is_mainfile,
+        TabularDataParser.is_mainfile]
+
+    def __init__(self, parsers: List[Parser]):
+        self.parsers = tuple(parsers)
+        self._criteria = [self._parser_criteria(parser) for parser in self.parsers]
+
+    def _parser_criteria(self, parser: Parser):
+        if type(parser).is_mainfile not in self.prefilterable_is_mainfile:
+            return None
+
+        parser_: MatchingParser = parser  # type: ignore
+        name_literal = None
+        if not parser_._mainfile_alternative:
+            name_literal = required_literal(parser_._mainfile_name_re)
+        return (
+            name_literal,
+            required_literal(parser_._mainfile_contents_re),
+            parser_._mainfile_contents_re is not None,
+            parser_._mainfile_binary_header,
+            parser_._supported_compressions)
+
+    def is_valid_for(self, parsers: List[Parser]) -> bool:
+        return self.parsers == tuple(parsers)
+
+    def candidates(
+            self, filename: str, buffer: bytes, decoded_buffer: Optional[str],
+            compression: str = None) -> List[Parser]:
+        '''
+        Returns the parsers that might match the given file in their priority order.
+        '''
+        name_literals: Dict[str, bool] = {}
+        content_literals: Dict[str, bool] = {}
+
+        result = []
+        for parser, criteria in zip(self.parsers, self._criteria):
+            if criteria is None:
+                result.append(parser)
+                continue
+
+            name_literal, content_literal, has_contents_re, binary_header, compressions = criteria
+            if compression is not None and compression not in compressions:
+                continue
+            if binary_header is not None and binary_header not in buffer:
+                continue
+            if has_contents_re:
+                if decoded_buffer is None:
+                    continue
+                if content_literal is not None:
+                    present = content_literals.get(content_literal)
+                    if present is None:
+                        present = content_literal in decoded_buffer
+                        content_literals[content_literal] = present
+                    if not present:
+                        continue
+            if name_literal is not None:
+                present = name_literals.get(name_literal)
+                if present is None:
+                    present = name_literal in filename
+                    name_literals[name_literal] = present
+                if not present:
+                    continue
+
+            result.append(parser)
+
+        return result
+
+
+_parser_matcher: ParserMatcher = None
+
+
+def get_parser_matcher(parsers_to_check: List[Parser]) -> ParserMatcher:
+    '''
+    Returns the :class:`ParserMatcher` for the given parsers. The matcher is reused
+    as long as the parsers do not change.
+    '''
+    global _parser_matcher
+    if _parser_matcher is None or not _parser_matcher.is_valid_for(parsers_to_check):
+        _parser_matcher = ParserMatcher(parsers_to_check)
+    return _parser_matcher
+
 
 def match_parser(mainfile_path: str, strict=True, parser_name: str = None) -> Tuple[Parser, List[str]]:
     '''
@@ -76,12 +222,12 @@ def match_parser(mainfile_path: str, strict=True, parser_name: str = None) -> Tu
         return None, None
 
     with open(mainfile_path, 'rb') as f:
-        compression, open_compressed = _compressions.get(f.read(3), (None, open))
-
-    with open_compressed(mainfile_path, 'rb') as cf:  # type: ignore
-        buffer = cf.read(config.process.parser_matching_size)
+        buffer = f.read(config.process.parser_matching_size)
 
-    mime_type = magic.from_buffer(buffer, mime=True)
+    compression, open_compressed = _compressions.get(buffer[:3], (None, None))
+    if open_compressed is not None:
+        with open_compressed(mainfile_path, 'rb') as cf:  # type: ignore
+            buffer = cf.read(config.process.parser_matching_size)
 
     decoded_buffer = None
     encoding = None
@@ -104,11 +250,18 @@ def match_parser(mainfile_path: str, strict=True, parser_name: str = None) -> Tu
         assert parser is not None, f'parser by the name `{parser_name}` does not exist'
         parsers_to_check = [parser]
     else:
-        parsers_to_check = parsers
-    for parser in parsers_to_check:
-        if strict and isinstance(parser, (MissingParser, EmptyParser)):
-            continue
+        parsers_to_check = get_parser_matcher(parsers).candidates(
+            mainfile_path, buffer, decoded_buffer, compression)
+    if strict:
+        parsers_to_check = [
+            parser for parser in parsers_to_check
+            if not isinstance(parser, (MissingParser, EmptyParser))]
+    if len(parsers_to_check) == 0:
+        return None, None
 
+    mime_type = magic.from_buffer(buffer, mime=True)
+
+    for parser in parsers_to_check:
         match_result = parser.is_mainfile(mainfile_path, mime_type, buffer, decoded_buffer, compression)
         if match_result:
             if isinstance(match_result, Iterable):
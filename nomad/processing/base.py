@@ -63,6 +63,14 @@ def setup(**kwargs):
     utils.get_logger(__name__).info(
         'celery configured with acks_late=%s' % str(config.celery.acks_late))
 
+    # open the springer db once per worker process instead of once per entry
+    if config.normalize.springer_db_path is not None:
+        try:
+            from nomad.normalizing.system import get_springer_db
+            get_springer_db()
+        except Exception as e:
+            utils.get_logger(__name__).warning('could not open springer db', exc_info=e)
+
 
 worker_hostname = None
 
@@ -79,6 +87,10 @@ def on_worker_process_shutdown(*args, **kwargs):
     from mongoengine.connection import disconnect
     disconnect()
 
+    if config.normalize.springer_db_path is not None:
+        from nomad.normalizing.system import close_springer_db
+        close_springer_db()
+
 
 app = Celery('nomad.processing', broker=config.rabbitmq_url())
 app.conf.update(worker_hijack_root_logger=False)
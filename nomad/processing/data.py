@@ -35,7 +35,10 @@ from mongoengine import (
 from pymongo import UpdateOne
 from structlog import wrap_logger
 from contextlib import contextmanager
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
 import copy
+import traceback
 import os.path
 from datetime import datetime
 import hashlib
@@ -55,7 +58,7 @@ from nomad.processing.base import (
     Proc, process, process_local, ProcessStatus, ProcessFailure, ProcessAlreadyRunning, worker_hostname)
 from nomad.parsing import Parser
 from nomad.parsing.parsers import parser_dict, match_parser
-from nomad.normalizing import normalizers
+from nomad.normalizing import normalizers, normalizers_version
 from nomad.datamodel import (
     EntryArchive, EntryMetadata, MongoUploadMetadata, MongoEntryMetadata, MongoSystemMetadata,
     EditableUserMetadata, AuthLevel, ServerContext)
@@ -108,6 +111,22 @@ _log_processors = [
     TimeStamper(fmt="%Y-%m-%d %H:%M.%S", utc=False)]
 
 
+def _match_parser_chunk(os_paths: List[str]) -> List[Tuple[Optional[str], Optional[List[str]], Optional[str]]]:
+    '''
+    Matches the given files in a matching process. Returns a tuple of the matched
+    parser's name, the mainfile keys, and a formatted exception (if the matching failed)
+    for each file.
+    '''
+    results: List[Tuple[Optional[str], Optional[List[str]], Optional[str]]] = []
+    for os_path in os_paths:
+        try:
+            parser, mainfile_keys = match_parser(os_path)
+            results.append((parser.name if parser is not None else None, mainfile_keys, None))
+        except Exception:
+            results.append((None, None, traceback.format_exc()))
+    return results
+
+
 def get_rfc3161_token(
         hash_string: str,
         server: Optional[str] = None,
@@ -688,6 +707,9 @@ class Entry(Proc):
         last_edit_time: the date and time the user metadata was last edited
         mainfile: the mainfile (including path in upload) that was used to create this entry
         parser_name: the name of the parser used to process this entry
+        parser_version: the version of the parser used for the last successful processing
+        normalizer_version: the version of the normalizers used for the last successful
+            processing
         pid: the legacy NOMAD pid of the entry
         external_id: a user provided external id. Usually the id for an entry in an
             external database where the data was imported from
@@ -708,6 +730,8 @@ class Entry(Proc):
     mainfile = StringField()
     mainfile_key = StringField()
     parser_name = StringField()
+    parser_version = StringField()
+    normalizer_version = StringField()
     pid = StringField()
     external_id = StringField()
     nomad_version = StringField()
@@ -743,6 +767,7 @@ class Entry(Proc):
         self._upload_files: StagingUploadFiles = None
         self._proc_logs: List[Any] = []
         self._child_entries: List['Entry'] = []
+        self._processed_versions: Tuple[str, str] = None
 
         self._entry_metadata: EntryMetadata = None
         self._perform_index = True
@@ -759,6 +784,33 @@ class Entry(Proc):
     def processed(self) -> bool:
         return self.process_status == ProcessStatus.SUCCESS
 
+    def reprocessing_reason(
+            self, parser: Parser, upload_files: UploadFiles,
+            check_entry_hash: bool = True) -> Optional[str]:
+        '''
+        Determines if this entry has to be reparsed with the given parser. Entries are
+        unchanged if they were processed successfully with the same parser and normalizer
+        versions and their files still have the same `entry_hash`.
+        Returns:
+            None if the entry is unchanged, otherwise a short reason.
+        '''
+        if self.process_status not in (ProcessStatus.SUCCESS, ProcessStatus.RUNNING):
+            return 'failed'
+        if self.parser_version is None or self.normalizer_version is None:
+            return 'not_recorded'
+        if self.parser_version != parser.version:
+            return 'parser_changed'
+        if self.normalizer_version != normalizers_version():
+            return 'normalizers_changed'
+        if check_entry_hash:
+            try:
+                entry_hash = upload_files.entry_hash(self.mainfile, self.mainfile_key)
+            except KeyError:
+                entry_hash = None
+            if entry_hash != self.entry_hash:
+                return 'files_changed'
+        return None
+
     @property
     def upload(self) -> 'Upload':
         if not self._upload:
@@ -1017,8 +1069,32 @@ class Entry(Proc):
                         'different parser matches during process, use new parser',
                         parser=parser.name)
                     self.parser_name = parser.name  # Parser renamed
+            elif settings.reprocess_only_changed_entries:
+                public_upload_files = PublicUploadFiles(self.upload_id)
+                try:
+                    reason = self.reprocessing_reason(parser, public_upload_files)
+                finally:
+                    public_upload_files.close()
+                if reason is None:
+                    logger.info('entry is unchanged, preserve entry data')
+                    should_parse = False
 
         if should_parse:
+            if self.upload.published and self.upload.extract_raw_files_on_demand():
+                self.set_last_status_message('Extracting raw files')
+                public_upload_files = PublicUploadFiles(self.upload_id)
+                try:
+                    with utils.timer(logger, 'entry raw files extracted'):
+                        self.upload_files.extract_raw_directory(
+                            public_upload_files, os.path.dirname(self.mainfile))
+                finally:
+                    public_upload_files.close()
+
+            # The versions are only recorded once processing succeeds, see on_success
+            for entry in self._main_and_child_entries():
+                entry.parser_version = None
+                entry.normalizer_version = None
+
             self.set_last_status_message('Initializing metadata')
             for entry in self._main_and_child_entries():
                 entry._initialize_metadata_for_processing()
@@ -1028,10 +1104,14 @@ class Entry(Proc):
                     'This entry has many aux files in its directory. '
                     'Have you placed many mainfiles in the same directory?')
 
-            self.parsing()
-            for entry in self._main_and_child_entries():
-                entry.normalizing()
-                entry.archiving()
+            try:
+                self.parsing()
+                for entry in self._main_and_child_entries():
+                    entry.normalizing()
+                    entry.archiving()
+            finally:
+                # close the files of other uploads that were opened to resolve references
+                self.upload.archive_context.close()
 
         elif self.upload.published:
             self.set_last_status_message('Preserving entry data')
@@ -1050,6 +1130,9 @@ class Entry(Proc):
             yield child_entry
 
     def on_success(self):
+        if self._processed_versions:
+            for entry in self._main_and_child_entries():
+                entry.parser_version, entry.normalizer_version = self._processed_versions
         # Mark any child entries as successfully completed (necessary because the child entries
         # are not processed the normal way)
         for child_entry in self._child_entries:
@@ -1135,6 +1218,7 @@ class Entry(Proc):
         context = dict(step=self.parser_name)
         logger = self.get_logger(**context)
         parser = parser_dict[self.parser_name]
+        self._processed_versions = (parser.version, normalizers_version())
 
         with utils.timer(logger, 'parser executed', input_size=self.mainfile_file.size):
             if not config.process.reuse_parser:
@@ -1690,6 +1774,62 @@ class Upload(Proc):
     def staging_upload_files(self) -> StagingUploadFiles:
         return self.upload_files.to_staging_upload_files()
 
+    def extract_raw_files_on_demand(self) -> bool:
+        '''
+        If the raw files of this published upload are extracted to the staging area
+        per reprocessed entry directory, instead of all at once. See
+        ``config.reprocess.extract_raw_files_on_demand``.
+        '''
+        settings = config.reprocess.customize(self.reprocess_settings)
+        return self.published and settings.extract_raw_files_on_demand and not settings.rematch_published
+
+    def plan_reprocessing(
+            self, reprocess_settings: Dict[str, Any] = None,
+            check_entry_hashes: bool = True) -> Dict[str, int]:
+        '''
+        Determines, without processing anything, how many of the existing entries would be
+        reparsed when reprocessing this upload with ``reprocess_only_changed_entries``.
+        The entries of staging uploads are always reparsed. For rematched published
+        uploads, the entries' current parsers are assumed.
+
+        Arguments:
+            reprocess_settings: Optional reprocess settings, defaults to the upload's
+                settings and `config.reprocess`.
+            check_entry_hashes: If the entry files are hashed to detect changed files.
+                This reads all raw files of the entries.
+
+        Returns:
+            A dictionary with the number of `total`, `unchanged`, and `reprocessed`
+            entries and the number of reprocessed entries per reason.
+        '''
+        settings = config.reprocess.customize(self.reprocess_settings).customize(reprocess_settings or {})
+        entries = Entry.objects(upload_id=self.upload_id, mainfile_key=None)
+        report: Dict[str, int] = dict(total=0, unchanged=0, reprocessed=0)
+        upload_files = self.upload_files
+        try:
+            for entry in entries:
+                report['total'] += 1
+                if not self.published:
+                    reason = 'staging'
+                elif not settings.reprocess_existing_entries:
+                    reason = None
+                elif entry.parser_name not in parser_dict:
+                    reason = 'parser_changed'
+                else:
+                    reason = entry.reprocessing_reason(
+                        parser_dict[entry.parser_name], upload_files,
+                        check_entry_hash=check_entry_hashes)
+
+                if reason is None:
+                    report['unchanged'] += 1
+                else:
+                    report['reprocessed'] += 1
+                    report[reason] = report.get(reason, 0) + 1
+        finally:
+            upload_files.close()
+
+        return report
+
     @classmethod
     def _passes_process_filter(cls, mainfile: str, path_filter: str, updated_files: Set[str]) -> bool:
         if path_filter:
@@ -1717,8 +1857,12 @@ class Upload(Proc):
             # staging area.
             self.set_last_status_message('Refreshing staging files')
             self._cleanup_staging_files()
-            with utils.timer(logger, 'upload extracted'):
-                self.upload_files.to_staging_upload_files(create=True)
+            if self.extract_raw_files_on_demand():
+                # The entries' raw files are extracted when the entries are processed
+                StagingUploadFiles(self.upload_id, create=True)
+            else:
+                with utils.timer(logger, 'upload extracted'):
+                    self.upload_files.to_staging_upload_files(create=True)
         elif not StagingUploadFiles.exists_for(self.upload_id):
             # Create staging files
             self.set_last_status_message('Creating staging files')
@@ -1809,28 +1953,131 @@ class Upload(Proc):
             # Scan everything
             scan = [('', True)]
 
-        for path, recursive in scan:
-            path_infos: Iterable[RawPathInfo] = (
-                [RawPathInfo(path=path, is_file=True, size=None, access=None)] if staging_upload_files.raw_path_is_file(path)
-                else staging_upload_files.raw_directory_list(path, recursive, files_only=True))
+        def paths_to_match():
+            for path, recursive in scan:
+                path_infos: Iterable[RawPathInfo] = (
+                    [RawPathInfo(path=path, is_file=True, size=None, access=None)] if staging_upload_files.raw_path_is_file(path)
+                    else staging_upload_files.raw_directory_list(path, recursive, files_only=True))
 
-            for path_info in path_infos:
-                self._preprocess_files(path_info.path)
+                for path_info in path_infos:
+                    self._preprocess_files(path_info.path)
 
-                if skip_matching and path_info.path not in entries_metadata:
-                    continue
+                    if skip_matching and path_info.path not in entries_metadata:
+                        continue
+
+                    yield path_info.path
 
+        # only whole directories or many updated files are worth matching in parallel
+        parallel = any(recursive for _, recursive in scan) or len(scan) >= config.process.match_chunk_size
+        for path, parser, mainfile_keys in self._match_files(paths_to_match(), parallel=parallel):
+            mainfile_keys_including_main_entry: List[str] = [None] + (mainfile_keys or [])  # type: ignore
+            for mainfile_key in mainfile_keys_including_main_entry:
+                yield path, mainfile_key, parser
+
+    def _match_files(
+            self, paths: Iterable[str], parallel: bool = True) -> Iterator[Tuple[str, Parser, List[str]]]:
+        '''
+        Matches the given raw files with parsers. If ``parallel`` and
+        ``config.process.match_workers`` are set, the files are matched in chunks by a
+        pool of processes while the given paths are still consumed. The results are
+        yielded in the order of the given paths.
+
+        Returns:
+            Tuples of (path, parser, mainfile_keys) for all matched files.
+        '''
+        logger = self.get_logger()
+        staging_upload_files = self.staging_upload_files
+
+        def match_serially(paths_to_match: Iterable[str]):
+            for path in paths_to_match:
                 try:
                     parser, mainfile_keys = match_parser(
-                        staging_upload_files.raw_file_object(path_info.path).os_path)
-                    if parser is not None:
-                        mainfile_keys_including_main_entry: List[str] = [None] + (mainfile_keys or [])  # type: ignore
-                        for mainfile_key in mainfile_keys_including_main_entry:
-                            yield path_info.path, mainfile_key, parser
+                        staging_upload_files.raw_file_object(path).os_path)
                 except Exception as e:
-                    self.get_logger().error(
-                        'exception while matching pot. mainfile',
-                        mainfile=path_info.path, exc_info=e)
+                    logger.error(
+                        'exception while matching pot. mainfile', mainfile=path, exc_info=e)
+                    continue
+                if parser is not None:
+                    yield path, parser, mainfile_keys
+
+        executor = utils.create_process_pool(config.process.match_workers, logger) if parallel else None
+        if executor is None:
+            yield from match_serially(paths)
+            return
+
+        # the matching processes return parser names, we resolve them with the parsers
+        # that match_parser uses
+        parsers_by_name: Dict[str, Parser] = {}
+        for parser in parsing.parsers.parsers:
+            parsers_by_name.setdefault(parser.name, parser)
+
+        max_pending_chunks = config.process.match_workers * 2
+        pending_chunks: deque = deque()
+        n_checked_files = 0
+
+        def shutdown_broken_pool(e: Exception):
+            # e.g. a worker process was killed, all pending and future chunks are
+            # matched by this process
+            nonlocal executor
+            if executor is not None:
+                logger.warning('process pool for matching is broken, match serially', exc_info=e)
+                executor.shutdown(wait=False)
+                executor = None
+
+        def chunk_results():
+            nonlocal n_checked_files
+            chunk, future = pending_chunks.popleft()
+            results = None
+            if future is not None:
+                try:
+                    results = future.result()
+                except BrokenProcessPool as e:
+                    shutdown_broken_pool(e)
+
+            if results is None:
+                yield from match_serially(chunk)
+            else:
+                for path, (parser_name, mainfile_keys, error) in zip(chunk, results):
+                    if error is not None:
+                        logger.error(
+                            'exception while matching pot. mainfile', mainfile=path, exception=error)
+                    elif parser_name is not None:
+                        yield path, parsers_by_name[parser_name], mainfile_keys
+
+            n_checked_files += len(chunk)
+            logger.info('checked files for matching', count=n_checked_files)
+            if self.process_running:
+                self.set_last_status_message(f'Matching ({n_checked_files} files checked)')
+
+        def submit(chunk):
+            future = None
+            if executor is not None:
+                os_paths = [staging_upload_files.raw_file_object(path).os_path for path in chunk]
+                try:
+                    future = executor.submit(_match_parser_chunk, os_paths)
+                except BrokenProcessPool as e:
+                    shutdown_broken_pool(e)
+            pending_chunks.append((chunk, future))
+
+        try:
+            chunk: List[str] = []
+            for path in paths:
+                chunk.append(path)
+                if len(chunk) >= config.process.match_chunk_size:
+                    submit(chunk)
+                    chunk = []
+                    if len(pending_chunks) > max_pending_chunks:
+                        yield from chunk_results()
+            if chunk:
+                submit(chunk)
+            while pending_chunks:
+                yield from chunk_results()
+        finally:
+            for _, future in pending_chunks:
+                if future is not None:
+                    future.cancel()
+            if executor is not None:
+                executor.shutdown()
 
     def match_all(self, reprocess_settings: config.Reprocess, path_filter: str = None, updated_files: Set[str] = None):
         '''
@@ -2066,6 +2313,14 @@ class Upload(Proc):
                 self.last_update = datetime.utcnow()
                 self.save()
 
+        if not self.published:
+            # parsers and the matching might have modified raw files
+            try:
+                with utils.timer(logger, 'raw directory sizes indexed'):
+                    self.staging_upload_files.update_raw_size_index()
+            except Exception as e:
+                logger.warning('could not index raw directory sizes', exc_info=e)
+
         with self.entries_metadata() as entries:
             with utils.timer(logger, 'upload entries and materials indexed'):
                 archives = [entry.m_parent for entry in entries]
@@ -35,12 +35,16 @@ partially implemented.
 from typing import Union, List, Tuple, Iterable, Any, cast, Dict, Iterator, Generator, Callable
 import math
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 import elasticsearch.helpers
 from elasticsearch.exceptions import TransportError, RequestError
-from elasticsearch_dsl import Q, A, Search
+from elasticsearch_dsl import Q, A, Search, MultiSearch
+from elasticsearch_dsl.response import Response
 from elasticsearch_dsl.query import Query as EsQuery
 from pydantic.error_wrappers import ErrorWrapper
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
+from cachetools import TTLCache
 
 from nomad import config, infrastructure, utils
 from nomad import datamodel
@@ -57,7 +61,8 @@ from nomad.app.v1.models import (
 from nomad.metainfo.elasticsearch_extension import (
     index_entries, entry_type, entry_index, DocumentType,
     material_type, entry_type, material_entry_type,
-    entry_index, Index, DocumentType, SearchQuantity, update_materials)
+    entry_index, Index, DocumentType, SearchQuantity, update_materials,
+    index_generation, bump_index_generation)
 
 
 def update_by_query(
@@ -104,6 +109,7 @@ def update_by_query(
             es_info=json.dumps(e.info, indent=2))
         raise SearchError(e)
 
+    bump_index_generation()
     if refresh:
         _refresh()
 
@@ -139,6 +145,7 @@ def delete_by_query(
             es_info=json.dumps(e.info, indent=2))
         raise SearchError(e)
 
+    bump_index_generation()
     if refresh:
         _refresh()
 
@@ -162,6 +169,8 @@ def refresh():
             es_info=json.dumps(e.info, indent=2))
         raise SearchError(e)
 
+    bump_index_generation()
+
 
 _refresh = refresh
 
@@ -178,6 +187,13 @@ def index(
     if not isinstance(entries, list):
         entries = [entries]
 
+    try:
+        # resolve the users of all entries at once, instead of one by one per entry
+        datamodel.prefetch_users(
+            entry.metadata for entry in entries if entry.metadata is not None)
+    except Exception as e:
+        utils.get_logger(__name__).warning('could not prefetch users', exc_info=e)
+
     errors = index_entries(entries, refresh=refresh or update_materials)
     if update_materials:
         index_materials(entries, refresh=refresh)
@@ -236,6 +252,7 @@ def update_metadata(
     _, failed = elasticsearch.helpers.bulk(
         infrastructure.elastic_client, updates, stats_only=True)
     failed = cast(int, failed)
+    bump_index_generation()
 
     if update_materials:
         # TODO update the matrials index at least for v1
@@ -1035,49 +1052,42 @@ def _and_clauses(query: Query) -> Generator[Query, None, None]:
     yield query
 
 
+def _histogram_requests(aggregations: Dict[str, Aggregation]) -> Dict[str, HistogramAggregation]:
+    '''
+    Returns the histogram aggregations that are determined by the number of buckets
+    and require to query the min/max values first.
+    '''
+    histogram_requests: Dict[str, HistogramAggregation] = {}
+    aggs = {name: _specific_agg(agg) for name, agg in aggregations.items()}
+    for agg_name, agg in aggs.items():
+        if isinstance(agg, HistogramAggregation):
+            buckets = agg.buckets
+            # When buckets have been defined, but no explicit limits are given,
+            # a min-max aggregation has to be performed.
+            if buckets is not None is None:
+                histogram_requests[agg_name] = agg
+
+    return histogram_requests
+
+
 def _buckets_to_interval(
-        owner: str = 'public',
-        query: Union[Query, EsQuery] = None,
-        pagination: MetadataPagination = None,
-        required: MetadataRequired = None,
+        histogram_requests: Dict[str, HistogramAggregation],
+        response: MetadataResponse,
         aggregations: Dict[str, Aggregation] = {},
-        user_id: str = None,
         index: Index = entry_index) -> Tuple[
             Dict[str, Aggregation],
             Dict[str, HistogramAggregation],
             Dict[str, float]]:
     '''Converts any histogram aggregations with the number of buckets into a
     query with an interval. This is required because elasticsearch does not yet
-    support providing only the number of buckets.
+    support providing only the number of buckets. The given response has to contain
+    min/max aggregations for all histogram requests.
 
     Buckets that have only one available value require a special treatment. An
     interval cannot be defined in such cases, so we use a dummy value of 1.
     '''
-    # Get the histograms which are determined by the number of buckets
-    histogram_requests: Dict[str, HistogramAggregation] = {}
     histogram_responses: Dict[str, HistogramAggregation] = {}
     bucket_values: Dict[str, float] = {}
-    aggs = {name: _specific_agg(agg) for name, agg in aggregations.items()}
-    for agg_name, agg in aggs.items():
-        if isinstance(agg, HistogramAggregation):
-            buckets = agg.buckets
-            # When buckets have been defined, but no explicit limits are given,
-            # a min-max aggregation has to be performed.
-            if buckets is not None is None:
-                histogram_requests[agg_name] = agg
-
-    # If no buckets determined, continue normally
-    if len(histogram_requests) == 0:
-        return aggregations, histogram_responses, bucket_values
-
-    # Create min/max aggregations for each histogram aggregation with buckets
-    # only.
-    min_max_aggregations = {
-        agg_name: Aggregation(
-            min_max=MinMaxAggregation(quantity=agg.quantity, exclude_from_search=agg.exclude_from_search)
-        ) for agg_name, agg in histogram_requests.items()
-    }
-    response = search(owner, query, pagination, required, min_max_aggregations, user_id, index)
 
     # Calculate interval and return the modified aggregations
     for agg_name, agg in histogram_requests.items():
@@ -1121,6 +1131,70 @@ def _buckets_to_interval(
     return aggregations, histogram_responses, bucket_values
 
 
+def _search_arguments(
+        owner: str = 'public',
+        query: Union[Query, EsQuery] = None,
+        pagination: MetadataPagination = None,
+        required: MetadataRequired = None,
+        aggregations: Dict[str, Aggregation] = {},
+        user_id: str = None,
+        index: Index = entry_index) -> Dict[str, Any]:
+    ''' Returns the given :func:`search` arguments with defaults as dict. '''
+    return dict(
+        owner=owner, query=query, pagination=pagination, required=required,
+        aggregations=aggregations, user_id=user_id, index=index)
+
+
+_search_cache_lock = threading.Lock()
+_search_cache: TTLCache = None
+_search_cache_info = dict(hits=0, misses=0)
+
+
+def _get_search_cache() -> TTLCache:
+    global _search_cache
+
+    cache_size = config.elastic.search_cache_size
+    if not cache_size:
+        return None
+
+    if _search_cache is None or _search_cache.maxsize != cache_size or \
+            _search_cache.ttl != config.elastic.search_cache_ttl:
+        _search_cache = TTLCache(maxsize=cache_size, ttl=config.elastic.search_cache_ttl)
+    return _search_cache
+
+
+def search_cache_info() -> Dict[str, int]:
+    '''
+    Returns the number of hits and misses and the current size of this process' search
+    result cache (``config.elastic.search_cache_size``).
+    '''
+    with _search_cache_lock:
+        return dict(
+            **_search_cache_info,
+            size=0 if _search_cache is None else len(_search_cache))
+
+
+def clear_search_cache():
+    with _search_cache_lock:
+        if _search_cache is not None:
+            _search_cache.clear()
+        _search_cache_info.update(hits=0, misses=0)
+
+
+def _search_cache_key(arguments: Dict[str, Any]) -> str:
+    ''' A hash of the normalized search arguments. '''
+    def normalize(value):
+        if isinstance(value, BaseModel):
+            return value.dict()
+        if isinstance(value, EsQuery):
+            return value.to_dict()
+        if isinstance(value, Index):
+            return value.index_name
+        return str(value)
+
+    return utils.hash(json.dumps(arguments, sort_keys=True, default=normalize))
+
+
 def search(
         owner: str = 'public',
         query: Union[Query, EsQuery] = None,
@@ -1129,22 +1203,132 @@ def search(
         aggregations: Dict[str, Aggregation] = {},
         user_id: str = None,
         index: Index = entry_index) -> MetadataResponse:
+    '''
+    Performs a search on the given index and returns the results and aggregations as
+    a :class:`MetadataResponse`. If ``config.elastic.search_cache_size`` is set,
+    results are cached until their TTL expires or the indices are changed.
+    '''
+    return search_batch([_search_arguments(
+        owner=owner, query=query, pagination=pagination, required=required,
+        aggregations=aggregations, user_id=user_id, index=index)])[0]
+
 
+def search_batch(searches: List[Dict[str, Any]]) -> List[MetadataResponse]:
+    '''
+    Performs multiple searches like :func:`search`. Each item holds the keyword arguments
+    of one search. All searches that are not cached are sent to elasticsearch with one
+    multi search request. If histogram aggregations require to query min/max
+    values first, these queries are sent together with one more multi search request.
+    '''
+    searches = [_search_arguments(**arguments) for arguments in searches]
+    cache = _get_search_cache()
+    if cache is None:
+        return _search(searches)
+
+    # the keys are computed first, because searching modifies some of the arguments
+    keys = [_search_cache_key(arguments) for arguments in searches]
+    generation = index_generation()
+    results: List[MetadataResponse] = [None] * len(searches)
+    with _search_cache_lock:
+        for i, key in enumerate(keys):
+            cached = cache.get(key)
+            if cached is not None and cached[0] == generation:
+                results[i] = cached[1]
+        missing = [i for i, result in enumerate(results) if result is None]
+        _search_cache_info['hits'] += len(searches) - len(missing)
+        _search_cache_info['misses'] += len(missing)
+    results = [None if result is None else result.copy(deep=True) for result in results]
+
+    if len(missing) > 0:
+        for i, result in zip(missing, _search([searches[i] for i in missing])):
+            results[i] = result
+            with _search_cache_lock:
+                cache[keys[i]] = (generation, result.copy(deep=True))
+
+    return results
+
+
+def _search(searches: List[Dict[str, Any]]) -> List[MetadataResponse]:
+    ''' Performs the given searches (with all :func:`search` arguments) without cache. '''
     # If histogram aggregations only provide the number of buckets, we need to
     # separately query the min/max values before forming the histogram
     # aggregation
-    aggregations, histogram_responses, bucket_values = _buckets_to_interval(
-        owner,
-        query,
-        pagination,
-        required,
-        aggregations,
-        user_id,
-        index
-    )
-
-    # The first half of this method creates the ES query. Then the query is run on ES.
-    # The second half is about transforming the ES response to a MetadataResponse.
+    histogram_requests = [_histogram_requests(arguments['aggregations']) for arguments in searches]
+    pre_searches = [
+        dict(
+            arguments, pagination=MetadataPagination(page_size=0), required=None,
+            aggregations={
+                agg_name: Aggregation(min_max=MinMaxAggregation(
+                    quantity=agg.quantity, exclude_from_search=agg.exclude_from_search))
+                for agg_name, agg in requests.items()})
+        for arguments, requests in zip(searches, histogram_requests) if requests]
+    pre_search_responses = iter(_search(pre_searches) if len(pre_searches) > 0 else [])
+
+    es_searches: List[Search] = []
+    create_responses: List[Callable[[Response], MetadataResponse]] = []
+    for arguments, requests in zip(searches, histogram_requests):
+        histogram_responses: Dict[str, HistogramAggregation] = {}
+        bucket_values: Dict[str, float] = {}
+        if requests:
+            arguments = dict(arguments)
+            arguments['aggregations'], histogram_responses, bucket_values = _buckets_to_interval(
+                requests, next(pre_search_responses), arguments['aggregations'], arguments['index'])
+
+        es_search, create_response = _create_es_search(
+            histogram_responses=histogram_responses, bucket_values=bucket_values, **arguments)
+        es_searches.append(es_search)
+        create_responses.append(create_response)
+
+    es_responses = _execute_es_searches(es_searches)
+    return [
+        create_response(es_response)
+        for create_response, es_response in zip(create_responses, es_responses)]
+
+
+def _execute_es_searches(es_searches: List[Search]) -> List[Response]:
+    ''' Executes the given searches, multiple searches with one multi search request. '''
+    if len(es_searches) == 0:
+        return []
+
+    if len(es_searches) == 1:
+        try:
+            return [es_searches[0].execute()]
+        except RequestError as e:
+            raise SearchError(e)
+
+    multi_search = MultiSearch()
+    for es_search in es_searches:
+        multi_search = multi_search.add(es_search)
+    try:
+        return multi_search.execute()
+    except TransportError as e:
+        # errors of individual searches are reported without status code
+        if isinstance(e, RequestError) or e.status_code == 'N/A':
+            raise SearchError(e)
+        raise
+
+
+def _create_es_search(
+        owner: str = 'public',
+        query: Union[Query, EsQuery] = None,
+        pagination: MetadataPagination = None,
+        required: MetadataRequired = None,
+        aggregations: Dict[str, Aggregation] = {},
+        user_id: str = None,
+        index: Index = entry_index,
+        histogram_responses: Dict[str, HistogramAggregation] = None,
+        bucket_values: Dict[str, float] = None) -> Tuple[Search, Callable[[Response], MetadataResponse]]:
+    '''
+    Creates the elasticsearch search for the given search arguments and a function
+    that transforms the elasticsearch response into a :class:`MetadataResponse`.
+    '''
+    # The first half of this method creates the ES query. The second half is about
+    # transforming the ES response to a MetadataResponse.
+
+    if histogram_responses is None:
+        histogram_responses = {}
+    if bucket_values is None:
+        bucket_values = {}
 
     doc_type = index.doc_type
 
@@ -1255,81 +1439,141 @@ def search(
             search, name, agg, doc_type=doc_type,
             post_agg_query=post_agg_query, create_es_query=create_es_query)
 
-    # execute
-    try:
-        es_response = search.execute()
-    except RequestError as e:
-        raise SearchError(e)
-    more_response_data = {}
-
-    # pagination
-    next_page_after_value = None
-    if 0 < len(es_response.hits) < es_response.hits.total.value and len(es_response.hits) >= pagination.page_size:
-        last = es_response.hits[-1]
-        if order_field == doc_type.id_field:
-            next_page_after_value = last[doc_type.id_field]
-        else:
-            # after_value is not necessarily the value stored in the field
-            # itself: internally ES can perform the sorting on a different
-            # value which is reported under meta.sort.
-            after_value = last.meta.sort[0]
-            next_page_after_value = '%s:%s' % (after_value, last[doc_type.id_field])
-    pagination_response = PaginationResponse(
-        total=es_response.hits.total.value,
-        next_page_after_value=next_page_after_value,
-        **pagination.dict())
-
-    # aggregations
-    if len(aggregations) > 0:
-        more_response_data['aggregations'] = cast(Dict[str, Any], {
-            name: _es_to_api_aggregation(
-                es_response, name, _specific_agg(agg), histogram_responses,
-                bucket_values, doc_type=doc_type)
-            for name, agg in aggregations.items()})
-
-    more_response_data['es_query'] = es_query.to_dict()
-    if isinstance(query, EsQuery):
-        # we cannot report EsQuery back, because it won't validate within the MetadataResponse model
-        query = None
-
-    result = MetadataResponse(
-        owner='all' if owner is None else owner,
-        query=query,
-        pagination=pagination_response,
-        required=required,
-        data=[_es_to_entry_dict(hit, required) for hit in es_response.hits],
-        **more_response_data)
+    def create_response(es_response: Response) -> MetadataResponse:
+        more_response_data = {}
 
-    return result
+        # pagination
+        next_page_after_value = None
+        if 0 < len(es_response.hits) < es_response.hits.total.value and len(es_response.hits) >= pagination.page_size:
+            last = es_response.hits[-1]
+            if order_field == doc_type.id_field:
+                next_page_after_value = last[doc_type.id_field]
+            else:
+                # after_value is not necessarily the value stored in the field
+                # itself: internally ES can perform the sorting on a different
+                # value which is reported under meta.sort.
+                after_value = last.meta.sort[0]
+                next_page_after_value = '%s:%s' % (after_value, last[doc_type.id_field])
+        pagination_response = PaginationResponse(
+            total=es_response.hits.total.value,
+            next_page_after_value=next_page_after_value,
+            **pagination.dict())
+
+        # aggregations
+        if len(aggregations) > 0:
+            more_response_data['aggregations'] = cast(Dict[str, Any], {
+                name: _es_to_api_aggregation(
+                    es_response, name, _specific_agg(agg), histogram_responses,
+                    bucket_values, doc_type=doc_type)
+                for name, agg in aggregations.items()})
+
+        more_response_data['es_query'] = es_query.to_dict()
+        response_query = query
+        if isinstance(query, EsQuery):
+            # we cannot report EsQuery back, because it won't validate within the MetadataResponse model
+            response_query = None
+
+        result = MetadataResponse(
+            owner='all' if owner is None else owner,
+            query=response_query,
+            pagination=pagination_response,
+            required=required,
+            data=[_es_to_entry_dict(hit, required) for hit in es_response.hits],
+            **more_response_data)
+
+        return result
+
+    return search, create_response
 
 
 def search_iterator(
         owner: str = 'public',
         query: Union[Query, EsQuery] = None,
-        order_by: str = 'entry_id',
+        order_by: str = None,
         required: MetadataRequired = None,
         aggregations: Dict[str, Aggregation] = {},
         user_id: str = None,
-        index: Index = entry_index) -> Iterator[Dict[str, Any]]:
-    '''
-    Works like :func:`search`, but returns an iterator for iterating over the results.
-    Consequently, you cannot specify `pagination`, only `order_buy`.
+        index: Index = entry_index,
+        page_size: int = None,
+        slices: int = None) -> Iterator[Dict[str, Any]]:
     '''
-    page_after_value = None
-    while True:
-        response = search(
-            owner=owner, query=query,
-            pagination=MetadataPagination(
-                page_size=100, page_after_value=page_after_value, order_by=order_by),
-            required=required, aggregations=aggregations, user_id=user_id, index=index)
+    Works like :func:`search`, but returns an iterator for iterating over all results.
+    Consequently, you cannot specify `pagination`, and `aggregations` are ignored.
 
-        page_after_value = response.pagination.next_page_after_value
+    The results are read from a point in time of the index. Without ``order_by``,
+    the point in time is read with ``slices`` parallel sliced searches and the results
+    are yielded in no particular order as the pages of the slices arrive. With
+    ``order_by``, the results are read with one search after the other and yielded
+    in this order.
 
-        for result in response.data:
-            yield result
+    Arguments:
+        page_size: The number of results that are read with one request. Default is
+            ``config.elastic.search_iterator_page_size``.
+        slices: The number of parallel searches. Default is
+            ``config.elastic.search_iterator_slices``.
+    '''
+    if page_size is None:
+        page_size = config.elastic.search_iterator_page_size
+    if slices is None:
+        slices = config.elastic.search_iterator_slices
+    if order_by is not None or slices < 2:
+        slices = 1
+
+    if required is not None:
+        required = required.copy(deep=True)
+    es_search, _ = _create_es_search(
+        owner=owner, query=query, required=required, user_id=user_id, index=index,
+        pagination=MetadataPagination(page_size=page_size, order_by=order_by))
+    # searches with a point in time must not specify the index
+    es_search = es_search.index().extra(track_total_hits=False)
+    if order_by is None:
+        es_search = es_search.sort('_shard_doc')
+
+    keep_alive = config.elastic.search_iterator_keep_alive
+    try:
+        pit_id = infrastructure.elastic_client.open_point_in_time(
+            index=index.index_name, keep_alive=keep_alive)['id']
+    except RequestError as e:
+        raise SearchError(e)
 
-        if page_after_value is None or len(response.data) == 0:
-            break
+    def search_page(slice_id: int, pit_id: str, search_after: List[Any]) -> Response:
+        page_search = es_search.extra(pit=dict(id=pit_id, keep_alive=keep_alive))
+        if slices > 1:
+            page_search = page_search.extra(slice=dict(id=slice_id, max=slices))
+        if search_after is not None:
+            page_search = page_search.extra(search_after=search_after)
+        try:
+            return page_search.execute()
+        except RequestError as e:
+            raise SearchError(e)
+
+    executor = ThreadPoolExecutor(max_workers=slices)
+    futures: Dict[Future, int] = {}
+    try:
+        for slice_id in range(slices):
+            futures[executor.submit(search_page, slice_id, pit_id, None)] = slice_id
+
+        while len(futures) > 0:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                slice_id = futures.pop(future)
+                es_response = future.result()
+                hits = es_response.hits
+                if len(hits) >= page_size:
+                    # the next page is requested before the results are consumed
+                    pit_id = es_response.to_dict().get('pit_id', pit_id)
+                    futures[executor.submit(search_page, slice_id, pit_id, list(hits[-1].meta.sort))] = slice_id
+
+                for hit in hits:
+                    yield _es_to_entry_dict(hit, required)
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown()
+        try:
+            infrastructure.elastic_client.close_point_in_time(body=dict(id=pit_id))
+        except Exception as e:
+            utils.get_logger(__name__).warning('could not close point in time', exc_info=e)
 
 
 def quantity_values(
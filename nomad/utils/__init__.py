@@ -38,15 +38,18 @@ Depending on the configuration all logs will also be send to a central logstash.
 .. autofunc::nomad.utils.strip
 '''
 
-from typing import List, Iterable, Union, Any, Dict
+from typing import List, Iterable, Union, Any, Dict, Optional
 from collections import OrderedDict
-from functools import reduce
+from functools import reduce, lru_cache
 import base64
 from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 import json
 import uuid
 import time
 import hashlib
+import importlib
+from pkg_resources import get_distribution, DistributionNotFound
 import sys
 from datetime import timedelta
 import collections
@@ -183,6 +186,38 @@ def make_websave(hash, length: int = default_hash_len) -> str:
         return base64.b64encode(hash.digest(), altchars=b'-_')[0:-2].decode('utf-8')
 
 
+@lru_cache(maxsize=None)
+def source_code_hash(module_name: str, length: int = default_hash_len) -> str:
+    '''
+    Creates a websafe hash of the source code of the given module. For packages, all
+    python files within the package directory (including sub-packages) are hashed.
+    This can be used as a version of code that is not versioned otherwise.
+    '''
+    module = sys.modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+
+    if hasattr(module, '__path__'):
+        files = sorted(
+            os.path.join(root, file_name)
+            for path in module.__path__
+            for root, _, file_names in os.walk(path)
+            for file_name in file_names if file_name.endswith('.py'))
+        base_path = os.path.dirname(list(module.__path__)[0])
+    else:
+        files = [module.__file__] if getattr(module, '__file__', None) else []
+        base_path = os.path.dirname(files[0]) if files else ''
+
+    hash = hashlib.sha512()
+    hash.update(module_name.encode('utf-8'))
+    for file in files:
+        hash.update(os.path.relpath(file, base_path).encode('utf-8'))
+        with open(file, 'rb') as f:
+            hash.update(f.read())
+
+    return make_websave(hash, length=length)
+
+
 def base64_encode(string):
     '''
     Removes any `=` used as padding from the encoded string.
@@ -212,6 +247,39 @@ def adjust_uuid_size(uuid, length: int = default_hash_len):
     return uuid
 
 
+
+@lru_cache(maxsize=None)
+def package_version(package_name: str) -> Optional[str]:
+    '''
+    The version of the installed distribution with the given name, or None if it is
+    not installed.
+    '''
+    try:
+        return get_distribution(package_name).version
+    except DistributionNotFound:
+        return None
+
+def create_process_pool(n_workers: int, logger=None) -> Optional[ProcessPoolExecutor]:
+    '''
+    Creates a process pool with the given number of worker processes. Returns None, if
+    there are less than two workers or no pool can be created (e.g. within daemonic
+    processes). Callers then run their tasks serially.
+    '''
+    if not n_workers or n_workers < 2:
+        return None
+
+    try:
+        executor = ProcessPoolExecutor(max_workers=n_workers)
+        # starts the worker processes, fails e.g. in daemonic processes
+        executor.submit(int).result()
+    except Exception as e:
+        (logger or get_logger(__name__)).warning(
+            'could not create process pool, run serially', exc_info=e)
+        return None
+
+    return executor
+
+
 @contextmanager
 def lnr(logger, event, **kwargs):
     '''
@@ -17,12 +17,17 @@
 #
 
 import json
+import time
 import pytest
 
+from optimade.server.config import CONFIG
+
 from nomad.processing import Upload
 from nomad import utils
 from nomad.search import search
 from nomad.app.optimade import parse_filter
+from nomad.app.optimade import filterparser
+from nomad.app.optimade.filterparser import FilterException, clear_filter_cache
 from nomad.app.optimade.common import provider_specific_fields
 from nomad.utils.exampledata import ExampleData
 
@@ -146,6 +151,72 @@ def test_optimade_parser(example_structures, query, results):
             query = parse_filter(query)
 
 
+def test_parse_filter_cache(monkeypatch):
+    filter_str = 'elements HAS ALL "H", "O" AND nelements >= 2 AND _nmd_results_material_structural_type = "bulk"'
+    queries = {}
+    for cache_size in [0, 1024]:
+        monkeypatch.setattr('nomad.config.services.optimade_filter_cache_size', cache_size)
+        clear_filter_cache()
+        for _ in range(2):
+            queries[cache_size] = parse_filter(filter_str)
+
+    assert queries[0] == queries[1024]
+
+    # queries are cached per grammar version, other parsers must not get them
+    assert list(filterparser._filter_cache.keys()) == [
+        (filterparser._parser.version, filterparser._parser.variant, filter_str, False)]
+
+    # the cached query must not be changed by the callers
+    assert parse_filter(filter_str) is not parse_filter(filter_str)
+
+    with pytest.raises(FilterException):
+        parse_filter('elements HAS')
+
+
+indexed_fields = 'elements,nelements,elements_ratios,chemical_formula_reduced,_nmd_upload_id'
+
+
+def get_structure_attributes(client, page_limit, response_fields):
+    rv = client.get(f'/optimade/structures?page_limit={page_limit}{response_fields}')
+    assert rv.status_code == 200, json.dumps(rv.json(), indent=2)
+    return {item['id']: item['attributes'] for item in rv.json()['data']}
+
+
+def test_list_endpoint_indexed_attributes(client, example_structures):
+    '''
+    Indexed attributes only are served from the search index and must be the same as
+    the attributes that are read from the archives.
+    '''
+    indexed = get_structure_attributes(client, 10, f'&response_fields={indexed_fields}')
+    archived = get_structure_attributes(client, 10, '')
+    assert len(indexed) == len(archived) == 4
+    for entry_id, attributes in indexed.items():
+        for key, value in attributes.items():
+            if key != '_nmd_upload_id':
+                assert value == archived[entry_id][key]
+        assert attributes['_nmd_upload_id'] == 'test_upload'
+
+
+@pytest.mark.timing
+def test_list_endpoint_benchmark(mongo, elastic, raw_files, client, test_user, monkeypatch):
+    '''
+    Requests a page of 1000 structures with indexed attributes only, which are served
+    from the search index, and with all attributes, which requires to read the archives.
+    '''
+    monkeypatch.setattr(CONFIG, 'page_limit_max', 1000)
+    n_entries = 1000
+    example_data = ExampleData(main_author=test_user)
+    example_data.create_upload(upload_id='test_upload', published=True, embargo_length=0)
+    for i in range(n_entries):
+        example_data.create_structure('test_upload', i, 2, 1, [], 0)
+    example_data.save()
+
+    for name, response_fields in [('index', f'&response_fields={indexed_fields}'), ('archive', '')]:
+        start = time.time()
+        assert len(get_structure_attributes(client, n_entries, response_fields)) == n_entries
+        print(f'{name}: {time.time() - start:.3f}s')
+
+
 def test_list_endpoint(client, example_structures):
     rv = client.get('/optimade/structures')
     assert rv.status_code == 200
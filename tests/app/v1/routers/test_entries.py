@@ -17,6 +17,7 @@
 #
 
 import pytest
+import time
 from urllib.parse import urlencode
 import zipfile
 import io
@@ -397,6 +398,54 @@ def test_entries_aggregations_exclude_from_search(client, example_data, query, a
         assert len(response_agg['data']) == length
 
 
+def test_entries_query_batch(client, example_data, monkeypatch):
+    queries = [
+        dict(owner='visible', query={'upload_id': 'id_published'}),
+        dict(owner='visible', pagination=dict(page_size=0), aggregations={
+            'histogram': {'histogram': {'quantity': 'upload_create_time', 'buckets': 10}}}),
+        dict(owner='visible', pagination=dict(page_size=0), aggregations={
+            'terms': {'terms': {'quantity': 'upload_id'}}})]
+
+    response = client.post('entries/query/batch', json=queries)
+    assert_response(response, 200)
+    batch_response_json = response.json()
+    assert len(batch_response_json) == len(queries)
+    for query, response_json in zip(queries, batch_response_json):
+        response = client.post('entries/query', json=query)
+        assert_response(response, 200)
+        assert response_json == response.json()
+
+    response = client.post('entries/query/batch', json=[])
+    assert_response(response, 200)
+    assert response.json() == []
+
+    response = client.post('entries/query/batch', json=[dict(query={'does_not_exist': 1})])
+    assert_response(response, 422)
+
+    monkeypatch.setattr('nomad.config.services.max_query_batch_size', 2)
+    response = client.post('entries/query/batch', json=queries)
+    assert_response(response, 400)
+
+
+@pytest.mark.timing
+def test_entries_query_batch_benchmark(client, example_data):
+    queries = [
+        dict(owner='visible', pagination=dict(page_size=0), aggregations={
+            'agg': {'terms': {'quantity': quantity}}})
+        for quantity in ['upload_id', 'entry_id', 'results.material.elements', 'results.method.simulation.program_name']]
+
+    start = time.time()
+    for query in queries:
+        assert_response(client.post('entries/query', json=query), 200)
+    sequential_time = time.time() - start
+
+    start = time.time()
+    assert_response(client.post('entries/query/batch', json=queries), 200)
+    batch_time = time.time() - start
+
+    print(f'{len(queries)} queries, sequential: {sequential_time:.3f}s, batch: {batch_time:.3f}s')
+
+
 @pytest.mark.parametrize('required, status_code', [
     pytest.param({'include': ['entry_id', 'upload_id']}, 200, id='include'),
     pytest.param({'include': ['results.*', 'upload_id']}, 200, id='include-section'),
@@ -22,7 +22,8 @@ from zipfile import ZipFile
 import pytest
 
 from nomad import config
-from nomad.app.v1.routers.metainfo import store_package_definition
+from nomad.app.v1.routers.metainfo import (
+    store_package_definition, get_package_by_section_definition_id, PackageDefinition)
 from nomad.datamodel import EntryArchive, ClientContext
 from nomad.metainfo import MSection, MetainfoReferenceError
 from nomad.utils import generate_entry_id, create_uuid
@@ -59,6 +60,37 @@ def test_metainfo_section_id_endpoint(metainfo_data, mongo_infra, client):
     assert response.status_code == 404
 
 
+def test_package_definition_cache(mongo, monkeypatch):
+    package = MSection.from_dict({
+        'm_def': 'nomad.metainfo.metainfo.Package',
+        'name': 'test.CachedPackage',
+        'section_definitions': [{'name': 'MySection'}]})
+    section_id = package.section_definitions[0].definition_id
+
+    mongo_requests = []
+    objects = PackageDefinition.m_def.a_mongo.objects
+
+    def counting_objects(**kwargs):
+        mongo_requests.append(kwargs)
+        return objects(**kwargs)
+
+    monkeypatch.setattr(PackageDefinition.m_def.a_mongo, 'objects', counting_objects)
+
+    for _ in range(3):
+        store_package_definition(package, with_root_def=True, with_out_meta=True)
+    assert len(mongo_requests) == 1
+
+    pkg_definition = get_package_by_section_definition_id(section_id)
+    del pkg_definition['entry_id_based_name']
+    pkg_definition['name'] = 'modified'
+    assert len(mongo_requests) == 2
+
+    pkg_definition = get_package_by_section_definition_id(section_id)
+    assert pkg_definition['name'] == 'test.CachedPackage'
+    assert 'entry_id_based_name' in pkg_definition
+    assert len(mongo_requests) == 2
+
+
 def test_upload_and_download(client, test_user, proc_infra, mongo_infra, no_warn, monkeypatch, tmp):
     monkeypatch.setattr('nomad.config.process.store_package_definition_in_mongo', True)
     monkeypatch.setattr('nomad.config.process.add_definition_id_to_reference', True)
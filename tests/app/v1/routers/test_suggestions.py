@@ -26,7 +26,9 @@ supporting queries, pagination, or the owner parameter. The test methods will us
 to assert for certain aspects in the responses.
 """
 
+import time
 import pytest
+from nomad.app.v1.routers.suggestions import clear_suggestion_cache
 from nomad.metainfo.elasticsearch_extension import entry_type
 from nomad.utils.exampledata import ExampleData
 from .common import assert_response
@@ -199,3 +201,97 @@ def test_suggestions_all(client, example_data_suggestions):
 ])
 def test_suggestions_quantities(quantity, input, output, client, example_data_suggestions):
     assert_suggestions(quantity, input, output, client)
+
+
+def test_suggestions_short_input(client, example_data_suggestions, monkeypatch):
+    """Tests that empty and short inputs are answered with the precomputed most
+    frequent values without a completion query.
+    """
+    es_queries = []
+
+    def es_suggestions(quantities, input_str):
+        es_queries.append(input_str)
+        return {}
+
+    monkeypatch.setattr('nomad.app.v1.routers.suggestions._es_suggestions', es_suggestions)
+    clear_suggestion_cache()
+
+    quantity = "results.material.chemical_formula_hill"
+    response = run_query(quantity, "", client)
+    assert_response(response, 200)
+    values = [suggestion["value"] for suggestion in response.json()[quantity]]
+    assert set(values) == {"C2H5Br", "ClNa", "Ni2O2", "Mg2O2"}
+
+    # like the completion suggester, values are matched by the prefixes of their tokens
+    assert_suggestions(quantity, "N", ["ClNa", "Ni2O2"], client)
+    response = run_query(quantity, "2", client)
+    assert_response(response, 200)
+    assert response.json().get(quantity, []) == []
+    assert es_queries == []
+
+    # quantities that cannot be aggregated are suggested by elasticsearch
+    from nomad.app.v1.routers.suggestions import _top_suggestion_quantities
+    other_quantities = sorted(set(entry_type.suggestions) - _top_suggestion_quantities())
+    if other_quantities:
+        assert_response(run_query([quantity, other_quantities[0]], "N", client), 200)
+        assert es_queries == ["N"]
+
+
+def test_suggestions_cache(client, example_data_suggestions, monkeypatch):
+    """Tests that suggestions are cached per quantity and input."""
+    from nomad.app.v1.routers import suggestions
+
+    es_queries = []
+    original_es_suggestions = suggestions._es_suggestions
+
+    def es_suggestions(quantities, input_str):
+        es_queries.append((tuple(quantity.name for quantity in quantities), input_str))
+        return original_es_suggestions(quantities, input_str)
+
+    monkeypatch.setattr('nomad.app.v1.routers.suggestions._es_suggestions', es_suggestions)
+    clear_suggestion_cache()
+
+    quantity = "results.material.symmetry.crystal_system"
+    for _ in range(3):
+        assert_suggestions(quantity, "cu", "cubic", client)
+    assert es_queries == [((quantity,), "cu")]
+
+    # only the quantities that are not cached are queried
+    response = run_query([quantity, "results.material.functional_type"], "cu", client)
+    assert_response(response, 200)
+    assert es_queries[1:] == [(("results.material.functional_type",), "cu")]
+
+
+@pytest.mark.timing
+def test_suggestions_benchmark(client, example_data_suggestions, monkeypatch):
+    """Simulates users that type the same words character by character and compares
+    the latency with and without the suggestion caches.
+    """
+    words = ["cubic", "rock salt", "semiconductor", "test_name", "alpha/beta"]
+    quantities = [
+        "results.material.symmetry.crystal_system",
+        "results.material.symmetry.structure_name",
+        "results.material.functional_type",
+        "results.method.simulation.program_name",
+        "results.material.material_name"]
+    n_users = 10
+
+    for cache_size, min_input_length in [(0, 0), (10000, 2)]:
+        monkeypatch.setattr('nomad.config.elastic.suggestion_cache_size', cache_size)
+        monkeypatch.setattr('nomad.config.elastic.suggestion_min_input_length', min_input_length)
+        clear_suggestion_cache()
+
+        latencies = []
+        for _ in range(n_users):
+            for word in words:
+                for i in range(len(word) + 1):
+                    start = time.time()
+                    response = run_query(quantities, word[:i], client)
+                    latencies.append(time.time() - start)
+                    assert_response(response, 200)
+
+        latencies.sort()
+        print(
+            f'cache size {cache_size}, min input length {min_input_length}: '
+            f'mean {sum(latencies) / len(latencies) * 1000:.2f}ms, '
+            f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:.2f}ms')
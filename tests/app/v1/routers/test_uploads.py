@@ -21,6 +21,7 @@ import io
 import os
 import requests
 import time
+import tarfile
 import zipfile
 from datetime import datetime
 from typing import List, Dict, Any, Iterable
@@ -28,8 +29,8 @@ from tests.utils import build_url, set_upload_entry_metadata
 
 from tests.test_files import (
     example_file_mainfile_different_atoms, example_file_vasp_with_binary, example_file_aux,
-    example_file_unparsable, example_file_corrupt_zip, empty_file,
-    assert_upload_files)
+    example_file_unparsable, example_file_corrupt_zip, empty_file, example_directory,
+    example_file_contents, assert_upload_files)
 from tests.test_search import assert_search_upload
 from tests.processing.test_edit_metadata import (
     assert_metadata_edited, all_coauthor_metadata, all_admin_metadata)
@@ -862,6 +863,77 @@ def test_get_upload_raw_path(
                     assert expected_content in response.text, 'Expected content not found'
 
 
+@pytest.mark.parametrize('upload_id, path', [
+    pytest.param('id_published', 'test_content/subdir/test_entry_01/mainfile.json', id='published'),
+    pytest.param('id_unpublished', 'test_content/id_unpublished_1/mainfile.json', id='unpublished')])
+def test_get_upload_raw_path_range(client, example_data, test_auth_dict, upload_id, path):
+    user_auth, __token = test_auth_dict['test_user']
+    response = client.get(f'uploads/{upload_id}/raw/{path}', headers=user_auth)
+    assert_response(response, 200)
+    content = response.content
+    etag = response.headers['ETag']
+    assert response.headers['Accept-Ranges'] == 'bytes'
+
+    for range_header, if_range, expected_status_code, expected_content in [
+            ('bytes=10-19', None, 206, content[10:20]),
+            ('bytes=100-', etag, 206, content[100:]),
+            ('bytes=-10', None, 206, content[-10:]),
+            ('bytes=10-19', '"outdated"', 200, content),
+            ('bytes=0-1,5-6', None, 200, content),
+            (f'bytes={len(content)}-', None, 416, None)]:
+        headers = dict(Range=range_header, **user_auth)
+        if if_range:
+            headers['If-Range'] = if_range
+        response = client.get(f'uploads/{upload_id}/raw/{path}', headers=headers)
+        assert_response(response, expected_status_code)
+        if expected_status_code == 206:
+            assert response.content == expected_content
+            offset = len(content) - len(expected_content) if range_header.startswith('bytes=-') else int(range_header[6:].split('-')[0])
+            assert response.headers['Content-Range'] == f'bytes {offset}-{offset + len(expected_content) - 1}/{len(content)}'
+        elif expected_status_code == 200:
+            assert response.content == content
+        else:
+            assert response.headers['Content-Range'] == f'bytes */{len(content)}'
+
+
+@pytest.mark.parametrize('user, upload_id, path, query_args, expected_status_code, expected_files, expected_total', [
+    pytest.param(
+        'test_user', 'id_published', 'test_content/subdir/test_entry_01', {}, 200,
+        ['1.aux', '2.aux', '3.aux', '4.aux', 'mainfile.json'], 5, id='published-dir'),
+    pytest.param(
+        'test_user', 'id_published', 'test_content/subdir/test_entry_01', {'page_size': 2, 'page': 2}, 200,
+        ['3.aux', '4.aux'], 5, id='published-dir-paginated'),
+    pytest.param(
+        'test_user', 'id_unpublished', 'test_content/id_unpublished_1/2.aux', {}, 200,
+        ['2.aux'], 1, id='unpublished-file'),
+    pytest.param(
+        'test_user', 'id_published', 'test_content/does_not_exist', {}, 404, None, None, id='bad-path'),
+    pytest.param(
+        'other_test_user', 'id_embargo', 'test_content/id_embargo_1', {}, 401, None, None, id='embargoed-no-access')])
+def test_get_upload_raw_manifest(
+        client, example_data, test_auth_dict, user, upload_id, path, query_args,
+        expected_status_code, expected_files, expected_total):
+    user_auth, __token = test_auth_dict[user]
+    response = perform_get(
+        client, f'uploads/{upload_id}/raw-manifest/{path}', user_auth=user_auth, **query_args)
+    assert_response(response, expected_status_code)
+    if expected_status_code != 200:
+        return
+
+    data = response.json()
+    assert [os.path.basename(file['path']) for file in data['files']] == expected_files
+    assert data['pagination']['total'] == expected_total
+    if len(expected_files) == expected_total:
+        assert data['size'] == sum(file['size'] for file in data['files'])
+    for file in data['files']:
+        assert file['url'].endswith(f'/uploads/{upload_id}/raw/{file["path"]}')
+        response = client.get(
+            f'uploads/{upload_id}/raw/{file["path"]}', headers=dict(Range='bytes=0-', **user_auth))
+        assert_response(response, 206)
+        assert len(response.content) == file['size']
+        assert response.headers['ETag'] == file['etag']
+
+
 @pytest.mark.parametrize('user, upload_id, path, query_args, expected_status_code, expected_content, expected_file_metadata, expected_pagination', [
     pytest.param(
         'test_user', 'id_published', 'test_content/subdir/silly_value', {},
@@ -1547,6 +1619,57 @@ def test_post_upload(
             assert_gets_published(client, upload_id, test_auth_dict['test_user'][0], **query_args)
 
 
+@pytest.mark.parametrize('mode', ['stream', 'multipart'])
+@pytest.mark.parametrize('stream_tar_uploads', [True, False])
+@pytest.mark.parametrize('file_name,corrupt', [
+    pytest.param('examples.tar.gz', False, id='tar.gz'),
+    pytest.param('examples.tar', False, id='tar'),
+    pytest.param('examples.tar.gz', True, id='corrupt')])
+def test_post_upload_tar(
+        client, mongo, proc_infra, monkeypatch, test_user_auth, mode, stream_tar_uploads,
+        file_name, corrupt):
+    monkeypatch.setattr('nomad.config.process.stream_tar_uploads', stream_tar_uploads)
+    tar_path = os.path.join(config.fs.tmp, file_name)
+    with tarfile.open(tar_path, 'w:gz' if file_name.endswith('.gz') else 'w') as tf:
+        tf.add(example_directory, arcname='examples_template')
+    if corrupt:
+        with open(tar_path, 'r+b') as f:
+            f.truncate(os.path.getsize(tar_path) // 2)
+
+    response = perform_post_put_file(
+        client, 'POST', 'uploads', mode, tar_path, test_user_auth, file_name=file_name)
+    os.remove(tar_path)
+    if corrupt and stream_tar_uploads:
+        assert_response(response, 400)
+        return
+
+    assert_response(response, 200)
+    upload_id = response.json()['upload_id']
+    if corrupt:
+        assert_processing_fails(client, upload_id, test_user_auth)
+        return
+
+    assert_processing(client, upload_id, test_user_auth)
+    upload_files = UploadFiles.get(upload_id)
+    for path in example_file_contents:
+        assert upload_files.raw_path_is_file(path)
+
+
+@pytest.mark.parametrize('stream_tar_uploads', [True, False])
+def test_put_upload_raw_path_tar_wait_for_processing(
+        client, proc_infra, example_data_writeable, test_auth_dict, monkeypatch, stream_tar_uploads):
+    monkeypatch.setattr('nomad.config.process.stream_tar_uploads', stream_tar_uploads)
+    tar_path = os.path.join(config.fs.tmp, 'examples.tar')
+    with tarfile.open(tar_path, 'w') as tf:
+        tf.add(example_directory, arcname='examples_template')
+
+    response = perform_post_put_file(
+        client, 'PUT', 'uploads/examples_template/raw/', 'stream', tar_path,
+        test_auth_dict['test_user'][0], file_name='examples.tar', wait_for_processing=True)
+    os.remove(tar_path)
+    assert_response(response, 400)
+
+
 @pytest.mark.parametrize('kwargs', [
     pytest.param(
         dict(
@@ -61,6 +61,27 @@ if os.getenv('_PYTEST_RAISE', "0") != "0":
     def pytest_internalerror(excinfo):
         raise excinfo.value
 
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--timing', action='store_true', default=False,
+        help='Also run the tests marked with "timing" that measure and print run times.')
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'timing: measures and prints run times, only runs with --timing')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--timing'):
+        return
+    skip_timing = pytest.mark.skip(reason='needs --timing to run')
+    for item in items:
+        if 'timing' in item.keywords:
+            item.add_marker(skip_timing)
+
+
 test_log_level = logging.CRITICAL
 
 elastic_test_entries_index = 'nomad_entries_v1_test'
@@ -205,6 +226,8 @@ def mongo_infra(monkeysession):
 def clear_mongo(mongo_infra):
     # Some test cases need to reset the database connection
     infrastructure.mongo_client.drop_database('test_db')
+    from nomad.app.v1.routers.metainfo import clear_package_definition_cache
+    clear_package_definition_cache()
     return infrastructure.mongo_client
 
 
@@ -354,6 +377,11 @@ class KeycloakMock:
         else:
             assert False, 'no token based get_user during tests'
 
+    def get_users(self, user_ids):
+        return {
+            user_id: User(**self.users[user_id])
+            for user_id in user_ids if user_id in self.users}
+
     def search_user(self, query):
         return [
             User(**test_user) for test_user in self.users.values()
@@ -29,6 +29,7 @@ from nomad.parsing.parser import ArchiveParser
 from nomad.datamodel import Context
 from nomad.datamodel.context import ServerContext, ClientContext, parse_path
 from nomad.datamodel.datamodel import EntryArchive, EntryMetadata
+from nomad.datamodel.metainfo.workflow2 import Workflow, TaskReference
 from nomad.processing import Upload
 
 
@@ -415,6 +416,75 @@ def test_server_external_schema(upload1_contents, upload2_contents, raw_files):
         assert results == content
 
 
+def test_server_context_cache(raw_files, monkeypatch):
+    for upload_id in ['upload1_id', 'upload2_id']:
+        upload_files = files.StagingUploadFiles(upload_id, create=True)
+        upload_files.write_archive(f'{upload_id}_entry', {
+            'metadata': {'upload_id': upload_id, 'entry_id': f'{upload_id}_entry'},
+            'run': [{'program': {'name': 'VASP'}}],
+            'results': {'material': {'elements': ['H', 'O']}}})
+
+    opened_upload_ids = []
+    get_upload_files = files.UploadFiles.get
+
+    def counting_get_upload_files(upload_id, *args, **kwargs):
+        opened_upload_ids.append(upload_id)
+        return get_upload_files(upload_id, *args, **kwargs)
+
+    monkeypatch.setattr('nomad.files.UploadFiles.get', counting_get_upload_files)
+
+    context = ServerContext(upload=processing.Upload(upload_id='upload1_id'))
+    url = '../uploads/upload2_id/archive/upload2_id_entry'
+
+    # only the sections needed for the reference are loaded
+    archive = context.resolve_archive_url_for_fragment(url, '/run/0/program')
+    assert archive.run[0].program.name == 'VASP'
+    assert archive.results is None
+    assert context.resolve_archive_url_for_fragment(url, '/results/material') is archive
+    assert archive.results.material.elements == ['H', 'O']
+    assert context.resolve_archive_url(url) is archive
+    assert opened_upload_ids == ['upload2_id']
+
+    # contexts for referenced uploads share the cache
+    nested_context = archive.m_context
+    assert nested_context is not context
+    assert nested_context.cache is context.cache
+    assert nested_context.resolve_archive_url('../upload/archive/upload2_id_entry') is archive
+    assert opened_upload_ids == ['upload2_id']
+
+    archive = context.resolve_archive_url('../upload/archive/upload1_id_entry')
+    assert archive.m_context is context
+    assert archive.results.material.elements == ['H', 'O']
+
+    context.close()
+    assert len(context.cache.archives) == 0
+    assert len(context.cache.upload_files) == 0
+    assert len(context.urls) == 0
+
+
+def test_server_context_cache_workflow(raw_files):
+    upload_files = files.StagingUploadFiles('upload2_id', create=True)
+    upload_files.write_archive('upload2_id_entry', {
+        'metadata': {'upload_id': 'upload2_id', 'entry_id': 'upload2_id_entry'},
+        'run': [{'program': {'name': 'VASP'}, 'calculation': [{'n_scf_iterations': 10}]}],
+        'workflow2': {
+            'name': 'single point',
+            'inputs': [{'name': 'calculation', 'section': '#/run/0/calculation/0'}]}})
+
+    context = ServerContext(upload=processing.Upload(upload_id='upload1_id'))
+    archive = EntryArchive(m_context=context, workflow2=Workflow(tasks=[TaskReference(
+        task='../uploads/upload2_id/archive/upload2_id_entry#/workflow2')]))
+
+    # the referenced workflow references into the run of its own archive
+    task = archive.workflow2.tasks[0].task
+    assert task.name == 'single point'
+    assert len(task.m_root().run) == 0
+    assert task.inputs[0].section.n_scf_iterations == 10
+    assert task.m_root().run[0].program.name == 'VASP'
+
+    context.close()
+
+
 def test_client_custom_schema(api_v1, published_wo_user_metadata):
     url = 'http://testserver/api/v1'
     test_path = 'tests/data/datamodel/'
@@ -23,7 +23,10 @@ import pytz
 
 from nomad.metainfo import MSection, Quantity, Section, Datetime, MEnum, SubSection
 from nomad.datamodel.datamodel import EntryMetadata, SearchableQuantity, EntryArchive
-from nomad.datamodel import EntryData
+from nomad.datamodel import EntryData, prefetch_users
+from nomad.datamodel.data import clear_user_cache
+
+from tests.conftest import test_user_uuid
 
 
 @pytest.mark.parametrize('source_quantity,source_value,target_quantity,target_value', [
@@ -79,3 +82,40 @@ def test_searchable_quantities_nested():
         (item.path, item.text_value)
         for item in archive.metadata.searchable_quantities]
     assert data == [('data.value', 'root'), ('data.children.value', 'child1'), ('data.children.value', 'child2')]
+
+
+def test_prefetch_users(monkeypatch):
+    from nomad import infrastructure
+
+    clear_user_cache()
+    user_management = infrastructure.user_management
+    calls = []
+    get_users = user_management.get_users
+
+    def counting_get_users(user_ids):
+        user_ids = list(user_ids)
+        calls.append(user_ids)
+        return get_users(user_ids)
+
+    def failing_get_user(*args, **kwargs):
+        assert False, 'users should be prefetched'
+
+    monkeypatch.setattr(user_management, 'get_users', counting_get_users)
+    monkeypatch.setattr(user_management, 'get_user', failing_get_user)
+
+    entries = [
+        EntryMetadata(main_author=test_user_uuid(i % 2 + 1), reviewers=[test_user_uuid(0)])
+        for i in range(10)]
+    prefetch_users(entries)
+    assert len(calls) == 1
+    assert sorted(calls[0]) == [test_user_uuid(i) for i in range(3)]
+
+    for i, entry in enumerate(entries):
+        assert entry.main_author.user_id == test_user_uuid(i % 2 + 1)
+        assert entry.reviewers[0].username == 'admin'
+
+    # all users are now cached
+    prefetch_users([EntryMetadata(main_author=test_user_uuid(1))])
+    assert len(calls) == 1
+
+    clear_user_cache()
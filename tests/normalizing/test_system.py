@@ -18,6 +18,7 @@
 
 import pytest
 import ase
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
 from nomad import datamodel, config
@@ -395,3 +396,148 @@ def test_springer_normalizer():
     assert springer.id == 'sd_0305232'
     assert springer.alphabetical_formula == 'O3SrTi'
     assert springer.url == 'http://materials.springer.com/isp/crystallographic/docs/sd_0305232'
+
+
+def test_springer_db_reader_reuse(monkeypatch):
+    from nomad.normalizing import system
+
+    system.close_springer_db()
+    reader = system.get_springer_db()
+    assert reader is not None
+    assert system.get_springer_db() is reader
+    assert system.query_springer_data('O60Sr20Ti20', 221) == system.query_springer_data('O60Sr20Ti20', 221)
+    assert system.get_springer_db() is reader
+
+    # a forked process must not reuse the parent's file object
+    monkeypatch.setattr(system.os, 'getpid', lambda: -1)
+    assert system.get_springer_db() is not reader
+    system.close_springer_db()
+    assert not reader.is_closed()
+    monkeypatch.undo()
+    reader.close()
+
+
+def test_symmetry_analyzer_cache(monkeypatch, tmp_path):
+    from nomad.normalizing import common
+
+    monkeypatch.setattr('nomad.config.normalize.symmetry_cache_path', str(tmp_path))
+    monkeypatch.setattr(common, '_symmetry_analyzer_cache', None)
+
+    def shared(symmetry_analyzer):
+        return getattr(symmetry_analyzer, '_symmetry_analyzer', symmetry_analyzer)
+
+    tolerance = config.normalize.symmetry_tolerance
+    atoms = ase.build.bulk('NaCl', 'rocksalt', a=5.64)
+    symm = common.get_symmetry_analyzer(atoms, symmetry_tol=tolerance)
+    assert symm.get_space_group_number() == 225
+
+    # an identical structure in another entry reuses the analysis
+    assert shared(common.get_symmetry_analyzer(atoms.copy(), symmetry_tol=tolerance)) is shared(symm)
+    # different structures or settings do not
+    assert shared(common.get_symmetry_analyzer(atoms, symmetry_tol=tolerance / 2)) is not shared(symm)
+    displaced = atoms.copy()
+    displaced.positions[0] += 0.01
+    assert shared(common.get_symmetry_analyzer(displaced, symmetry_tol=tolerance)) is not shared(symm)
+
+    # results of shared analyzers can be modified
+    conv_atoms = symm.get_conventional_system()
+    conv_atoms.positions[0] += 1.0
+    assert not np.allclose(symm.get_conventional_system().positions, conv_atoms.positions)
+
+    # other processes use the results stored on disk
+    monkeypatch.setattr(common, '_symmetry_analyzer_cache', None)
+    stored = common.get_symmetry_analyzer(atoms, symmetry_tol=tolerance)
+    assert shared(stored) is not shared(symm)
+    assert stored.get_space_group_number() == 225
+    assert list(stored.get_wyckoff_letters_conventional()) == list(symm.get_wyckoff_letters_conventional())
+
+    # files that are not signed with the api secret are not loaded
+    monkeypatch.setattr(common, '_symmetry_analyzer_cache', None)
+    monkeypatch.setattr('nomad.config.services.api_secret', 'otherSecret')
+    assert common._load_symmetry_analyzer(common.symmetry_fingerprint(atoms, symmetry_tol=tolerance)) is None
+
+    # disabled cache
+    monkeypatch.setattr('nomad.config.normalize.symmetry_cache_path', None)
+    monkeypatch.setattr('nomad.config.normalize.symmetry_cache_size', 0)
+    assert shared(common.get_symmetry_analyzer(atoms, symmetry_tol=tolerance)) is not shared(stored)
+
+
+def test_parallel_system_normalization(monkeypatch):
+    from tests.normalizing.conftest import get_template_dft, get_section_system
+    from nomad.datamodel.metainfo.simulation.run import Run
+    from nomad.normalizing import normalizer
+    from nomad.normalizing.system import _system_properties_from_args
+
+    def create_archive():
+        archive = get_template_dft()
+        archive.run[0].system = None
+        atoms = ase.build.bulk('Si', 'diamond', a=5.43, cubic=True)
+        for i in range(6):
+            rattled = atoms.copy()
+            rattled.rattle(stdev=0.01, seed=i)
+            archive.run[0].m_add_sub_section(Run.system, get_section_system(rattled))
+        archive.run[0].calculation[0].system_ref = archive.run[0].system[-1]
+        return archive
+
+    serial = run_normalize(create_archive())
+
+    mapped_functions = []
+
+    class SpyProcessPoolExecutor(ProcessPoolExecutor):
+        def map(self, function, *args, **kwargs):
+            mapped_functions.append(function)
+            return super().map(function, *args, **kwargs)
+
+    monkeypatch.setattr('nomad.utils.ProcessPoolExecutor', SpyProcessPoolExecutor)
+    monkeypatch.setattr('nomad.normalizing.normalizer._executor', None)
+    monkeypatch.setattr('nomad.normalizing.normalizer._executor_unavailable', False)
+    monkeypatch.setattr('nomad.config.normalize.parallel_workers', 2)
+    monkeypatch.setattr('nomad.config.normalize.parallel_min_tasks', 2)
+    try:
+        parallel = run_normalize(create_archive())
+        executor = normalizer._executor
+        # the pool is reused for other entries
+        run_normalize(create_archive())
+        assert normalizer._executor is executor
+    finally:
+        if normalizer._executor is not None:
+            normalizer._executor.shutdown()
+
+    assert isinstance(executor, SpyProcessPoolExecutor)
+    assert _system_properties_from_args in mapped_functions
+    assert len(parallel.run[0].system) == 6
+    for serial_system, parallel_system in zip(serial.run[0].system, parallel.run[0].system):
+        assert parallel_system.configuration_raw_gid is not None
+        assert parallel_system.configuration_raw_gid == serial_system.configuration_raw_gid
+        assert parallel_system.chemical_composition_hill == serial_system.chemical_composition_hill == 'Si8'
+
+
+def test_parallel_normalization_daemonic(monkeypatch):
+    from types import SimpleNamespace
+    from nomad.normalizing import normalizer
+
+    def create_process_pool(*args, **kwargs):
+        assert False, 'daemonic processes cannot create pools'
+
+    monkeypatch.setattr(normalizer, 'create_process_pool', create_process_pool)
+    monkeypatch.setattr(normalizer.multiprocessing, 'current_process', lambda: SimpleNamespace(daemon=True))
+    monkeypatch.setattr(normalizer, '_executor', None)
+    monkeypatch.setattr(normalizer, '_executor_unavailable', False)
+    monkeypatch.setattr('nomad.config.normalize.parallel_workers', 2)
+    monkeypatch.setattr('nomad.config.normalize.parallel_min_tasks', 2)
+
+    for _ in range(2):
+        with normalizer.parallel_map(10) as map_function:
+            assert map_function is None
+    assert normalizer._executor_unavailable
+
+
+def test_system_properties_malformed_input(caplog):
+    from tests.normalizing.conftest import get_template_dft
+
+    archive = get_template_dft()
+    atoms = archive.run[0].system[0].atoms
+    atoms.positions = atoms.positions[:1]
+    atoms.lattice_vectors = np.full((3, 3), np.nan) * 1e-10
+    run_normalize(archive)
+    assert_log(caplog, 'ERROR', 'len of atom position does not match number of atoms')
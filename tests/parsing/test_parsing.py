@@ -17,14 +17,18 @@
 #
 
 import json
+import re
+import time
 import pytest
 import os
-from shutil import copyfile
+from shutil import copyfile, copytree
 
 from nomad import utils, files
 from nomad.datamodel import EntryArchive
 from nomad.parsing import BrokenParser, MatchingParserInterface
-from nomad.parsing.parsers import parser_dict, match_parser, run_parser, prefix_workflow, parsers
+from nomad.parsing.parsers import (
+    parser_dict, match_parser, run_parser, prefix_workflow, parsers, required_literal,
+    ParserMatcher)
 from nomad.utils import dump_json
 
 parser_examples = [
@@ -240,6 +244,75 @@ def test_match(raw_files, with_latin_1_file, no_warn, parsers, num_output_files,
         for mainfile, parser in matched_mainfiles.items()])
 
 
+@pytest.mark.parametrize('pattern, literal', [
+    (r'^\n*\.Version\s*[0-9.]*\s*of ABINIT\s*', 'of ABINIT'),
+    (r'\s*Program PWSCF', 'Program PWSCF'),
+    (r'^.*\.nc', '.nc'),
+    (r'(abc|abd)x', 'ab'),
+    (r'(?:foo)+bar', 'foo'),
+    (r'(?:foo)*bar', 'bar'),
+    (r'.*', None),
+    (r'(?i)abc', None),
+    (r'x(?i:ABCDEF)y', 'x')
+])
+def test_required_literal(pattern, literal):
+    assert required_literal(re.compile(pattern)) == literal
+
+
+def exhaustive_candidates(self, *args, **kwargs):
+    return list(self.parsers)
+
+
+def match_dir(directory):
+    results = {}
+    for root, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            path = os.path.join(root, file_name)
+            parser, mainfile_keys = match_parser(path)
+            results[os.path.relpath(path, directory)] = (
+                parser.name if parser is not None else None, mainfile_keys)
+    return results
+
+
+def test_parser_matcher(tmp_path, monkeypatch):
+    directory = str(tmp_path / 'parsers')
+    copytree('tests/data/parsers', directory)
+
+    results = match_dir(directory)
+    assert any(parser_name is not None for parser_name, _ in results.values())
+
+    monkeypatch.setattr(ParserMatcher, 'candidates', exhaustive_candidates)
+    assert match_dir(directory) == results
+
+
+@pytest.mark.timing
+def test_parser_matcher_benchmark(tmp_path, monkeypatch):
+    '''
+    Compares the prefiltered matching with testing all parsers on a synthetic directory
+    tree that mixes mainfiles with many auxiliary files.
+    '''
+    directory = tmp_path / 'upload'
+    for i in range(20):
+        copytree('tests/data/parsers/vasp', str(directory / f'calc_{i}' / 'vasp'))
+        copytree('tests/data/parsers/fhi-aims', str(directory / f'calc_{i}' / 'fhi-aims'))
+        for j in range(50):
+            with open(directory / f'calc_{i}' / f'aux_{j}.dat', 'wt') as f:
+                f.write('\n'.join(f'{j} {k} {k * 0.5}' for k in range(200)))
+
+    start = time.time()
+    results = match_dir(str(directory))
+    prefiltered_time = time.time() - start
+
+    monkeypatch.setattr(ParserMatcher, 'candidates', exhaustive_candidates)
+    start = time.time()
+    assert match_dir(str(directory)) == results
+    exhaustive_time = time.time() - start
+
+    print(
+        f'matching {len(results)} files: all parsers {exhaustive_time:.3f}s, '
+        f'prefiltered {prefiltered_time:.3f}s')
+
+
 def parser_in_dir(dir):
     for root, _, files in os.walk(dir):
         for file_name in files:
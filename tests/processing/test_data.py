@@ -24,7 +24,10 @@ import re
 import shutil
 import zipfile
 import json
+import time
 import yaml
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
 
 from nomad import utils, infrastructure, config
 from nomad.config.models import BundleImportSettings
@@ -234,6 +237,38 @@ def test_processing_with_large_dir(test_user, proc_infra, tmp):
         assert len(entry.warnings) == 1
 
 
+def test_match_files_parallel(non_empty_processed: Upload, monkeypatch):
+    upload = non_empty_processed
+    paths = [
+        path_info.path for path_info in upload.staging_upload_files.raw_directory_list(
+            recursive=True, files_only=True)]
+
+    def match(**kwargs):
+        return [
+            (path, parser.name, mainfile_keys)
+            for path, parser, mainfile_keys in upload._match_files(paths, **kwargs)]
+
+    serial_results = match(parallel=False)
+    assert len(serial_results) > 0
+
+    monkeypatch.setattr('nomad.config.process.match_workers', 2)
+    monkeypatch.setattr('nomad.config.process.match_chunk_size', 1)
+    assert match() == serial_results
+
+    class BrokenProcessPoolExecutor:
+        def submit(self, *args, **kwargs):
+            future: Future = Future()
+            future.set_exception(BrokenProcessPool())
+            return future
+
+        def shutdown(self, wait=True):
+            pass
+
+    # the files are matched serially, if a matching process dies
+    monkeypatch.setattr('nomad.utils.create_process_pool', lambda *args: BrokenProcessPoolExecutor())
+    assert match() == serial_results
+
+
 @pytest.mark.timeout(config.tests.default_timeout)
 def test_publish(non_empty_processed: Upload, no_warn, internal_example_user_metadata, monkeypatch):
     processed = non_empty_processed
@@ -477,6 +512,73 @@ def test_re_processing(published: Upload, internal_example_user_metadata, monkey
         assert archive.results is None
 
 
+def test_re_processing_raw_files_on_demand(published: Upload, monkeypatch):
+    first_entry: Entry = published.entries_sublist(0, 1)[0]
+    old_entry_time = first_entry.last_processing_time
+
+    def add_rawfiles(*args, **kwargs):
+        assert False, 'raw files should not be extracted all at once'
+
+    monkeypatch.setattr('nomad.files.StagingUploadFiles.add_rawfiles', add_rawfiles)
+    published.process_upload(reprocess_settings=dict(
+        rematch_published=False, extract_raw_files_on_demand=True))
+    published.block_until_complete(interval=.01)
+
+    first_entry.reload()
+    assert first_entry.last_processing_time > old_entry_time
+    assert_processing(Upload.get(published.upload_id), published=True)
+    assert published.upload_files.to_staging_upload_files() is None
+
+
+def test_re_processing_only_changed_entries(published: Upload, monkeypatch):
+    first_entry: Entry = published.entries_sublist(0, 1)[0]
+    old_entry_time = first_entry.last_processing_time
+    assert first_entry.parser_version is not None
+    assert first_entry.normalizer_version is not None
+
+    report = published.plan_reprocessing()
+    assert report['total'] > 0
+    assert report['unchanged'] == report['total']
+    assert report['reprocessed'] == 0
+
+    monkeypatch.setattr('nomad.processing.data.normalizers_version', lambda: 'changed')
+    report = published.plan_reprocessing(check_entry_hashes=False)
+    assert report['reprocessed'] == report['normalizers_changed'] == report['total']
+    monkeypatch.undo()
+
+    published.process_upload(reprocess_settings=dict(reprocess_only_changed_entries=True))
+    published.block_until_complete(interval=.01)
+
+    first_entry.reload()
+    assert first_entry.last_processing_time == old_entry_time
+    assert_processing(Upload.get(published.upload_id), published=True)
+
+
+def test_normalizers_version(monkeypatch, tmp_path):
+    from nomad.normalizing import normalizers_version
+
+    version = normalizers_version()
+    monkeypatch.setattr('nomad.config.normalize.parallel_workers', 4)
+    monkeypatch.setattr('nomad.config.normalize.symmetry_cache_size', 0)
+    assert normalizers_version() == version
+
+    monkeypatch.setattr('nomad.config.meta.version', 'other')
+    assert normalizers_version() != version
+    version = normalizers_version()
+
+    springer_db_path = tmp_path / 'springer.msg'
+    springer_db_path.write_bytes(b'springer')
+    monkeypatch.setattr('nomad.config.normalize.springer_db_path', str(springer_db_path))
+    assert normalizers_version() != version
+    version = normalizers_version()
+    springer_db_path.write_bytes(b'updated springer')
+    assert normalizers_version() != version
+    version = normalizers_version()
+
+    monkeypatch.setattr('nomad.config.normalize.symmetry_tolerance', 0.2)
+    assert normalizers_version() != version
+
+
 @pytest.mark.parametrize('publish,old_staging', [
     (False, False), (True, True), (True, False)])
 def test_re_process_staging(non_empty_processed, publish, old_staging):
@@ -838,6 +940,45 @@ def test_creating_new_entries_during_processing(proc_infra, test_user):
             assert archive['data']['sample_number'] == idx
 
 
+@pytest.mark.timing
+def test_processing_eln_entries_benchmark(proc_infra, test_user, tmp, monkeypatch):
+    '''
+    Processes an upload with many ELN entries that use the same custom schema with
+    and without the package definition cache.
+    '''
+    monkeypatch.setattr('nomad.config.process.store_package_definition_in_mongo', True)
+    n_entries = 10000
+    schema = {
+        'definitions': {
+            'section_definitions': [{
+                'name': 'Sample',
+                'base_sections': ['nomad.datamodel.data.EntryData'],
+                'quantities': [{'name': 'sample_id', 'type': 'str'}]
+            }]
+        }
+    }
+    m_def = '../upload/raw/schema.archive.json#/definitions/section_definitions/0'
+    upload_path = os.path.join(tmp, 'eln_entries.zip')
+    with zipfile.ZipFile(upload_path, 'w') as zf:
+        zf.writestr('schema.archive.json', json.dumps(schema))
+        for i in range(n_entries):
+            zf.writestr(
+                f'samples/{i}.archive.json',
+                json.dumps({'data': {'m_def': m_def, 'sample_id': f'sample-{i}'}}))
+
+    for cache_size in [0, 1000]:
+        monkeypatch.setattr('nomad.config.process.package_definition_cache_size', cache_size)
+        upload_id = f'test_eln_entries_{cache_size}'
+        start = time.time()
+        upload = run_processing((upload_id, upload_path), test_user)
+        processing_time = time.time() - start
+        assert upload.process_status == ProcessStatus.SUCCESS
+        assert upload.processed_entries_count == n_entries + 1
+        print(
+            f'package definition cache size {cache_size}: {processing_time:.1f}s, '
+            f'{processing_time / n_entries * 1e3:.2f}ms per entry')
+
+
 @pytest.mark.timeout(config.tests.default_timeout)
 def test_ems_data(proc_infra, test_user):
     upload = run_processing(('test_ems_upload', 'tests/data/proc/examples_ems.zip'), test_user)
@@ -15,8 +15,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import time
+
 import pytest
-from nomad.atomutils import Formula
+import numpy as np
+from MDAnalysis.analysis.rdf import InterRDF
+from nomad.atomutils import (
+    Formula, search_aflow_prototype, get_normalized_wyckoff_key, create_empty_universe,
+    shifted_correlation_average, shifted_mean_squared_displacement,
+    mean_squared_displacement_fft, calc_molecular_rdf, calc_molecular_mean_squared_displacements,
+    BeadGroup)
+from nomad.aflow_prototypes import aflow_prototypes
 from nomad.datamodel.results import Material
 
 
@@ -87,3 +96,162 @@ def test_formula_material_population(formula, descriptive_format, expected_formu
     assert material.chemical_formula_reduced is not None
     assert material.chemical_formula_iupac is not None
     assert material.chemical_formula_anonymous is not None
+
+
+def test_search_aflow_prototype():
+    # Every prototype with a normalized Wyckoff sequence must be found again,
+    # unless an earlier prototype of the same space group shares its sequence.
+    for space_group, prototypes in aflow_prototypes['prototypes_by_spacegroup'].items():
+        for prototype in prototypes:
+            norm_wyckoff = prototype.get('normalized_wyckoff_matid')
+            if not norm_wyckoff:
+                continue
+            expected = next(
+                p for p in prototypes
+                if p.get('normalized_wyckoff_matid') == norm_wyckoff)
+            # The lookup must not depend on the key order of the sequence
+            reordered = {
+                letter: dict(reversed(list(species.items())))
+                for letter, species in reversed(list(norm_wyckoff.items()))}
+            assert search_aflow_prototype(space_group, reordered) is expected
+
+    assert search_aflow_prototype(225, {'z': {'X_0': 1}}) is None
+    assert search_aflow_prototype(225, {}) is None
+
+
+def test_normalized_wyckoff_key():
+    assert get_normalized_wyckoff_key({'a': {'X_0': 1}, 'b': {'X_1': 2, 'X_0': 1}}) == \
+        get_normalized_wyckoff_key({'b': {'X_0': 1, 'X_1': 2}, 'a': {'X_0': 1}})
+    assert get_normalized_wyckoff_key({'a': {'X_0': 1}}) != \
+        get_normalized_wyckoff_key({'a': {'X_0': 2}})
+
+
+def create_md_universe(n_frames: int, n_molecules=(6, 4), box_length=20., seed=0):
+    '''
+    Creates a universe with diatomic molecules of two molecule types that perform a
+    random walk in a periodic cubic box.
+    '''
+    rng = np.random.default_rng(seed)
+    n_residues = sum(n_molecules)
+    n_atoms = 2 * n_residues
+    universe = create_empty_universe(
+        n_atoms, n_frames=n_frames, n_residues=n_residues, n_segments=1,
+        atom_resindex=np.repeat(np.arange(n_residues), 2),
+        residue_segindex=np.zeros(n_residues, dtype=int), flag_trajectory=True)
+    universe.add_TopologyAttr('mass', np.ones(n_atoms))
+    universe.add_TopologyAttr('moltypes', np.repeat(
+        [str(i) for i in range(len(n_molecules))], n_molecules))
+    universe.add_TopologyAttr('bonds', [(2 * i, 2 * i + 1) for i in range(n_residues)])
+
+    centers = rng.uniform(0, box_length, (n_residues, 3))
+    bond = np.array([0.5, 0., 0.])
+    for frame in universe.trajectory:
+        centers += rng.normal(0, 0.3, centers.shape)
+        positions = np.repeat(centers, 2, axis=0)
+        positions[1::2] += bond
+        universe.atoms.positions = positions % box_length
+        universe.atoms.dimensions = [box_length, box_length, box_length, 90, 90, 90]
+
+    return universe
+
+
+def reference_msd(positions):
+    return np.array([
+        ((positions[lag:] - positions[:len(positions) - lag]) ** 2).sum(axis=2).mean()
+        for lag in range(len(positions))])
+
+
+def test_mean_squared_displacement_fft():
+    positions = np.cumsum(np.random.default_rng(0).normal(size=(200, 5, 3)), axis=0)
+    assert mean_squared_displacement_fft(positions) == pytest.approx(reference_msd(positions))
+
+
+def test_shifted_mean_squared_displacement():
+    def msd(start, current):
+        return ((start - current) ** 2).sum(axis=1).mean()
+
+    positions = np.cumsum(np.random.default_rng(0).normal(size=(300, 5, 3)), axis=0)
+    times = np.arange(300) * 0.5
+    expected_times, expected_values = shifted_correlation_average(msd, times, positions)
+    actual_times, actual_values = shifted_mean_squared_displacement(times, positions)
+    assert actual_times == pytest.approx(expected_times)
+    assert actual_values == pytest.approx(expected_values)
+
+
+def test_molecular_msd_methods():
+    universe = create_md_universe(100)
+    shifted = calc_molecular_mean_squared_displacements(universe)
+    fft = calc_molecular_mean_squared_displacements(universe, method='fft')
+    assert list(shifted['types']) == list(fft['types']) == ['0', '1']
+    assert shifted['times'].magnitude == pytest.approx(fft['times'].magnitude)
+    # both are estimates of the same quantity from a random walk with the same step size
+    assert fft['diffusion_constant'].magnitude == pytest.approx(
+        shifted['diffusion_constant'].magnitude, rel=0.5)
+
+    with pytest.raises(ValueError):
+        calc_molecular_mean_squared_displacements(universe, method='unknown')
+
+
+def reference_molecular_rdf(universe, moltype_i, moltype_j, start, stop, step, max_dist):
+    bead_groups = [
+        BeadGroup(universe.select_atoms(f'moltype {moltype}'), compound='fragments')
+        for moltype in [moltype_i, moltype_j]]
+    rdf = InterRDF(
+        *bead_groups, range=(0, max_dist), nbins=200,
+        exclusion_block=(1, 1) if moltype_i == moltype_j else None).run(start, stop, step)
+    return np.convolve(rdf.results.rdf, np.ones((2,)) / 2, mode='same')[1:-1]
+
+
+def test_molecular_rdf_single_pass():
+    universe = create_md_universe(40)
+    results = calc_molecular_rdf(universe, n_traj_split=4, n_prune=3)
+
+    assert sorted(set(results['types'])) == ['0-0', '1-0', '1-1']
+    assert len(results['value']) == 12
+    for types, value, start, end in zip(
+            results['types'], results['value'], results['frame_start'], results['frame_end']):
+        expected = reference_molecular_rdf(universe, *types.split('-'), start, end, 3, 10.)
+        assert value == pytest.approx(expected)
+
+
+@pytest.mark.timing
+def test_md_analysis_benchmark():
+    '''
+    Compares the single pass and vectorized implementations with the per pair and per
+    frame python implementations they replace.
+    '''
+    universe = create_md_universe(400, n_molecules=(30, 20))
+    max_dist = 10.
+
+    start = time.time()
+    for moltypes in [('0', '0'), ('1', '0'), ('1', '1')]:
+        for i_interval in range(10):
+            reference_molecular_rdf(universe, *moltypes, i_interval * 40, (i_interval + 1) * 40, 1, max_dist)
+    reference_rdf_time = time.time() - start
+
+    start = time.time()
+    calc_molecular_rdf(universe)
+    rdf_time = time.time() - start
+
+    positions = np.cumsum(np.random.default_rng(0).normal(size=(20000, 50, 3)), axis=0)
+    times = np.arange(len(positions))
+
+    def msd(start, current):
+        return ((start - current) ** 2).sum(axis=1).mean()
+
+    start = time.time()
+    shifted_correlation_average(msd, times, positions)
+    reference_msd_time = time.time() - start
+
+    start = time.time()
+    shifted_mean_squared_displacement(times, positions)
+    msd_time = time.time() - start
+
+    start = time.time()
+    mean_squared_displacement_fft(positions)
+    msd_fft_time = time.time() - start
+
+    print(
+        f'rdf: per pair {reference_rdf_time:.3f}s, single pass {rdf_time:.3f}s; '
+        f'msd: per frame {reference_msd_time:.3f}s, vectorized {msd_time:.3f}s, '
+        f'fft (all origins) {msd_fft_time:.3f}s')
@@ -16,17 +16,20 @@
 # limitations under the License.
 #
 
-from typing import Generator, Any, Dict, Tuple, Iterable, List
+from typing import Generator, Any, Dict, Tuple, Iterable, List, Set
 from datetime import datetime
 import os
 import os.path
 import shutil
 import pytest
 import itertools
+import io
+import tarfile
 import zipfile
 import re
+import time
 
-from nomad import config, datamodel, utils
+from nomad import config, datamodel, files, utils
 from nomad.files import DirectoryObject, PathObject, empty_zip_file_size, empty_archive_file_size
 from nomad.files import StagingUploadFiles, PublicUploadFiles, UploadFiles
 from nomad.processing import Upload
@@ -352,6 +355,81 @@ class TestStagingUploadFiles(UploadFilesContract):
             except KeyError:
                 assert not filename.endswith('.stripped'), 'Only non-stripped file should be removed'
 
+    @pytest.mark.parametrize('pack_workers', [0, 2])
+    def test_pack_compressed(self, monkeypatch, pack_workers):
+        monkeypatch.setattr('nomad.config.process.raw_file_compression_level', 6)
+        monkeypatch.setattr('nomad.config.process.pack_workers', pack_workers)
+        monkeypatch.setattr('nomad.config.process.pack_chunk_size', 1024)
+        upload_id, entries, upload_files = create_staging_upload('test_pack', entry_specs='pp')
+        with open(upload_files.raw_file_object('examples_template/large.txt').os_path, 'wt') as f:
+            f.write('large file' * 1000)
+        with open(upload_files.raw_file_object('examples_template/data.gz').os_path, 'wb') as f:
+            f.write(b'already compressed')
+        contents = {
+            path: upload_files.raw_file(path, 'rb').read()
+            for path, os_path in upload_files._raw_files_to_pack() if os.path.isfile(os_path)}
+
+        upload_files.pack(entries, with_embargo=False)
+        upload_files.delete()
+        upload_files = PublicUploadFiles(upload_id)
+        for path, content in contents.items():
+            with upload_files.raw_file(path, 'rb') as f:
+                assert f.read() == content
+
+        with zipfile.ZipFile(upload_files.raw_zip_file_object().os_path) as zf:
+            assert zf.testzip() is None
+            assert zf.getinfo('examples_template/large.txt').compress_type == zipfile.ZIP_DEFLATED
+            assert zf.getinfo('examples_template/data.gz').compress_type == zipfile.ZIP_STORED
+
+    def test_pack_zip64(self, monkeypatch):
+        monkeypatch.setattr('nomad.files._zip64_limit', 100)
+        upload_id, entries, upload_files = create_staging_upload('test_pack', entry_specs='pp')
+        contents = {
+            path: upload_files.raw_file(path, 'rb').read()
+            for path, os_path in upload_files._raw_files_to_pack() if os.path.isfile(os_path)}
+
+        upload_files.pack(entries, with_embargo=False)
+        upload_files.delete()
+        upload_files = PublicUploadFiles(upload_id)
+        with zipfile.ZipFile(upload_files.raw_zip_file_object().os_path) as zf:
+            assert zf.testzip() is None
+            for path, content in contents.items():
+                assert zf.read(path) == content
+                with upload_files.raw_file(path, 'rb') as f:
+                    assert f.read() == content
+
+    @pytest.mark.timing
+    def test_pack_benchmark(self, monkeypatch):
+        '''
+        Compares packing the raw files of an upload uncompressed, compressed, and
+        compressed in parallel.
+        '''
+        upload_id, entries, upload_files = create_staging_upload('test_pack', entry_specs='p')
+        upload_files.raw_create_directory('files')
+        for i in range(200):
+            with open(upload_files.raw_file_object(f'files/{i}.txt').os_path, 'wt') as f:
+                f.write(f'{i} some file content\n' * (i * 100))
+        raw_size = sum(
+            os.path.getsize(os_path) for _, os_path in upload_files._raw_files_to_pack()
+            if os.path.isfile(os_path))
+        target_dir = DirectoryObject(PublicUploadFiles.base_folder_for(upload_id), create=True)
+
+        for level, pack_workers in [(0, 0), (1, 0), (6, 0), (6, 4)]:
+            monkeypatch.setattr('nomad.config.process.raw_file_compression_level', level)
+            monkeypatch.setattr('nomad.config.process.pack_workers', pack_workers)
+            monkeypatch.setattr('nomad.config.process.pack_chunk_size', 1024 ** 2)
+            start = time.time()
+            upload_files._pack_raw_files(target_dir, 'public', 'restricted')
+            pack_time = time.time() - start
+            zip_size = os.path.getsize(
+                PublicUploadFiles._create_raw_zip_file_object(target_dir, 'public').os_path)
+            print(
+                f'level {level}, {pack_workers} workers: {raw_size / pack_time / 1024 ** 2:.1f} MB/s, '
+                f'{zip_size / raw_size * 100:.1f}% of raw size')
+
+        upload_files.delete()
+        PublicUploadFiles(upload_id).delete()
+
     @pytest.mark.parametrize('with_mainfile', [True, False])
     def test_entry_files(self, test_upload: StagingUploadWithFiles, with_mainfile):
         _, entries, upload_files = test_upload
@@ -372,6 +450,172 @@ class TestStagingUploadFiles(UploadFilesContract):
         path_infos = test_upload.raw_directory_list(recursive=True, files_only=True)
         assert sorted(list(path_info.path for path_info in path_infos)) == sorted(example_file_contents)
 
+    @pytest.mark.parametrize('stream', [False, True])
+    def test_add_rawfiles_tar(self, test_upload_id, stream):
+        tar_path = os.path.join(config.fs.tmp, 'example.tar.gz')
+        with tarfile.open(tar_path, 'w:gz') as tf:
+            tf.add(example_directory, arcname='examples_template')
+            for name, link_type, link_name in [
+                    ('examples_template/hard_link', tarfile.LNKTYPE, 'examples_template/1.aux'),
+                    ('examples_template/symlink', tarfile.SYMTYPE, '/etc/passwd'),
+                    ('../outside', tarfile.REGTYPE, '')]:
+                tar_info = tarfile.TarInfo(name)
+                tar_info.type = link_type
+                tar_info.linkname = link_name
+                tf.addfile(tar_info, io.BytesIO())
+
+        test_upload = StagingUploadFiles(test_upload_id, create=True)
+        updated_files: Set[str] = set()
+        if stream:
+            extracted_path = os.path.join(config.fs.tmp, 'example_extracted')
+            with open(tar_path, 'rb') as f:
+                files.extract_tar_stream(f, extracted_path)
+            test_upload.add_rawfiles(
+                extracted_path, 'target', cleanup_source_file_and_dir=False, updated_files=updated_files)
+            shutil.rmtree(extracted_path)
+        else:
+            test_upload.add_rawfiles(tar_path, 'target', updated_files=updated_files)
+        os.remove(tar_path)
+
+        expected_files = [f'target/{path}' for path in example_file_contents + ['examples_template/hard_link']]
+        path_infos = test_upload.raw_directory_list(recursive=True, files_only=True)
+        assert sorted(path_info.path for path_info in path_infos) == sorted(expected_files)
+        assert sorted(updated_files) == sorted(expected_files)
+        with test_upload.raw_file('target/examples_template/hard_link', 'rb') as f:
+            assert f.read() == open(example_file_aux, 'rb').read()
+
+    @pytest.mark.parametrize('archive_name', ['example.zip', 'example.tar.gz'])
+    def test_add_rawfiles_corrupt_archive(self, test_upload_id, archive_name):
+        archive_path = os.path.join(config.fs.tmp, archive_name)
+        if archive_name.endswith('.zip'):
+            with zipfile.ZipFile(archive_path, 'w') as zf:
+                for path in example_file_contents:
+                    zf.write(os.path.join(example_directory, os.path.relpath(path, 'examples_template')), path)
+            # corrupt the data of the last member, keep the central directory intact
+            with zipfile.ZipFile(archive_path) as zf:
+                last_info = zf.infolist()[-1]
+            with open(archive_path, 'r+b') as f:
+                f.seek(last_info.header_offset + 30 + len(last_info.filename.encode()))
+                f.write(b'\xff' * 4)
+        else:
+            with tarfile.open(archive_path, 'w:gz') as tf:
+                tf.add(example_directory, arcname='examples_template')
+            # truncate the archive
+            with open(archive_path, 'r+b') as f:
+                f.truncate(os.path.getsize(archive_path) // 2)
+
+        test_upload = StagingUploadFiles(test_upload_id, create=True)
+        updated_files: Set[str] = set()
+        with pytest.raises(Exception):
+            test_upload.add_rawfiles(archive_path, updated_files=updated_files)
+        os.remove(archive_path)
+
+        assert len(updated_files) == 0
+        assert list(test_upload.raw_directory_list(recursive=True, files_only=True)) == []
+        assert not any(name.startswith('.extract') for name in os.listdir(test_upload.os_path))
+
+    def test_raw_directory_index(self, test_upload_id, monkeypatch):
+        test_upload = StagingUploadFiles(test_upload_id, create=True)
+        test_upload.add_rawfiles(example_file)
+        # recently modified directories are not indexed
+        entry_dir = test_upload.raw_file_object('examples_template').os_path
+        os.utime(entry_dir, ns=(0, 0))
+
+        entry_files = test_upload.entry_files(example_mainfile_raw_path)
+        assert sorted(entry_files) == sorted(example_file_contents)
+
+        def scandir(*args, **kwargs):
+            assert False, 'directory should be indexed'
+
+        with monkeypatch.context() as m:
+            m.setattr('nomad.files.os.scandir', scandir)
+            assert test_upload.entry_files(example_mainfile_raw_path) == entry_files
+            assert StagingUploadFiles(test_upload_id).entry_files(example_mainfile_raw_path) == entry_files
+            assert test_upload.raw_path_is_file(example_mainfile_raw_path)
+            assert not test_upload.raw_path_is_file('examples_template/does_not_exist')
+
+        # files rewritten in place (e.g. by parsers) do not modify the directory
+        with open(test_upload.raw_file_object('examples_template/1.aux').os_path, 'wt') as f:
+            f.write('rewritten aux')
+        os.utime(entry_dir, ns=(0, 0))
+        sizes = {
+            path_info.path: path_info.size
+            for path_info in test_upload.raw_directory_list('examples_template')}
+        assert sizes['examples_template/1.aux'] == len('rewritten aux')
+
+        with test_upload.raw_file('examples_template/3.aux', 'wt') as f:
+            f.write('aux')
+        os.utime(entry_dir, ns=(0, 0))
+        assert 'examples_template/3.aux' in test_upload.entry_files(example_mainfile_raw_path)
+
+        monkeypatch.setattr('nomad.config.process.raw_directory_index_size', 0)
+        assert 'examples_template/3.aux' in test_upload.entry_files(example_mainfile_raw_path)
+
+    def test_raw_size_index(self, test_upload_id):
+        test_upload = StagingUploadFiles(test_upload_id, create=True)
+        test_upload.add_rawfiles(example_file)
+        test_upload.update_raw_size_index()
+
+        def assert_listings():
+            for recursive in [True, False]:
+                indexed = list(test_upload.raw_directory_list(recursive=recursive))
+                index = test_upload._read_raw_size_index()
+                test_upload._delete_raw_size_index()
+                assert indexed == list(test_upload.raw_directory_list(recursive=recursive))
+                test_upload._write_raw_size_index(index)
+
+        assert_listings()
+        test_upload.add_rawfiles(example_file, target_dir='subdir/subsubdir')
+        assert_listings()
+        test_upload.copy_or_move_rawfile(
+            'examples_template/1.aux', 'subdir/subsubdir/examples_template/3.aux', 'copy')
+        assert_listings()
+        test_upload.copy_or_move_rawfile(
+            'subdir/subsubdir/examples_template/1.aux', 'subdir/1.aux', 'move')
+        assert_listings()
+        test_upload.raw_create_directory('empty/subdir')
+        assert_listings()
+        test_upload.delete_rawfiles('examples_template/2.aux')
+        assert_listings()
+        test_upload.delete_rawfiles('subdir/subsubdir')
+        assert_listings()
+        assert test_upload._read_raw_size_index()['subdir'] == [os.path.getsize(example_file_aux), 1]
+
+        with test_upload.raw_file('examples_template/4.aux', 'wt') as f:
+            f.write('aux')
+        assert test_upload._read_raw_size_index() is None
+
+    @pytest.mark.timing
+    def test_raw_size_index_benchmark(self, test_upload_id):
+        '''
+        Compares listing the top level directory of a deep tree with and without
+        raw size index.
+        '''
+        test_upload = StagingUploadFiles(test_upload_id, create=True)
+
+        def create(path, depth):
+            test_upload.raw_create_directory(path)
+            for i in range(5):
+                with open(test_upload.raw_file_object(f'{path}/{i}.dat').os_path, 'wt') as f:
+                    f.write('data' * i)
+            if depth > 0:
+                for i in range(3):
+                    create(f'{path}/{i}', depth - 1)
+
+        create('tree', 7)
+        test_upload.update_raw_size_index()
+
+        start = time.time()
+        indexed = list(test_upload.raw_directory_list())
+        indexed_time = time.time() - start
+
+        test_upload._delete_raw_size_index()
+        start = time.time()
+        assert list(test_upload.raw_directory_list()) == indexed
+        crawl_time = time.time() - start
+
+        print(f'listing top level: crawling {crawl_time:.3f}s, indexed {indexed_time:.3f}s')
+
     @pytest.mark.parametrize('prefix_size', [0, 2])
     def test_prefix_size(self, monkeypatch, prefix_size):
         monkeypatch.setattr('nomad.config.fs.prefix_size', prefix_size)
@@ -486,6 +730,98 @@ class TestPublicUploadFiles(UploadFilesContract):
 
         assert upload_files.to_staging_upload_files() is None
 
+    @pytest.mark.parametrize('compression_level', [0, 6])
+    def test_raw_file_seek(self, monkeypatch, test_upload_id, compression_level):
+        monkeypatch.setattr('nomad.config.process.raw_file_compression_level', compression_level)
+        _, _, upload_files = create_public_upload(test_upload_id, entry_specs='p', with_upload=False)
+        with open(example_file_mainfile, 'rb') as f:
+            content = f.read()
+
+        with upload_files.raw_file(example_mainfile_raw_path, 'rb') as f:
+            f.seek(100)
+            assert f.read(10) == content[100:110]
+            assert f.tell() == 110
+            f.seek(-10, io.SEEK_END)
+            assert f.read() == content[-10:]
+            f.seek(0)
+            assert f.read() == content
+        assert upload_files.raw_file_etag(example_mainfile_raw_path)
+        with pytest.raises(KeyError):
+            upload_files.raw_file_etag('does/not/exist')
+
+    def test_raw_file_corrupt_compressed(self, monkeypatch, test_upload_id):
+        monkeypatch.setattr('nomad.config.process.raw_file_compression_level', 6)
+        _, _, upload_files = create_public_upload(test_upload_id, entry_specs='p', with_upload=False)
+        info = upload_files._raw_zip_info(example_mainfile_raw_path)
+        assert info.compress_type == zipfile.ZIP_DEFLATED
+
+        os_path = upload_files.raw_zip_file_object().os_path
+        with open(os_path, 'r+b') as f:
+            f.seek(files._zip_member_data_offset(os_path, info) + info.compress_size // 2)
+            f.write(b'\x00\x01\x02\x03')
+
+        with pytest.raises(zipfile.BadZipFile):
+            with upload_files.raw_file(example_mainfile_raw_path, 'rb') as f:
+                f.read()
+
+    def test_raw_zip_index(self, test_upload_id):
+        _, _, upload_files = create_public_upload(test_upload_id, entry_specs='pr', with_upload=False)
+        index_file = upload_files.raw_zip_index_file_object()
+        assert index_file.exists()
+        assert upload_files._open_raw_zip_index() is not None
+
+        def contents(upload_files):
+            result = {}
+            for path_info in upload_files.raw_directory_list(recursive=True):
+                if path_info.is_file:
+                    with upload_files.raw_file(path_info.path, 'rb') as f:
+                        result[path_info.path] = (path_info.size, f.read(), upload_files.raw_file_etag(path_info.path))
+                else:
+                    result[path_info.path] = path_info.size
+            return result
+
+        indexed_contents = contents(upload_files)
+        assert len(indexed_contents) > 0
+
+        # without index, the zip file's central directory is used
+        index_file.delete()
+        upload_files = PublicUploadFiles(test_upload_id)
+        assert upload_files._open_raw_zip_index() is None
+        assert contents(upload_files) == indexed_contents
+
+        upload_files.update_raw_zip_index()
+        assert index_file.exists()
+        upload_files = PublicUploadFiles(test_upload_id)
+        assert upload_files._open_raw_zip_index() is not None
+        assert contents(upload_files) == indexed_contents
+
+        # an index that does not belong to the zip file is ignored
+        with open(upload_files.raw_zip_file_object().os_path, 'ab') as f:
+            f.write(b'\0')
+        assert PublicUploadFiles(test_upload_id)._open_raw_zip_index() is None
+
+    def test_extract_raw_directory(self, test_upload_id):
+        _, _, public_upload_files = create_public_upload(test_upload_id, entry_specs='pp', with_upload=False)
+        staging_upload_files = StagingUploadFiles(test_upload_id, create=True)
+
+        def extracted_files():
+            return sorted(
+                path_info.path
+                for path_info in staging_upload_files.raw_directory_list(recursive=True, files_only=True))
+
+        # sub directories are extracted as well
+        staging_upload_files.extract_raw_directory(public_upload_files, '1')
+        assert extracted_files() == sorted(f'1/{path}' for path in example_file_contents)
+
+        # directories within extracted directories are not extracted again
+        staging_upload_files.delete_rawfiles('1/examples_template/1.aux')
+        staging_upload_files.extract_raw_directory(public_upload_files, '1/examples_template')
+        assert '1/examples_template/1.aux' not in extracted_files()
+
+        staging_upload_files.extract_raw_directory(public_upload_files, '')
+        assert len(extracted_files()) == 2 * len(example_file_contents)
+        public_upload_files.close()
+
     def test_repack(self, test_upload):
         upload_id, entries, upload_files = test_upload
         for entry in entries:
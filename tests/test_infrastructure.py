@@ -17,8 +17,12 @@
 #
 
 import pytest
+import time
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
 
-from nomad.infrastructure import UserManagement
+from nomad import config
+from nomad.infrastructure import UserManagement, Keycloak, KeycloakError
 
 from tests.conftest import test_user_uuid as create_test_user_uuid
 
@@ -54,3 +58,111 @@ def test_get_admin_user(monkeypatch, user_management: UserManagement):
     assert user is not None
     monkeypatch.setattr('nomad.config.services.admin_user_id', user.user_id)
     assert user.is_admin
+
+
+@pytest.fixture(scope='function')
+def token_issuer(monkeypatch):
+    ''' A keycloak instance that verifies tokens signed with a local test key. '''
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    keycloak = Keycloak()
+    monkeypatch.setattr(keycloak, '_Keycloak__public_keys', {'test-kid': private_key.public_key()})
+    issuer = f'{config.keycloak.public_server_url.rstrip("/")}/realms/{config.keycloak.realm_name}'
+
+    def create_token(user_id='test-user', expires_in=300):
+        token = jwt.encode(
+            dict(sub=user_id, iss=issuer, exp=int(time.time()) + expires_in),
+            private_key, algorithm='RS256', headers=dict(kid='test-kid'))
+        return token.decode('utf-8') if isinstance(token, bytes) else token
+
+    return keycloak, create_token
+
+
+@pytest.fixture(scope='function')
+def jwt_decode_calls(monkeypatch):
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr('jwt.decode', counting_decode)
+    return calls
+
+
+def test_token_cache(monkeypatch, token_issuer, jwt_decode_calls):
+    monkeypatch.setattr('nomad.config.keycloak.token_cache_size', 10)
+    keycloak, create_token = token_issuer
+
+    token = create_token()
+    for _ in range(3):
+        assert keycloak.tokenauth(token).user_id == 'test-user'
+    assert len(jwt_decode_calls) == 1
+
+    assert keycloak.tokenauth(create_token(user_id='other-user')).user_id == 'other-user'
+    assert len(jwt_decode_calls) == 2
+
+    expired_token = create_token(expires_in=-10)
+    for _ in range(2):
+        with pytest.raises(KeycloakError):
+            keycloak.tokenauth(expired_token)
+    assert len(jwt_decode_calls) == 4
+
+    monkeypatch.setattr('nomad.config.keycloak.token_cache_size', 0)
+    keycloak.tokenauth(token)
+    assert len(jwt_decode_calls) == 5
+
+
+def test_token_cache_expiry(monkeypatch, token_issuer, jwt_decode_calls):
+    monkeypatch.setattr('nomad.config.keycloak.token_cache_size', 10)
+    keycloak, create_token = token_issuer
+
+    token = create_token(expires_in=1)
+    keycloak.tokenauth(token)
+    time.sleep(1.5)
+    with pytest.raises(KeycloakError):
+        keycloak.tokenauth(token)
+    assert len(jwt_decode_calls) == 2
+
+
+@pytest.mark.timing
+def test_token_cache_benchmark(monkeypatch, token_issuer):
+    keycloak, create_token = token_issuer
+    token = create_token()
+    requests = 1000
+
+    for cache_size in [0, 10]:
+        monkeypatch.setattr('nomad.config.keycloak.token_cache_size', cache_size)
+        start = time.time()
+        for _ in range(requests):
+            keycloak.tokenauth(token)
+        print(f'token cache size {cache_size}: {(time.time() - start) / requests * 1e6:.1f}µs per request')
+
+
+def test_admin_client_reuse(monkeypatch):
+    from nomad.infrastructure import KeycloakUserManagement
+
+    class FakeKeycloakAdmin:
+        created = 0
+
+        def __init__(self, **kwargs):
+            FakeKeycloakAdmin.created += 1
+            self.refreshed = 0
+            self.token = dict(expires_in=300)
+
+        def refresh_token(self):
+            self.refreshed += 1
+
+    monkeypatch.setattr('nomad.infrastructure.KeycloakAdmin', FakeKeycloakAdmin)
+    user_management = KeycloakUserManagement()
+
+    client = user_management._admin_client
+    assert user_management._admin_client is client
+    assert FakeKeycloakAdmin.created == 1
+    assert client.refreshed == 0
+
+    # an expired admin token is refreshed and the client is kept
+    monkeypatch.setattr(user_management, '_KeycloakUserManagement__admin_token_expires', 0)
+    assert user_management._admin_client is client
+    assert client.refreshed == 1
+    assert FakeKeycloakAdmin.created == 1
@@ -20,13 +20,16 @@ from typing import List, Dict, Any, Union, Iterable
 import pytest
 import json
 from datetime import datetime
+from elasticsearch_dsl.response import Response
 
 from nomad import config, utils, infrastructure
-from nomad.app.v1.models import WithQuery
+from nomad.app.v1.models import WithQuery, MetadataRequired
 from nomad.datamodel.datamodel import EntryArchive, EntryData, EntryMetadata
 from nomad.metainfo.metainfo import Datetime, Quantity
 from nomad.metainfo.util import MEnum
-from nomad.search import quantity_values, search, update_by_query, refresh
+from nomad.search import (
+    quantity_values, search, search_iterator, update_by_query, refresh, search_cache_info,
+    clear_search_cache)
 from nomad.metainfo.elasticsearch_extension import entry_type, entry_index, material_index
 from nomad.utils.exampledata import ExampleData
 
@@ -212,6 +215,68 @@ def test_update_by_query(indices, example_data):
     assert results.pagination.total == 4
 
 
+def test_search_cache(indices, monkeypatch):
+    # an in-memory stand-in for elasticsearch that counts the requests
+    es_requests = []
+
+    def execute(self, *args, **kwargs):
+        es_requests.append(self.to_dict())
+        return Response(self, {
+            'hits': {'total': {'value': 1, 'relation': 'eq'}, 'hits': [
+                {'_id': 'test_entry_id', '_source': {'entry_id': 'test_entry_id'}}]}})
+
+    monkeypatch.setattr('elasticsearch_dsl.Search.execute', execute)
+    monkeypatch.setattr('nomad.config.elastic.search_cache_size', 10)
+    clear_search_cache()
+
+    def search_entry(**kwargs):
+        results = search(owner='all', query=WithQuery(query=kwargs).query)
+        assert results.data[0]['entry_id'] == 'test_entry_id'
+        return results
+
+    search_entry(entry_id='test_entry_id')
+    results = search_entry(entry_id='test_entry_id')
+    assert len(es_requests) == 1
+    assert search_cache_info() == dict(hits=1, misses=1, size=1)
+
+    # cached results can be modified by the caller
+    results.data.clear()
+    search_entry(entry_id='test_entry_id')
+
+    search_entry(upload_id='test_upload_id')
+    assert len(es_requests) == 2
+
+    # refreshing the index invalidates the cache
+    refresh()
+    search_entry(entry_id='test_entry_id')
+    assert len(es_requests) == 3
+    assert search_cache_info() == dict(hits=2, misses=3, size=2)
+
+
+@pytest.mark.parametrize('order_by, page_size, slices', [
+    pytest.param(None, 1, 2, id='sliced'),
+    pytest.param(None, 100, 1, id='single-slice'),
+    pytest.param('entry_id', 1, 2, id='ordered'),
+    pytest.param('upload_id', 3, None, id='ordered-by-other')])
+def test_search_iterator(indices, example_data, order_by, page_size, slices):
+    results = list(search_iterator(
+        owner='all', order_by=order_by, page_size=page_size, slices=slices,
+        required=MetadataRequired(include=['entry_id'])))
+    entry_ids = [result['entry_id'] for result in results]
+    expected = ['test_entry_id_0', 'test_entry_id_1', 'test_entry_id_2', 'test_entry_id_3']
+
+    if order_by == 'entry_id':
+        assert entry_ids == expected
+    else:
+        assert sorted(entry_ids) == expected
+
+
+def test_search_iterator_close(indices, example_data):
+    results = search_iterator(owner='all', page_size=1, slices=2)
+    assert next(results)['entry_id'].startswith('test_entry_id')
+    results.close()
+
+
 def test_quantity_values(indices, example_data):
     results = list(quantity_values('entry_id', page_size=1, owner='all'))
     assert results == ['test_entry_id_0', 'test_entry_id_1', 'test_entry_id_2', 'test_entry_id_3']